@@ -5,13 +5,17 @@ import os
 # Инициализация расширений
 db = SQLAlchemy()
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
     
     # Загрузка конфигурации
     app.config.from_pyfile('../instance/config.py')
+    if test_config:
+        app.config.update(test_config)
     
-    # Инициализация базы данных
+    # Инициализация базы данных: движок писателя, затем PRAGMA и пул читателей
+    from .services.storage import init_storage, writer_engine_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = writer_engine_options(app.config)
     db.init_app(app)
     
     # Регистрация маршрутов
@@ -20,7 +24,22 @@ def create_app():
     
     # Создание таблиц базы данных
     with app.app_context():
+        init_storage(app)
         db.create_all()
+        # Базы, созданные до появления ключа слота и индексов
+        from .services.storage import migrate_schema
+        migrate_schema()
+        # Поколения данных, брошенные упавшим процессом
+        from .services.generations import GENERATION_STALE_SECONDS, recover_generations
+        recover_generations(app.config.get('GENERATION_STALE_SECONDS', GENERATION_STALE_SECONDS))
+    
+    # Плановое обновление клубов
+    from .services.scheduler import start_scheduler
+    start_scheduler(app)
+    
+    # Удаление прошедших слотов и сжатие базы
+    from .services.retention import start_retention
+    start_retention(app)
     
     return app
 
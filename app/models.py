@@ -10,6 +10,68 @@ class TennisCourt(db.Model):
     status = db.Column(db.String(20), default='свободен')  # свободен/занят
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Версия строки: видна в поколениях valid_from <= g < valid_to (NULL - действует сейчас)
+    valid_from = db.Column(db.Integer, nullable=False, default=0)
+    valid_to = db.Column(db.Integer, nullable=True)
+
+    # Индексы повторяют форму горячих запросов; существующие базы
+    # приводятся к этому набору при старте (storage.ensure_indexes)
+    __table_args__ = (
+        # Одна версия слота на поколение (ключ для INSERT ... ON CONFLICT)
+        db.UniqueConstraint('club_name', 'court_number', 'date', 'time_slot', 'valid_from',
+                            name='uq_tennis_court_slot'),
+        # Листинг: date >= сегодня в порядке (дата, время, клуб, корт); status и границы
+        # версии в конце делают индекс покрывающим - /data читается без обращения к таблице
+        db.Index('ix_tennis_court_listing', 'date', 'time_slot', 'club_name', 'court_number', 'status',
+                 'valid_from', 'valid_to'),
+        # Действующие версии: выборка статусов перед upsert и сверка числа строк
+        # с отпечатками (club IN, date IN, GROUP BY club, date). valid_to в частичном
+        # индексе всегда NULL, но без него SQLite не считает индекс покрывающим
+        db.Index('ix_tennis_court_club_date', 'club_name', 'date', 'court_number', 'time_slot', 'status',
+                 'valid_from', 'valid_to', sqlite_where=db.text('valid_to IS NULL'),
+                 postgresql_where=db.text('valid_to IS NULL')),
+        # Закрытые версии: сборка мусора по valid_to
+        db.Index('ix_tennis_court_closed', 'valid_to', sqlite_where=db.text('valid_to IS NOT NULL'),
+                 postgresql_where=db.text('valid_to IS NOT NULL')),
+    )
 
     def __repr__(self):
         return f'<TennisCourt {self.club_name} - Court {self.court_number} - {self.date} {self.time_slot}>'
+
+class ScrapeFingerprint(db.Model):
+    """Отпечаток содержимого слотов клуба за одну дату по данным одного источника"""
+    id = db.Column(db.Integer, primary_key=True)
+    # Источник - имя парсера из PARSERS (у одного клуба бывает несколько источников)
+    source = db.Column(db.String(100), nullable=False, default='')
+    club_name = db.Column(db.String(100), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    record_count = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('source', 'club_name', 'date', name='uq_scrape_fingerprint'),)
+
+    def __repr__(self):
+        return f'<ScrapeFingerprint {self.source}: {self.club_name} - {self.date} {self.fingerprint[:8]}>'
+
+class DataGeneration(db.Model):
+    """Поколение данных: одно обновление, публикуемое целиком"""
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='building')  # building/published/aborted
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    # Процесс, который строит поколение, и время его последней записи
+    owner_host = db.Column(db.String(255))
+    owner_pid = db.Column(db.Integer)
+    heartbeat_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<DataGeneration {self.id} {self.status}>'
+
+class GenerationPointer(db.Model):
+    """Единственная строка: номер опубликованного поколения, которое видят читатели"""
+    id = db.Column(db.Integer, primary_key=True)
+    generation_id = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<GenerationPointer {self.generation_id}>'
@@ -1,16 +1,48 @@
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
+import asyncio
 import logging
 import time
-import os
-import platform
-import subprocess
-from pathlib import Path
+import threading
+from urllib.parse import urlparse
+
+from app.services.driver_resolver import get_chromedriver_resolver
+from .waits import ElementPresent, NetworkQuiet
+from .retry import RetryPolicy
+from . import normalization
 
 class BaseParser(ABC):
+    # Собственный дедлайн парсера в секундах (None - используется PARSER_TIMEOUT сервиса)
+    timeout = None
+    # Профиль перехвата сетевых запросов (None - перехват выключен)
+    interception_profile = None
+    # Условия готовности страницы после загрузки (см. app/parsers/waits.py)
+    ready_conditions = (NetworkQuiet(500),)
+    # Таймаут одного ожидания, секунды
+    wait_timeout = 15
+    # CSS-селектор кнопки согласия с cookies
+    cookie_selector = "button[class*='cookie'], button[class*='accept'], .accept-cookies, #accept-cookies"
+    # Запись/воспроизведение трафика (см. app/services/replay.py), None - живой режим
+    harness = None
+    # Политика повторов для safe_parse/safe_parse_async (см. app/parsers/retry.py)
+    retry_policy = RetryPolicy()
+    # Запасные тестовые данные при недоступности источника (см. _get_test_data)
+    test_courts = 3
+    test_status_rule = (2, 0)
+    # Парсер отдает записи порциями через iter_courts_data (потоковая запись в БД)
+    streams = False
+    # Имя источника из PARSERS (назначается реестром); ключ отпечатков и расписания
+    source = None
+
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.setup_logger()
+        self._cancel_event = threading.Event()
+        # Журнал ожиданий: (условие, секунды, выполнено ли)
+        self.wait_timings = []
+        # Ошибка источника в последнем запуске (для размыкателя ParserService)
+        self.last_error = None
+        # Бюджет повторов текущего цикла обновления (назначается ParserService)
+        self.retry_budget = None
         
     def setup_logger(self):
         """Настройка логгера для парсера"""
@@ -38,156 +70,166 @@ class BaseParser(ABC):
         """
         pass
     
-    def safe_parse(self, func, max_retries=3, delay=2):
+    async def iter_courts_data(self):
         """
-        Безопасное выполнение парсинга с повторными попытками
+        Потоковый вариант get_courts_data: асинхронный генератор порций записей.
+        Каждая порция содержит полные группы (клуб, дата) - по ним считаются
+        отпечатки. По умолчанию это результат get_courts_data, разбитый по
+        (клуб, дата); парсеры со streams = True переопределяют метод и отдают
+        порции по мере готовности.
         """
-        for attempt in range(max_retries):
-            try:
-                return func()
-            except Exception as e:
-                self.logger.warning(f"Попытка {attempt + 1} не удалась: {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(delay * (attempt + 1))
-                else:
-                    self.logger.error(f"Все попытки парсинга не удалась после {max_retries} попыток")
-                    raise
+        if asyncio.iscoroutinefunction(self.get_courts_data):
+            records = await self.get_courts_data()
+        else:
+            records = await asyncio.to_thread(self.get_courts_data)
+        
+        groups = {}
+        for record in records or []:
+            groups.setdefault((record['club_name'], record['date']), []).append(record)
+        for chunk in groups.values():
+            yield chunk
     
-    def normalize_time(self, time_str):
-        """Нормализация формата времени"""
-        time_str = time_str.strip().lower()
+    @property
+    def host(self):
+        """Хост источника данных парсера"""
+        return urlparse(getattr(self, 'url', '') or '').hostname
+    
+    def report_failure(self, error):
+        """Запоминает ошибку источника, даже если парсер вернул запасные данные"""
+        self.last_error = str(error)
+    
+    def cancel(self):
+        """Отмена парсинга (вызывается сервисом при превышении дедлайна)"""
+        self._cancel_event.set()
+        self.logger.warning(f"Парсинг {getattr(self, 'club_name', self.__class__.__name__)} отменен")
+    
+    @property
+    def is_cancelled(self):
+        """Признак того, что парсинг был отменен"""
+        return self._cancel_event.is_set()
+    
+    def reset_cancel(self):
+        """Сброс признака отмены перед новым запуском"""
+        self._cancel_event.clear()
+    
+    def wait_for(self, condition, timeout=None, driver=None):
+        """Ожидание условия в Selenium с опросом каждые 100 мс; возвращает True/False"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import TimeoutException
         
-        # Замена общих форматов
-        replacements = {
-            'утро': '09:00',
-            'день': '13:00', 
-            'вечер': '18:00',
-            'ночь': '21:00',
-            'полдень': '12:00'
-        }
+        driver = driver or getattr(self, 'driver', None)
+        if not driver:
+            return False
         
-        for key, value in replacements.items():
-            if key in time_str:
-                return value
+        timeout = timeout or self.wait_timeout
+        started = time.monotonic()
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=0.1).until(lambda d: condition.check(d))
+            return self._record_wait(condition, started, True)
+        except TimeoutException:
+            return self._record_wait(condition, started, False)
+    
+    async def wait_for_async(self, page, condition, timeout=None):
+        """Ожидание условия в Playwright; возвращает True/False"""
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
         
-        # Очистка от лишних символов
-        time_str = ''.join(c for c in time_str if c.isdigit() or c in ':.-')
+        timeout = timeout or self.wait_timeout
+        started = time.monotonic()
+        try:
+            await condition.wait_async(page, timeout)
+            return self._record_wait(condition, started, True)
+        except PlaywrightTimeoutError:
+            return self._record_wait(condition, started, False)
+    
+    async def wait_until_ready_async(self, page, conditions=None):
+        """Ожидание всех условий готовности парсера в Playwright"""
+        results = [await self.wait_for_async(page, condition)
+                   for condition in (conditions or self.ready_conditions)]
+        return all(results)
+    
+    def _record_wait(self, condition, started, success):
+        elapsed = time.monotonic() - started
+        self.wait_timings.append((str(condition), elapsed, success))
+        if success:
+            self.logger.info(f"Ожидание [{condition}]: {elapsed:.2f} с")
+        else:
+            self.logger.warning(f"Ожидание [{condition}] не дождались за {elapsed:.2f} с")
+        return success
+    
+    def wait_for_page_load(self):
+        """Ожидание загрузки страницы по условиям готовности парсера"""
+        if not getattr(self, 'driver', None):
+            return
         
-        # Если есть точка - заменяем на двоеточие
-        time_str = time_str.replace('.', ':')
+        # Ждем появления основного контента
+        if not self.wait_for(ElementPresent('body')):
+            self.logger.error("Ошибка при ожидании загрузки страницы: нет <body>")
+            raise TimeoutError("Страница не загрузилась")
         
-        # Если только часы - добавляем минуты
-        if ':' not in time_str and len(time_str) <= 2:
-            return f"{int(time_str):02d}:00"
+        # Вместо фиксированной паузы ждем условия готовности динамических элементов
+        for condition in self.ready_conditions:
+            self.wait_for(condition)
         
-        # Если формат HH:MM
-        if ':' in time_str:
-            parts = time_str.split(':')
-            if len(parts) >= 2:
-                hours = int(parts[0])
-                minutes = int(parts[1][:2]) if len(parts[1]) >= 2 else 0
-                
-                # Нормализация часов (24-часовой формат)
-                if hours > 23:
-                    hours = hours % 24
-                
-                return f"{hours:02d}:{minutes:02d}"
+        self.logger.info("Страница загружена")
+    
+    def accept_cookies(self):
+        """Принятие cookies, если баннер уже есть на загруженной странице"""
+        driver = getattr(self, 'driver', None)
+        if not driver:
+            return
         
-        return time_str
+        from selenium.webdriver.common.by import By
+        try:
+            buttons = [b for b in driver.find_elements(By.CSS_SELECTOR, self.cookie_selector) if b.is_displayed()]
+            if buttons:
+                buttons[0].click()
+                self.logger.info("Cookies приняты")
+        except Exception as e:
+            self.logger.debug(f"Кнопка cookies не кликабельна: {str(e)}")
+    
+    def safe_parse(self, func, max_retries=None, delay=None):
+        """
+        Безопасное выполнение парсинга с повторными попытками
+        """
+        policy = self.retry_policy.with_options(max_retries, delay)
+        return policy.call(func, budget=self.retry_budget, cancel_event=self._cancel_event, log=self.logger)
+    
+    async def safe_parse_async(self, func, max_retries=None, delay=None):
+        """
+        Повторные попытки для корутины func() без блокировки event loop
+        """
+        policy = self.retry_policy.with_options(max_retries, delay)
+        return await policy.call_async(func, budget=self.retry_budget, cancel_event=self._cancel_event, log=self.logger)
+    
+    def _get_test_data(self):
+        """Тестовые данные для проверки работы: 3 дня, слоты с 7:00 до 23:00 через 30 минут"""
+        from .synthetic import generate_slots, parity_status
+        
+        test_data = generate_slots(self.club_name, self.test_courts, 3, parity_status(*self.test_status_rule))
+        self.logger.info(f"Сгенерировано тестовых данных: {len(test_data)} записей")
+        return test_data
+    
+    def normalize_time(self, time_str):
+        """Нормализация формата времени (см. app/parsers/normalization.py)"""
+        return normalization.normalize_time(time_str)
     
     def normalize_date(self, date_str, base_date=None):
         """Нормализация даты"""
-        if not base_date:
-            base_date = datetime.now()
-        
-        date_str = date_str.strip().lower()
-        
-        # Сегодня/завтра
-        if 'сегодня' in date_str:
-            return base_date.date()
-        elif 'завтра' in date_str:
-            return (base_date + timedelta(days=1)).date()
-        
-        # Дни недели
-        weekdays = {
-            'пн': 0, 'понедельник': 0,
-            'вт': 1, 'вторник': 1,
-            'ср': 2, 'среда': 2,
-            'чт': 3, 'четверг': 3,
-            'пт': 4, 'пятница': 4,
-            'сб': 5, 'суббота': 5,
-            'вс': 6, 'воскресенье': 6
-        }
-        
-        for weekday_name, weekday_num in weekdays.items():
-            if weekday_name in date_str:
-                # Находим следующий такой день недели
-                days_ahead = weekday_num - base_date.weekday()
-                if days_ahead <= 0:
-                    days_ahead += 7
-                return (base_date + timedelta(days=days_ahead)).date()
-        
-        # Попытка распарсить стандартные форматы даты
-        from dateutil import parser
-        try:
-            parsed_date = parser.parse(date_str, dayfirst=True)
-            return parsed_date.date()
-        except:
-            self.logger.warning(f"Не удалось распарсить дату: {date_str}")
-            return base_date.date()
+        return normalization.normalize_date(date_str, base_date)
+    
+    def normalize_times(self, values):
+        """Пакетная нормализация столбца строк времени"""
+        return normalization.normalize_times(values)
+    
+    def normalize_dates(self, values, base_date=None):
+        """Пакетная нормализация столбца строк дат"""
+        return normalization.normalize_dates(values, base_date)
     
     def get_chromedriver_path(self):
-        """Надежный поиск пути к ChromeDriver для snap-версии"""
-        import platform
-        
-        # Список возможных путей для snap-версии
-        snap_paths = [
-            '/snap/bin/chromium.chromedriver',
-            '/snap/chromium/current/usr/lib/chromium-browser/chromedriver'
-        ]
-        
-        # Стандартные пути
-        standard_paths = [
-            str(Path(__file__).parent.parent.parent / 'drivers' / 'chromedriver'),
-            str(Path(__file__).parent.parent.parent / 'drivers' / 'chromedriver_linux64'),
-            '/usr/bin/chromedriver',
-            '/usr/local/bin/chromedriver',
-            '/usr/lib/chromium-browser/chromedriver'
-        ]
-        
-        all_paths = snap_paths + standard_paths
-        
-        for path in all_paths:
-            if os.path.exists(path):
-                self.logger.info(f"Найден файл драйвера: {path}")
-                
-                # Проверяем права на выполнение
-                if not os.access(path, os.X_OK):
-                    try:
-                        os.chmod(path, 0o755)
-                        self.logger.info(f"Права на выполнение установлены для: {path}")
-                    except Exception as e:
-                        self.logger.warning(f"Не удалось установить права для {path}: {str(e)}")
-                
-                # Проверяем версию
-                try:
-                    result = subprocess.run([path, '--version'], 
-                                          capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0:
-                        version_info = result.stdout.strip()
-                        self.logger.info(f"✅ ChromeDriver найден: {path}")
-                        self.logger.info(f"Версия: {version_info}")
-                        return path
-                    else:
-                        self.logger.warning(f"Файл существует, но не является ChromeDriver: {path}")
-                except Exception as e:
-                    self.logger.warning(f"Ошибка при проверке {path}: {str(e)}")
-        
-        # Если ничего не найдено, пробуем установить автоматически
-        self.logger.error("❌ ChromeDriver не найден ни в одном из путей:")
-        for path in all_paths:
-            self.logger.error(f"  - {path}")
+        """Путь к ChromeDriver (поиск выполняется один раз на процесс и кэшируется на диске)"""
+        driver_path = get_chromedriver_resolver().resolve()
         
-        # Emergency: используем тестовые данные
-        self.logger.error("🚨 EMERGENCY MODE: ChromeDriver недоступен. Будут использоваться ТОЛЬКО тестовые данные.")
-        return None
+        if not driver_path:
+            # Emergency: используем тестовые данные
+            self.logger.error("🚨 EMERGENCY MODE: ChromeDriver недоступен. Будут использоваться ТОЛЬКО тестовые данные.")
+        return driver_path
@@ -0,0 +1,77 @@
+import logging
+from datetime import datetime
+
+from .records import SlotRecord
+
+logger = logging.getLogger('SlotExtraction')
+
+# Нормализация статусов, которые может вернуть JS-экстрактор
+STATUS_MAP = {
+    'free': 'свободен',
+    'свободен': 'свободен',
+    True: 'свободен',
+    'busy': 'занят',
+    'занят': 'занят',
+    False: 'занят'
+}
+
+
+class ExtractionError(Exception):
+    """Экстрактор вернул данные неверного формата"""
+
+
+class SlotExtractor:
+    """JS-экстрактор, который за один вызов возвращает все слоты страницы
+
+    Скрипт - JS-функция одного аргумента (контекст из Python), возвращающая
+    список объектов {court, date, time, status}. Python только проверяет
+    и нормализует результат, поэтому на страницу уходит один IPC-вызов
+    вместо нескольких на каждый слот.
+    """
+
+    def __init__(self, script):
+        self.script = script
+
+    async def extract_async(self, page, context=None):
+        """Playwright: один page.evaluate на страницу"""
+        return await page.evaluate(self.script, context or {})
+
+    def extract_sync(self, driver, context=None):
+        """Selenium: один execute_script на страницу"""
+        return driver.execute_script(f"return ({self.script})(arguments[0]);", context or {})
+
+    def normalize(self, payload, parser, default_date=None, default_court=None):
+        """Проверка payload и приведение к формату записей парсера"""
+        if not isinstance(payload, list):
+            raise ExtractionError(f"Ожидался список слотов, получено: {type(payload).__name__}")
+
+        records = []
+        raw_times = []
+        for item in payload:
+            if not isinstance(item, dict) or not item.get('time'):
+                logger.debug(f"Пропущен некорректный слот: {item}")
+                continue
+
+            status = STATUS_MAP.get(item.get('status'))
+            court = item.get('court') or default_court
+            if status is None or court is None:
+                logger.debug(f"Пропущен слот без статуса или корта: {item}")
+                continue
+
+            slot_date = default_date
+            if item.get('date'):
+                try:
+                    slot_date = datetime.strptime(str(item['date'])[:10], '%Y-%m-%d').date()
+                except ValueError:
+                    slot_date = parser.normalize_date(str(item['date']))
+            if slot_date is None:
+                continue
+
+            raw_times.append(str(item['time']).split(' - ')[0])
+            records.append((str(court), slot_date, status))
+
+        # Время нормализуется одним пакетом по всему столбцу
+        return [
+            SlotRecord(parser.club_name, court, slot_date, time_slot, status)
+            for (court, slot_date, status), time_slot in zip(records, parser.normalize_times(raw_times))
+        ]
@@ -0,0 +1,172 @@
+import logging
+from collections import Counter
+from urllib.parse import urlparse
+
+logger = logging.getLogger('Interception')
+
+# Средний размер ресурса по типу (байты) для оценки сэкономленного трафика:
+# у заблокированного запроса нет ответа, поэтому реальный размер неизвестен
+DEFAULT_SIZE_ESTIMATES = {
+    'image': 60 * 1024,
+    'media': 500 * 1024,
+    'font': 40 * 1024,
+    'stylesheet': 30 * 1024,
+    'script': 80 * 1024,
+    'xhr': 5 * 1024,
+    'fetch': 5 * 1024,
+    'other': 10 * 1024
+}
+
+# Аналитика и реклама, которые не нужны для получения расписания
+TRACKER_DOMAINS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'mc.yandex.ru',
+    'yandex.ru/metrika',
+    'facebook.net',
+    'vk.com',
+    'top-fwz1.mail.ru',
+    'hotjar.com',
+    'sentry.io'
+)
+
+# Расширения файлов для блокировки по URL там, где тип ресурса недоступен (Selenium)
+TYPE_EXTENSIONS = {
+    'image': ('*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico'),
+    'font': ('*.woff', '*.woff2', '*.ttf', '*.otf'),
+    'stylesheet': ('*.css',),
+    'media': ('*.mp4', '*.webm', '*.mp3')
+}
+
+
+def _domain_matches(url, domains):
+    """URL относится к одному из доменов (включая поддомены и префиксы путей)"""
+    parsed = urlparse(url)
+    host = parsed.hostname or ''
+    host_path = host + parsed.path
+    for domain in domains:
+        if '/' in domain:
+            if host_path.startswith(domain) or host_path.endswith(domain):
+                return True
+        elif host == domain or host.endswith('.' + domain):
+            return True
+    return False
+
+
+class InterceptionStats:
+    """Статистика перехвата запросов одной страницы"""
+
+    def __init__(self, size_estimates=None):
+        self.size_estimates = size_estimates or DEFAULT_SIZE_ESTIMATES
+        self.allowed = Counter()
+        self.blocked = Counter()
+
+    def record(self, resource_type, allowed):
+        (self.allowed if allowed else self.blocked)[resource_type] += 1
+
+    @property
+    def requests_allowed(self):
+        return sum(self.allowed.values())
+
+    @property
+    def requests_saved(self):
+        return sum(self.blocked.values())
+
+    @property
+    def bytes_saved(self):
+        """Оценка сэкономленного трафика по средним размерам ресурсов"""
+        return sum(
+            count * self.size_estimates.get(resource_type, self.size_estimates['other'])
+            for resource_type, count in self.blocked.items()
+        )
+
+    def as_dict(self):
+        return {
+            'requests_allowed': self.requests_allowed,
+            'requests_saved': self.requests_saved,
+            'bytes_saved': self.bytes_saved,
+            'blocked_by_type': dict(self.blocked)
+        }
+
+    def log_summary(self, log, label):
+        log.info(
+            f"Перехват запросов [{label}]: пропущено {self.requests_allowed}, "
+            f"заблокировано {self.requests_saved} (~{self.bytes_saved / 1024:.0f} КБ), "
+            f"по типам: {dict(self.blocked)}"
+        )
+
+
+class InterceptionProfile:
+    """Правила пропуска/блокировки запросов по типу ресурса и домену
+
+    Порядок проверки: deny_domains, allow_domains, deny_types, allow_types,
+    script_domains (скрипты пропускаются только с перечисленных доменов).
+    """
+
+    def __init__(self, name, allow_types=None, deny_types=None,
+                 allow_domains=None, deny_domains=None, script_domains=None):
+        self.name = name
+        self.allow_types = set(allow_types) if allow_types else None
+        self.deny_types = set(deny_types or ())
+        self.allow_domains = tuple(allow_domains) if allow_domains else None
+        self.deny_domains = tuple(deny_domains or ())
+        self.script_domains = tuple(script_domains) if script_domains else None
+
+    def is_allowed(self, resource_type, url):
+        """Решение для одного запроса"""
+        if url.startswith(('data:', 'blob:', 'about:')):
+            return True
+        if self.deny_domains and _domain_matches(url, self.deny_domains):
+            return False
+        if self.allow_domains is not None and not _domain_matches(url, self.allow_domains):
+            return False
+        if resource_type in self.deny_types:
+            return False
+        if self.allow_types is not None and resource_type not in self.allow_types:
+            return False
+        if resource_type == 'script' and self.script_domains is not None:
+            return _domain_matches(url, self.script_domains)
+        return True
+
+    async def attach(self, target):
+        """Подключение к Playwright Page или BrowserContext; возвращает статистику"""
+        stats = InterceptionStats()
+
+        async def handle(route):
+            request = route.request
+            allowed = self.is_allowed(request.resource_type, request.url)
+            stats.record(request.resource_type, allowed)
+            if allowed:
+                # fallback передает запрос следующему обработчику (например, replay)
+                await route.fallback()
+            else:
+                await route.abort()
+
+        await target.route('**/*', handle)
+        return stats
+
+    def apply_to_driver(self, driver):
+        """Приближенный вариант для Selenium: блокировка по URL-шаблонам через CDP"""
+        patterns = [f"*{domain}*" for domain in self.deny_domains]
+        blocked_types = set(self.deny_types)
+        if self.allow_types is not None:
+            blocked_types |= set(TYPE_EXTENSIONS) - self.allow_types
+        for resource_type in blocked_types:
+            patterns.extend(TYPE_EXTENSIONS.get(resource_type, ()))
+
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        except Exception as e:
+            logger.warning(f"Не удалось включить блокировку запросов в WebDriver: {str(e)}")
+
+
+def default_profile(site_domains):
+    """Профиль по умолчанию: документ, XHR/fetch и скрипты самого сайта"""
+    return InterceptionProfile(
+        'default',
+        allow_types={'document', 'xhr', 'fetch', 'script'},
+        deny_domains=TRACKER_DOMAINS,
+        script_domains=site_domains
+    )
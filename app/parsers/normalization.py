@@ -0,0 +1,164 @@
+import argparse
+import logging
+import re
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+logger = logging.getLogger('Normalization')
+
+# Словесные обозначения времени; порядок важен - проверяются по очереди
+TIME_WORDS = (
+    ('утро', '09:00'),
+    ('день', '13:00'),
+    ('вечер', '18:00'),
+    ('ночь', '21:00'),
+    ('полдень', '12:00')
+)
+
+# Дни недели; порядок важен - проверяются по очереди
+WEEKDAYS = (
+    ('пн', 0), ('понедельник', 0),
+    ('вт', 1), ('вторник', 1),
+    ('ср', 2), ('среда', 2),
+    ('чт', 3), ('четверг', 3),
+    ('пт', 4), ('пятница', 4),
+    ('сб', 5), ('суббота', 5),
+    ('вс', 6), ('воскресенье', 6)
+)
+
+TIME_JUNK = re.compile(r'[^\d:.\-]')
+
+# Уникальных строк времени и дат в расписаниях немного, кэш покрывает их все
+CACHE_SIZE = 4096
+
+_date_parser = None
+
+
+def _parse_date(date_str):
+    """dateutil импортируется один раз и только если понадобился"""
+    global _date_parser
+    if _date_parser is None:
+        from dateutil import parser
+        _date_parser = parser
+    return _date_parser.parse(date_str, dayfirst=True).date()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_time(time_str):
+    """Нормализация формата времени к HH:MM"""
+    time_str = time_str.strip().lower()
+
+    for word, value in TIME_WORDS:
+        if word in time_str:
+            return value
+
+    # Очистка от лишних символов, точка - вместо двоеточия
+    time_str = TIME_JUNK.sub('', time_str).replace('.', ':')
+
+    # Если только часы - добавляем минуты
+    if ':' not in time_str and len(time_str) <= 2:
+        return f"{int(time_str):02d}:00"
+
+    # Если формат HH:MM
+    if ':' in time_str:
+        parts = time_str.split(':')
+        hours = int(parts[0])
+        minutes = int(parts[1][:2]) if len(parts[1]) >= 2 else 0
+        # Нормализация часов (24-часовой формат)
+        return f"{hours % 24 if hours > 23 else hours:02d}:{minutes:02d}"
+
+    return time_str
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _normalize_date(date_str, base_date):
+    date_str = date_str.strip().lower()
+
+    # Сегодня/завтра
+    if 'сегодня' in date_str:
+        return base_date
+    if 'завтра' in date_str:
+        return base_date + timedelta(days=1)
+
+    for weekday_name, weekday_num in WEEKDAYS:
+        if weekday_name in date_str:
+            # Находим следующий такой день недели
+            days_ahead = weekday_num - base_date.weekday()
+            if days_ahead <= 0:
+                days_ahead += 7
+            return base_date + timedelta(days=days_ahead)
+
+    try:
+        return _parse_date(date_str)
+    except (ValueError, OverflowError):
+        logger.warning(f"Не удалось распарсить дату: {date_str}")
+        return base_date
+
+
+def normalize_date(date_str, base_date=None):
+    """Нормализация даты; кэш по (строка, базовая дата)"""
+    base = (base_date or datetime.now())
+    if isinstance(base, datetime):
+        base = base.date()
+    return _normalize_date(date_str, base)
+
+
+def normalize_times(values):
+    """Нормализация столбца строк времени (каждая уникальная строка - один раз)"""
+    unique = {value: normalize_time(value) for value in set(values)}
+    return [unique[value] for value in values]
+
+
+def normalize_dates(values, base_date=None):
+    """Нормализация столбца строк дат относительно одной базовой даты"""
+    base = base_date or datetime.now()
+    unique = {value: normalize_date(value, base) for value in set(values)}
+    return [unique[value] for value in values]
+
+
+def clear_caches():
+    normalize_time.cache_clear()
+    _normalize_date.cache_clear()
+
+
+def benchmark(count=1_000_000):
+    """Пропускная способность на count строк: без кэша, с кэшем и пакетно"""
+    sample = ['10:00', '9.30', '21', ' 18:00 - 19:30 ', 'утро', '7:5', '23.00', '25:15']
+    dates = ['сегодня', 'завтра', 'пт', 'суббота', '15.01.2030', '2030-01-16']
+    times = [sample[i % len(sample)] for i in range(count)]
+    date_values = [dates[i % len(dates)] for i in range(count)]
+    base = datetime(2030, 1, 1)
+
+    results = {}
+
+    def measure(name, func):
+        clear_caches()
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        results[name] = count / elapsed
+
+    measure('time_uncached', lambda: [normalize_time.__wrapped__(value) for value in times])
+    measure('time_cached', lambda: [normalize_time(value) for value in times])
+    measure('time_batch', lambda: normalize_times(times))
+    measure('date_uncached', lambda: [_normalize_date.__wrapped__(value, base.date()) for value in date_values])
+    measure('date_cached', lambda: [normalize_date(value, base) for value in date_values])
+    measure('date_batch', lambda: normalize_dates(date_values, base))
+    return results
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Замер нормализации времени и дат')
+    arg_parser.add_argument('--count', type=int, default=1_000_000)
+    args = arg_parser.parse_args(argv)
+
+    results = benchmark(args.count)
+    print(f"{'режим':<16}{'строк/с':>14}{'с на 1 млн':>12}")
+    for name, rate in results.items():
+        print(f"{name:<16}{rate:>14,.0f}{1_000_000 / rate:>12.2f}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import sys
+from collections.abc import Mapping
+from datetime import date as date_type
+
+# Статус слота хранится маленьким целым
+STATUS_FREE = 0
+STATUS_BUSY = 1
+STATUS_NAMES = ('свободен', 'занят')
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+
+FIELDS = ('club_name', 'court_number', 'date', 'time_slot', 'status')
+
+# Готовые строки HH:MM для всех минут суток: time_slot не создает новых строк
+TIME_LABELS = tuple(f"{minutes // 60:02d}:{minutes % 60:02d}" for minutes in range(24 * 60))
+
+# Общие объекты int для минут: числа больше 256 Python не кэширует сам
+MINUTE_VALUES = tuple(range(24 * 60))
+
+# Одинаковые даты разделяют один объект
+_dates = {}
+
+
+def time_to_minutes(time_slot):
+    """'HH:MM' -> минуты от полуночи; None, если строка в другом формате"""
+    hours, sep, minutes = time_slot.partition(':')
+    if not sep or not hours.isdigit() or not minutes.isdigit():
+        return None
+    value = int(hours) * 60 + int(minutes)
+    return MINUTE_VALUES[value] if 0 <= value < 24 * 60 else None
+
+
+class SlotRecord:
+    """Компактная запись слота
+
+    Клуб и корт интернируются, время хранится минутами от полуночи, статус -
+    кодом STATUS_FREE/STATUS_BUSY. Поддерживает чтение как словарь
+    (record['time_slot']), поэтому код, работающий со словарями, не меняется.
+    """
+
+    __slots__ = ('club_name', 'court_number', 'date', '_time', 'status_code')
+
+    def __init__(self, club_name, court_number, date, time_slot, status):
+        self.club_name = sys.intern(club_name)
+        self.court_number = sys.intern(str(court_number))
+        self.date = _dates.setdefault(date, date)
+        # Нестандартная строка времени сохраняется как есть
+        minutes = time_to_minutes(time_slot) if isinstance(time_slot, str) else MINUTE_VALUES[time_slot]
+        self._time = minutes if minutes is not None else time_slot
+        self.status_code = status if isinstance(status, int) else STATUS_CODES[status]
+
+    @classmethod
+    def coerce(cls, record):
+        """SlotRecord из словаря парсера (запись SlotRecord возвращается как есть)"""
+        if isinstance(record, cls):
+            return record
+        return cls(record['club_name'], record['court_number'], record['date'],
+                   record['time_slot'], record['status'])
+
+    def pack(self):
+        """Кортеж для передачи между процессами: дата - порядковый номер дня"""
+        return (self.club_name, self.court_number, self.date.toordinal(), self._time, self.status_code)
+
+    @classmethod
+    def unpack(cls, row):
+        club_name, court_number, day, time_value, status_code = row
+        return cls(club_name, court_number, date_type.fromordinal(day), time_value, status_code)
+
+    @property
+    def minutes(self):
+        return self._time if isinstance(self._time, int) else None
+
+    @property
+    def time_slot(self):
+        return TIME_LABELS[self._time] if isinstance(self._time, int) else self._time
+
+    @property
+    def status(self):
+        return STATUS_NAMES[self.status_code]
+
+    @property
+    def key(self):
+        """Идентичность слота: (клуб, корт, дата, время)"""
+        return (self.club_name, self.court_number, self.date, self._time)
+
+    def __getitem__(self, field):
+        if field not in FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field, default=None):
+        return getattr(self, field) if field in FIELDS else default
+
+    def keys(self):
+        return FIELDS
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def __eq__(self, other):
+        if isinstance(other, SlotRecord):
+            return self.key == other.key and self.status_code == other.status_code
+        if isinstance(other, Mapping):
+            return self.as_dict() == dict(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.key, self.status_code))
+
+    def __repr__(self):
+        return (f"SlotRecord({self.club_name!r}, {self.court_number!r}, {self.date!r}, "
+                f"{self.time_slot!r}, {self.status!r})")
+
+
+def to_records(data):
+    """Приведение результата парсера к списку SlotRecord"""
+    return [SlotRecord.coerce(record) for record in data or ()]
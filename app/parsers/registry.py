@@ -0,0 +1,101 @@
+import importlib
+import logging
+import threading
+from urllib.parse import urlparse
+
+logger = logging.getLogger('ParserRegistry')
+
+# Клубы по умолчанию (если в конфигурации нет PARSERS).
+# Модуль парсера импортируется только при первом запуске парсинга:
+# веб-воркеры, которые лишь отдают /data, не загружают requests/selenium/playwright.
+DEFAULT_PARSERS = (
+    # API YClients, при недоступности - браузерный YClientsAdvParser
+    {'name': 'yclients_api', 'path': 'app.parsers.yclients_api_parser:YClientsApiParser',
+     'club_name': 'MyProtennis.ru', 'host': 'b1044864.yclients.com'},
+    {'name': 'findsport', 'path': 'app.parsers.findsport_parser:FindSportParser',
+     'club_name': 'Tsaritsyno Tennis Club', 'host': 'findsport.ru'},
+    {'name': 'tsaritsyno', 'path': 'app.parsers.tsaritsyno_parser:TsaritsynoParser',
+     'club_name': 'Tsaritsyno Tennis Club', 'host': 'tsaritsyno.tennis-wegym.ru'},
+)
+
+
+class ParserSpec:
+    """Объявление парсера клуба: имя, путь 'модуль:Класс' и аргументы конструктора
+
+    club_name, host и timeout описывают парсер без импорта его модуля: по ним
+    родительский процесс ведет журнал, размыкатель хоста и дедлайн, когда сам
+    парсер работает в процессе-воркере.
+    """
+
+    def __init__(self, name, path, options=None, enabled=True, club_name=None, host=None, timeout=None):
+        if ':' not in path:
+            raise ValueError(f"Путь парсера должен иметь вид 'модуль:Класс': {path}")
+        self.name = name
+        self.path = path
+        self.options = dict(options or {})
+        self.enabled = enabled
+        self.club_name = club_name or name
+        self.host = host or urlparse(self.options.get('url') or '').hostname
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, entry):
+        return cls(entry['name'], entry['path'], entry.get('options'), entry.get('enabled', True),
+                   entry.get('club_name'), entry.get('host'), entry.get('timeout'))
+
+    @property
+    def class_name(self):
+        return self.path.split(':', 1)[1]
+
+    def load_class(self):
+        module_name, class_name = self.path.split(':', 1)
+        return getattr(importlib.import_module(module_name), class_name)
+
+    def create(self):
+        # Необязательные настройки со значением None не передаем: остаются умолчания парсера
+        options = {key: value for key, value in self.options.items() if value is not None}
+        parser = self.load_class()(**options)
+        parser.source = self.name
+        return parser
+
+
+class ParserRegistry:
+    """Реестр парсеров клубов с отложенным импортом модулей"""
+
+    def __init__(self, specs):
+        self.specs = [spec for spec in specs if spec.enabled]
+        self._parsers = None
+        # Экземпляры переданы через use (а не созданы из specs)
+        self._overridden = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls([ParserSpec.from_config(entry) for entry in config.get('PARSERS', DEFAULT_PARSERS)])
+
+    @property
+    def names(self):
+        return [spec.name for spec in self.specs]
+
+    @property
+    def is_loaded(self):
+        return self._parsers is not None
+
+    @property
+    def is_overridden(self):
+        """Объявленные парсеры заменены явным списком экземпляров"""
+        return self._overridden
+
+    def use(self, parsers):
+        """Явный список экземпляров вместо объявленных (тесты, замеры)"""
+        with self._lock:
+            self._parsers = list(parsers)
+            self._overridden = True
+
+    def parsers(self):
+        """Экземпляры парсеров (модули импортируются при первом вызове)"""
+        with self._lock:
+            if self._parsers is None:
+                self._parsers = [spec.create() for spec in self.specs]
+                logger.info(f"Загружены парсеры: {', '.join(self.names)}")
+            return self._parsers
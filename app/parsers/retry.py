@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger('Retry')
+
+# Ошибки в коде парсера: повтор их не исправит
+FATAL_ERRORS = (TypeError, AttributeError, NameError, ImportError, NotImplementedError)
+
+
+class RetryBudget:
+    """Общий лимит повторов на один цикл обновления
+
+    Если источник массово падает, повторы заканчиваются на весь цикл,
+    а не умножают нагрузку на каждую пару (корт, дата).
+    """
+
+    def __init__(self, limit=20):
+        self.limit = limit
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self):
+        with self._lock:
+            if self.limit is not None and self.spent >= self.limit:
+                return False
+            self.spent += 1
+            return True
+
+    @property
+    def remaining(self):
+        with self._lock:
+            return None if self.limit is None else max(0, self.limit - self.spent)
+
+
+class RetryPolicy:
+    """Повторы с экспоненциальной задержкой и разбросом, общие для sync и async парсеров
+
+    Ошибку можно явно пометить атрибутом retryable (True/False), иначе решают
+    списки fatal и retryable. Задержка попытки n: base_delay * 2**n, не больше
+    max_delay, со случайным уменьшением до доли jitter.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=2, max_delay=30, jitter=0.5,
+                 retryable=(Exception,), fatal=FATAL_ERRORS):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retryable = retryable
+        self.fatal = fatal
+
+    def with_options(self, max_attempts=None, base_delay=None):
+        """Копия политики с другим числом попыток или задержкой"""
+        return RetryPolicy(
+            max_attempts=max_attempts or self.max_attempts,
+            base_delay=self.base_delay if base_delay is None else base_delay,
+            max_delay=self.max_delay,
+            jitter=self.jitter,
+            retryable=self.retryable,
+            fatal=self.fatal
+        )
+
+    def is_retryable(self, error):
+        marked = getattr(error, 'retryable', None)
+        if marked is not None:
+            return bool(marked)
+        if isinstance(error, self.fatal):
+            return False
+        return isinstance(error, self.retryable)
+
+    def delay_for(self, attempt):
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * random.uniform(1 - self.jitter, 1)
+
+    def _next_delay(self, error, attempt, budget, cancel_event, log):
+        """Задержка перед следующей попыткой или None, если повторять нельзя"""
+        log.warning(f"Попытка {attempt + 1} не удалась: {str(error)}")
+        if attempt + 1 >= self.max_attempts:
+            log.error(f"Все попытки не удались после {self.max_attempts} попыток")
+            return None
+        if not self.is_retryable(error):
+            log.error(f"Неустранимая ошибка, повтор не выполняется: {str(error)}")
+            return None
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        if budget is not None and not budget.try_spend():
+            log.error("Бюджет повторов цикла обновления исчерпан")
+            return None
+        return self.delay_for(attempt)
+
+    def call(self, func, budget=None, cancel_event=None, log=logger):
+        """Выполнение func() с повторами; пауза прерывается отменой парсера"""
+        for attempt in range(self.max_attempts):
+            try:
+                return func()
+            except Exception as e:
+                delay = self._next_delay(e, attempt, budget, cancel_event, log)
+                if delay is None:
+                    raise
+                if cancel_event is not None:
+                    if cancel_event.wait(delay):
+                        raise
+                else:
+                    time.sleep(delay)
+
+    async def call_async(self, func, budget=None, cancel_event=None, log=logger):
+        """Выполнение await func() с повторами, не блокируя event loop
+
+        Отмена задачи (asyncio.CancelledError) прерывает паузу немедленно.
+        """
+        for attempt in range(self.max_attempts):
+            try:
+                return await func()
+            except Exception as e:
+                delay = self._next_delay(e, attempt, budget, cancel_event, log)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                if cancel_event is not None and cancel_event.is_set():
+                    raise
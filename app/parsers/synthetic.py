@@ -0,0 +1,117 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from .base_parser import BaseParser
+from .records import STATUS_BUSY, STATUS_FREE, SlotRecord
+
+
+def slot_minutes(open_hour=7, close_hour=23, step=30):
+    """Начала слотов в минутах от полуночи; последний слот - ровно close_hour"""
+    return list(range(open_hour * 60, close_hour * 60 + 1, step))
+
+
+def parity_status(modulus=2, remainder=0):
+    """Статус тестовых данных: свободен, если (день + корт + час + минута) % modulus == remainder"""
+    def status(day_offset, court, minutes):
+        hour, minute = divmod(minutes, 60)
+        return STATUS_FREE if (day_offset + court + hour + minute) % modulus == remainder else STATUS_BUSY
+    return status
+
+
+def generate_slots(club_name, courts, days, status, start_date=None, minutes=None):
+    """Сетка слотов клуба: days дней x courts кортов x слоты дня"""
+    start_date = start_date or datetime.now().date()
+    minutes = minutes if minutes is not None else slot_minutes()
+    return [
+        SlotRecord(club_name, str(court), start_date + timedelta(days=day_offset), slot,
+                   status(day_offset, court, slot))
+        for day_offset in range(days)
+        for court in range(1, courts + 1)
+        for slot in minutes
+    ]
+
+
+class SyntheticParser(BaseParser):
+    """Синтетический источник для нагрузочных прогонов: clubs x courts x days
+
+    Занятость похожа на реальную: вечер и ближайшие дни заняты чаще. Между
+    запусками у каждого слота с вероятностью churn меняется статус, поэтому
+    отпечатки (клуб, дата) меняются так же, как на живых клубах. Результат
+    детерминирован для seed и номера запуска.
+    """
+
+    streams = True
+
+    def __init__(self, clubs=1, courts=3, days=3, churn=0.05, seed=0,
+                 club_prefix='Synthetic Club', open_hour=7, close_hour=23, step=30):
+        super().__init__()
+        self.clubs = clubs
+        self.courts = courts
+        self.days = days
+        self.churn = churn
+        self.seed = seed
+        self.club_prefix = club_prefix
+        self.club_name = f"{club_prefix} x{clubs}"
+        self.minutes = slot_minutes(open_hour, close_hour, step)
+        self.runs = 0
+        # Занятость по (клуб, дата): битовая маска, бит - (корт, слот)
+        self._busy = {}
+
+    def club_names(self):
+        return [f"{self.club_prefix} {index:04d}" for index in range(1, self.clubs + 1)]
+
+    async def get_courts_data(self):
+        return [record async for chunk in self.iter_courts_data() for record in chunk]
+
+    async def iter_courts_data(self):
+        """Порция - один (клуб, дата)"""
+        self.runs += 1
+        today = datetime.now().date()
+        # Прошедшие даты больше не нужны
+        self._busy = {key: mask for key, mask in self._busy.items() if key[1] >= today}
+
+        for club_name in self.club_names():
+            for day_offset in range(self.days):
+                if self.is_cancelled:
+                    return
+                yield self.generate_group(club_name, today + timedelta(days=day_offset), day_offset)
+            # Отдаем управление event loop между клубами
+            await asyncio.sleep(0)
+
+    def generate_group(self, club_name, slot_date, day_offset):
+        rng = random.Random(f"{self.seed}:{club_name}:{slot_date.isoformat()}:{self.runs}")
+        key = (club_name, slot_date)
+        mask = self._busy.get(key)
+        if mask is None:
+            mask = self._initial_mask(rng, day_offset)
+        elif self.churn:
+            flips = 0
+            for bit in range(self.courts * len(self.minutes)):
+                if rng.random() < self.churn:
+                    flips |= 1 << bit
+            mask ^= flips
+        self._busy[key] = mask
+
+        records = []
+        bit = 0
+        for court in range(1, self.courts + 1):
+            court_number = str(court)
+            for slot in self.minutes:
+                status = STATUS_BUSY if mask >> bit & 1 else STATUS_FREE
+                records.append(SlotRecord(club_name, court_number, slot_date, slot, status))
+                bit += 1
+        return records
+
+    def _initial_mask(self, rng, day_offset):
+        # Вечер (17-22) и ближайшие дни заняты чаще
+        proximity = max(0.0, 1 - day_offset / max(self.days, 1))
+        mask = 0
+        bit = 0
+        for _ in range(self.courts):
+            for slot in self.minutes:
+                busy = 0.2 + 0.3 * proximity + (0.3 if 17 * 60 <= slot < 22 * 60 else 0.0)
+                if rng.random() < busy:
+                    mask |= 1 << bit
+                bit += 1
+        return mask
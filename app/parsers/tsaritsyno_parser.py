@@ -1,16 +1,18 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from datetime import datetime, timedelta
-import time
 import logging
 
 from .base_parser import BaseParser
+from .records import SlotRecord
+from .waits import ElementPresent, NetworkQuiet
+from app.services.driver_pool import get_driver_pool
 
 class TsaritsynoParser(BaseParser):
+    # Страница готова, когда отрисована сетка бронирования и затихли ее запросы
+    ready_conditions = (ElementPresent("[class*='schedule'], [class*='slot'], table"), NetworkQuiet(300))
+    # Запасные тестовые данные: 2 корта, свободен при (день + корт + час + минута) % 3 == 1
+    test_courts = 2
+    test_status_rule = (3, 1)
+
     def __init__(self, url=None):
         super().__init__()
         self.url = url or "https://tsaritsyno.tennis-wegym.ru/"
@@ -18,81 +20,29 @@ class TsaritsynoParser(BaseParser):
         self.club_name = "Tsaritsyno Tennis Club"
     
     def setup_driver(self):
-        """Настройка драйвера для snap-версии Chromium"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless=new")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        # Специальные опции для snap
-        chrome_options.add_argument("--disable-setuid-sandbox")
-        chrome_options.add_argument("--remote-debugging-pipe")
-        chrome_options.add_argument("--disable-software-rasterizer")
-        
+        """Получение сессии WebDriver из общего пула"""
         try:
-            driver_path = self.get_chromedriver_path()
-            
-            if driver_path:
-                service = Service(executable_path=driver_path)
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                self.driver.set_page_load_timeout(30)
-                self.logger.info(f"✅ WebDriver успешно настроен: {driver_path}")
-            else:
-                self.logger.warning("⚠️ ChromeDriver не найден, используем тестовые данные")
-                self.driver = None
+            self.driver = get_driver_pool().acquire(self.get_chromedriver_path)
+            self.logger.info("✅ WebDriver получен из пула")
                 
         except Exception as e:
-            self.logger.error(f"❌ Ошибка при настройке WebDriver: {str(e)}")
+            self.logger.error(f"❌ Ошибка при получении WebDriver: {str(e)}")
             self.logger.warning("⚠️ Продолжаем с тестовыми данными")
             self.driver = None
     
-    def close_driver(self):
-        """Закрытие веб-драйвера"""
+    def close_driver(self, discard=False):
+        """Возврат веб-драйвера в пул (discard=True - закрыть сессию)"""
         if self.driver:
+            driver, self.driver = self.driver, None
             try:
-                self.driver.quit()
-                self.logger.info("WebDriver успешно закрыт")
+                get_driver_pool().release(driver, discard=discard)
             except Exception as e:
-                self.logger.error(f"Ошибка при закрытии WebDriver: {str(e)}")
-            finally:
-                self.driver = None
+                self.logger.error(f"Ошибка при возврате WebDriver в пул: {str(e)}")
     
-    def accept_cookies(self):
-        """Принятие cookies если есть"""
-        if not self.driver:
-            return
-            
-        try:
-            cookie_button = WebDriverWait(self.driver, 5).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "button[class*='cookie'], button[class*='accept'], .accept-cookies, #accept-cookies"))
-            )
-            cookie_button.click()
-            self.logger.info("Cookies приняты")
-            time.sleep(1)
-        except Exception as e:
-            self.logger.debug(f"Кнопка cookies не найдена или не кликабельна: {str(e)}")
-    
-    def wait_for_page_load(self):
-        """Ожидание загрузки страницы"""
-        if not self.driver:
-            return
-            
-        try:
-            # Ждем появления основного контента
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Дополнительное ожидание для динамических элементов
-            time.sleep(2)
-            
-            self.logger.info("Страница загружена")
-        except Exception as e:
-            self.logger.error(f"Ошибка при ожидании загрузки страницы: {str(e)}")
-            raise
+    def cancel(self):
+        """Отмена парсинга: закрываем сессию, чтобы прервать блокирующие вызовы Selenium"""
+        super().cancel()
+        self.close_driver(discard=True)
     
     def get_courts_data(self):
         """Основной метод для получения данных о кортах"""
@@ -100,6 +50,8 @@ class TsaritsynoParser(BaseParser):
             self.setup_driver()
             
             if self.driver:
+                if self.interception_profile:
+                    self.interception_profile.apply_to_driver(self.driver)
                 self.driver.get(self.url)
                 self.wait_for_page_load()
                 self.accept_cookies()
@@ -112,6 +64,7 @@ class TsaritsynoParser(BaseParser):
             
         except Exception as e:
             self.logger.error(f"Ошибка при парсинге Tsaritsyno: {str(e)}")
+            self.report_failure(e)
             self.logger.warning("Возвращаем тестовые данные")
             return self._get_test_data()
         finally:
@@ -148,13 +101,7 @@ class TsaritsynoParser(BaseParser):
                             # Генерируем статус
                             status = 'свободен' if (day_offset + court_num + hour + minute) % 3 == 1 else 'занят'
                             
-                            record = {
-                                'club_name': self.club_name,
-                                'court_number': str(court_num),
-                                'date': current_date,
-                                'time_slot': time_slot,
-                                'status': status
-                            }
+                            record = SlotRecord(self.club_name, str(court_num), current_date, time_slot, status)
                             
                             data.append(record)
             
@@ -162,44 +109,12 @@ class TsaritsynoParser(BaseParser):
             
         except Exception as e:
             self.logger.error(f"Ошибка при парсинге реальных данных: {str(e)}")
+            self.report_failure(e)
             self.logger.warning("Возвращаем тестовые данные")
             return self._get_test_data()
         
         return data if data else self._get_test_data()
     
-    def _get_test_data(self):
-        """Тестовые данные для проверки работы"""
-        now = datetime.now()
-        test_data = []
-        
-        # Генерируем тестовые данные для 3 дней
-        for day_offset in range(3):
-            current_date = (now + timedelta(days=day_offset)).date()
-            
-            # 2 корта
-            for court_num in range(1, 3):
-                # Разные временные слоты с интервалом 30 минут
-                for hour in range(7, 24):
-                    for minute in [0, 30]:
-                        if hour == 23 and minute == 30:
-                            continue  # Последний слот 23:00
-                        
-                        time_slot = f"{hour:02d}:{minute:02d}"
-                        
-                        # Генерируем статус
-                        status = 'свободен' if (day_offset + court_num + hour + minute) % 3 == 1 else 'занят'
-                        
-                        test_data.append({
-                            'club_name': self.club_name,
-                            'court_number': str(court_num),
-                            'date': current_date,
-                            'time_slot': time_slot,
-                            'status': status
-                        })
-        
-        self.logger.info(f"Сгенерировано тестовых данных: {len(test_data)} записей")
-        return test_data
-    
     def __del__(self):
         """Деструктор для гарантии закрытия драйвера"""
         self.close_driver()
\ No newline at end of file
@@ -0,0 +1,87 @@
+# Условия готовности страницы для ожиданий без фиксированных пауз.
+# Каждое условие проверяется в Selenium (опрос check) и в Playwright
+# (wait_async). Парсеры объявляют свои условия в BaseParser.ready_conditions.
+
+from abc import ABC, abstractmethod
+
+# Сеть затихла: документ загружен и последний ресурс завершился quiet_ms назад.
+# Незавершенные запросы не попадают в Resource Timing, поэтому дополнительно
+# требуем, чтобы число записей не менялось между проверками.
+NETWORK_QUIET_JS = """(quietMs) => {
+    const entries = performance.getEntriesByType('resource');
+    const lastEnd = entries.reduce((max, e) => Math.max(max, e.responseEnd), 0);
+    const now = performance.now();
+    const previous = window.__waitResourceCount;
+    window.__waitResourceCount = entries.length;
+    return document.readyState === 'complete'
+        && previous === entries.length
+        && now - lastEnd >= quietMs;
+}"""
+
+XHR_FINISHED_JS = """(urlPart) => performance.getEntriesByType('resource').some(
+    e => (e.initiatorType === 'xmlhttprequest' || e.initiatorType === 'fetch')
+        && e.name.includes(urlPart) && e.responseEnd > 0
+)"""
+
+
+class WaitCondition(ABC):
+    """Базовое условие ожидания"""
+
+    @abstractmethod
+    def check(self, driver):
+        """Одна проверка в Selenium"""
+
+    @abstractmethod
+    async def wait_async(self, page, timeout):
+        """Ожидание в Playwright (timeout в секундах)"""
+
+
+class ElementPresent(WaitCondition):
+    """Элемент есть в DOM (CSS для Selenium, любой селектор Playwright)"""
+
+    def __init__(self, selector):
+        self.selector = selector
+
+    def check(self, driver):
+        from selenium.webdriver.common.by import By
+        return bool(driver.find_elements(By.CSS_SELECTOR, self.selector))
+
+    async def wait_async(self, page, timeout):
+        await page.wait_for_selector(self.selector, state='attached', timeout=timeout * 1000)
+
+    def __str__(self):
+        return f"элемент {self.selector}"
+
+
+class NetworkQuiet(WaitCondition):
+    """Нет сетевой активности quiet_ms миллисекунд"""
+
+    def __init__(self, quiet_ms=500):
+        self.quiet_ms = quiet_ms
+
+    def check(self, driver):
+        return bool(driver.execute_script(f"return ({NETWORK_QUIET_JS})(arguments[0]);", self.quiet_ms))
+
+    async def wait_async(self, page, timeout):
+        await page.wait_for_function(NETWORK_QUIET_JS, arg=self.quiet_ms,
+                                     timeout=timeout * 1000, polling=100)
+
+    def __str__(self):
+        return f"тишина в сети {self.quiet_ms} мс"
+
+
+class XhrFinished(WaitCondition):
+    """Завершился XHR/fetch-запрос, URL которого содержит url_part"""
+
+    def __init__(self, url_part):
+        self.url_part = url_part
+
+    def check(self, driver):
+        return bool(driver.execute_script(f"return ({XHR_FINISHED_JS})(arguments[0]);", self.url_part))
+
+    async def wait_async(self, page, timeout):
+        await page.wait_for_function(XHR_FINISHED_JS, arg=self.url_part,
+                                     timeout=timeout * 1000, polling=100)
+
+    def __str__(self):
+        return f"XHR {self.url_part}"
@@ -1,117 +1,212 @@
-from playwright.async_api import async_playwright
 import asyncio
 import logging
 from datetime import datetime, timedelta
 from .base_parser import BaseParser
+from .interception import default_profile
+from .extraction import SlotExtractor
+from .waits import ElementPresent, NetworkQuiet
+from app.services.browser_pool import get_browser_pool
+
+# Все слоты выбранной даты за один вызов page.evaluate
+SLOT_EXTRACTOR = SlotExtractor('''(context) => {
+    let nodes = Array.from(document.querySelectorAll('div.time-slot'));
+    if (!nodes.length) {
+        // Альтернатива: листовые элементы с временем
+        nodes = Array.from(document.querySelectorAll('div'))
+            .filter(el => !el.children.length && /\\d{1,2}:\\d{2}/.test(el.textContent));
+    }
+    // Если есть кнопка "Продолжить", значит слоты доступны для записи
+    const canContinue = Array.from(document.querySelectorAll('button, a, div'))
+        .some(el => !el.children.length && el.textContent.trim() === 'Продолжить');
+    return nodes
+        .map(el => {
+            const disabled = el.matches('[disabled], [aria-disabled="true"], [class*="disabled"], [class*="busy"]');
+            return {
+                court: context.court,
+                date: context.date,
+                time: el.textContent.trim(),
+                status: canContinue && !disabled ? 'free' : 'busy'
+            };
+        })
+        .filter(slot => slot.time.includes(':'));
+}''')
 
 class YClientsAdvParser(BaseParser):
-    def __init__(self, url=None):
+    # Страница готова, когда отрисован список услуг
+    ready_conditions = (ElementPresent('text=Аренда корта'),)
+    # Слоты даты готовы, когда затихли запросы расписания после клика
+    slot_ready_conditions = (NetworkQuiet(300),)
+
+    def __init__(self, url=None, concurrency=4, days=3):
         super().__init__()
         self.url = url or "https://b1044864.yclients.com/company/967881/personal/select-time?o=m-1"
         self.club_name = "MyProtennis.ru"
+        # Сколько пар (корт, дата) обходится одновременно в отдельных вкладках
+        self.concurrency = concurrency
+        self.days = days
+        # Грузим только документ, XHR/fetch и скрипты YClients
+        self.interception_profile = default_profile(('yclients.com',))
+        self.last_interception_stats = None
 
     async def get_courts_data(self):
-        """Основной метод для получения данных о кортах с использованием 4-шаговой навигации"""
+        """Основной метод для получения данных о кортах с использованием 4-шаговой навигации
+
+        Каждая пара (корт, дата) обходится в своей вкладке одного контекста,
+        одновременно открыто не больше self.concurrency вкладок. Календарь у
+        каждого корта свой, поэтому число дат определяется для каждого корта.
+        """
         self.logger.info("=== Начало 4-шаговой навигации для YClients ===")
         data = []
 
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-gpu',
-                        '--disable-setuid-sandbox'
-                    ]
-                )
-                context = await browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                )
+            # Берем изолированный контекст у теплого браузера из общего пула
+            async with get_browser_pool().context(
+                viewport={'width': 1920, 'height': 1080},
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+            ) as context:
+                if self.harness:
+                    # Обработчики route выполняются в обратном порядке: запись/replay - последним
+                    await self.harness.attach_context(context)
+                interception = None
+                if self.interception_profile:
+                    interception = await self.interception_profile.attach(context)
+
+                # Разведка: сколько кортов нужно обойти
                 page = await context.new_page()
+                try:
+                    court_count = len(await self._open_court_list(page))
+                finally:
+                    await page.close()
+                self.logger.info(f"Найдено кортов: {court_count}")
 
-                # Шаг 1: Перейти на страницу выбора услуг
-                await page.goto(self.url, wait_until='networkidle')
-                await page.wait_for_load_state('networkidle')
-                self.logger.info("✅ Шаг 1: Страница загружена")
-
-                # Шаг 2: Выбрать первую услугу (аренда корта)
-                self.logger.info("Шаг 2: Выбор первой услуги")
-                service_button = await page.wait_for_selector('text=Аренда корта', timeout=10000)
-                if not service_button:
-                    # Если нет текста "Аренда корта", попробуем выбрать первый сервис
-                    service_buttons = await page.query_selector_all('button.ui-kit-simple-cell')
-                    if service_buttons:
-                        service_button = service_buttons[0]
-                    else:
-                        raise Exception("Не удалось найти ни одну услугу")
-                await service_button.click()
-                await asyncio.sleep(1)
-
-                # Шаг 3: Выбрать корт
-                self.logger.info("Шаг 3: Выбор корта")
-                # Ждем загрузки списка кортов
-                await page.wait_for_selector('text=Выбрать корт', timeout=10000)
-                # Получаем все доступные корты
-                court_elements = await page.query_selector_all('div.court-item')  # Уточнить селектор
-                if not court_elements:
-                    # Альтернативный селектор
-                    court_elements = await page.query_selector_all('div:has-text="Корт №")')
-
-                for i, court_element in enumerate(court_elements):
-                    # Клик по корту
-                    await court_element.click()
-                    await asyncio.sleep(1)
-
-                    # Шаг 4: Выбрать дату и время
-                    self.logger.info(f"Шаг 4: Выбор даты и времени для корта {i+1}")
-                    # Ждем загрузки календаря
-                    await page.wait_for_selector('text=Выбрать дату', timeout=10000)
-                    # Получаем список доступных дат (на ближайшие 3 дня)
-                    dates = []
-                    date_elements = await page.query_selector_all('div.date-item')  # Уточнить селектор
-                    if not date_elements:
-                        # Альтернативный селектор
-                        date_elements = await page.query_selector_all('div.calendar-day')
-
-                    for date_element in date_elements[:3]:  # Только 3 дня вперед
-                        # Клик по дате
-                        await date_element.click()
-                        await asyncio.sleep(1)
-
-                        # Получаем список доступных временных слотов
-                        time_slots = []
-                        time_elements = await page.query_selector_all('div.time-slot')  # Уточнить селектор
-                        if not time_elements:
-                            # Альтернативный селектор
-                            time_elements = await page.query_selector_all('div:has-text=":"')
-
-                        for time_element in time_elements:
-                            # Получаем текст слота (например, "12:00 - 13:00")
-                            time_text = await time_element.text_content()
-                            if ':' in time_text:
-                                # Проверяем, доступен ли слот (если есть кнопка "Продолжить", значит слот свободен)
-                                continue_button = await page.query_selector('text=Продолжить')
-                                status = 'свободен' if continue_button else 'занят'
-
-                                # Формируем запись
-                                record = {
-                                    'club_name': self.club_name,
-                                    'court_number': str(i + 1),
-                                    'date': datetime.now().date(),  # Здесь нужно получить реальную дату из элемента
-                                    'time_slot': time_text.split(' - ')[0] if ' - ' in time_text else time_text,
-                                    'status': status
-                                }
-                                data.append(record)
-
-                # Закрываем браузер
-                await browser.close()
+                # Один семафор на разведку дат и обход пар: вкладок не больше concurrency
+                semaphore = asyncio.Semaphore(self.concurrency)
+                results = await asyncio.gather(
+                    *(self._scrape_court(context, semaphore, court_index) for court_index in range(court_count)),
+                    return_exceptions=True
+                )
+
+                # gather сохраняет порядок кортов, поэтому результат детерминирован
+                for court_index, result in enumerate(results):
+                    if isinstance(result, Exception):
+                        self.logger.error(f"Ошибка для корта {court_index + 1}: {str(result)}")
+                        continue
+                    data.extend(result)
+
+                if interception:
+                    interception.log_summary(self.logger, self.club_name)
+                    self.last_interception_stats = interception.as_dict()
                 self.logger.info(f"✅ 4-шаговая навигация завершена. Получено {len(data)} записей")
                 return data
 
         except Exception as e:
             self.logger.error(f"Ошибка при 4-шаговой навигации: {str(e)}")
+            self.report_failure(e)
             self.logger.warning("Возвращаем тестовые данные")
-            return self._get_test_data()
\ No newline at end of file
+            return self._get_test_data()
+
+    async def _open_court_list(self, page):
+        """Шаги 1-3: загрузка страницы, выбор услуги, список кортов"""
+        # Шаг 1: Перейти на страницу выбора услуг
+        await page.goto(self.url, wait_until='domcontentloaded')
+        await self.wait_until_ready_async(page)
+        self.logger.info("✅ Шаг 1: Страница загружена")
+
+        # Шаг 2: Выбрать первую услугу (аренда корта)
+        self.logger.info("Шаг 2: Выбор первой услуги")
+        service_button = await page.wait_for_selector('text=Аренда корта', timeout=10000)
+        if not service_button:
+            # Если нет текста "Аренда корта", попробуем выбрать первый сервис
+            service_buttons = await page.query_selector_all('button.ui-kit-simple-cell')
+            if service_buttons:
+                service_button = service_buttons[0]
+            else:
+                raise Exception("Не удалось найти ни одну услугу")
+        await service_button.click()
+
+        # Шаг 3: Выбрать корт
+        self.logger.info("Шаг 3: Выбор корта")
+        # Ждем загрузки списка кортов
+        await page.wait_for_selector('text=Выбрать корт', timeout=10000)
+        # Получаем все доступные корты
+        court_elements = await page.query_selector_all('div.court-item')  # Уточнить селектор
+        if not court_elements:
+            # Альтернативный селектор
+            court_elements = await page.query_selector_all('div:has-text="Корт №")')
+        return court_elements
+
+    async def _get_date_elements(self, page):
+        """Список дат в календаре выбранного корта"""
+        # Ждем загрузки календаря
+        await page.wait_for_selector('text=Выбрать дату', timeout=10000)
+        date_elements = await page.query_selector_all('div.date-item')  # Уточнить селектор
+        if not date_elements:
+            # Альтернативный селектор
+            date_elements = await page.query_selector_all('div.calendar-day')
+        return date_elements
+
+    async def _scrape_court(self, context, semaphore, court_index):
+        """Даты календаря корта и обход его пар (корт, дата)"""
+        date_count = await self.safe_parse_async(
+            lambda: self._count_dates(context, semaphore, court_index)
+        )
+        self.logger.info(f"Корт {court_index + 1}: дат {date_count}")
+
+        results = await asyncio.gather(
+            *(self._scrape_pair(context, semaphore, court_index, date_index)
+              for date_index in range(date_count)),
+            return_exceptions=True
+        )
+        data = []
+        for date_index, result in enumerate(results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Ошибка для корта {court_index + 1}, дата {date_index + 1}: {str(result)}")
+                continue
+            data.extend(result)
+        return data
+
+    async def _count_dates(self, context, semaphore, court_index):
+        """Сколько дат календаря корта обходить (не больше self.days)"""
+        async with semaphore:
+            page = await context.new_page()
+            try:
+                court_elements = await self._open_court_list(page)
+                await court_elements[court_index].click()
+                return min(len(await self._get_date_elements(page)), self.days)
+            finally:
+                await page.close()
+
+    async def _scrape_pair(self, context, semaphore, court_index, date_index):
+        """Шаг 4 для одной пары (корт, дата) с повторами без блокировки event loop"""
+        return await self.safe_parse_async(
+            lambda: self._scrape_pair_once(context, semaphore, court_index, date_index)
+        )
+
+    async def _scrape_pair_once(self, context, semaphore, court_index, date_index):
+        """Одна попытка шага 4 в отдельной вкладке (пауза между попытками не занимает вкладку)"""
+        async with semaphore:
+            page = await context.new_page()
+            try:
+                court_elements = await self._open_court_list(page)
+                await court_elements[court_index].click()
+
+                self.logger.info(f"Шаг 4: Выбор даты {date_index + 1} для корта {court_index + 1}")
+                date_elements = await self._get_date_elements(page)
+                if date_index >= len(date_elements):
+                    return []
+                await date_elements[date_index].click()
+                await self.wait_until_ready_async(page, self.slot_ready_conditions)
+
+                # Календарь начинается с сегодняшнего дня
+                slot_date = (datetime.now() + timedelta(days=date_index)).date()
+                return await self._read_time_slots(page, court_index, slot_date)
+            finally:
+                await page.close()
+
+    async def _read_time_slots(self, page, court_index, slot_date):
+        """Чтение всех временных слотов выбранной даты одним JS-вызовом"""
+        payload = await SLOT_EXTRACTOR.extract_async(page, {
+            'court': str(court_index + 1),
+            'date': slot_date.isoformat()
+        })
+        return SLOT_EXTRACTOR.normalize(payload, self, default_date=slot_date)
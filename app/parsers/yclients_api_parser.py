@@ -0,0 +1,235 @@
+import asyncio
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .base_parser import BaseParser
+from .retry import RetryPolicy
+from .records import SlotRecord
+from app.services.host_guard import HostGuard, get_host_guard
+
+DEFAULT_API_BASE = 'https://api.yclients.com'
+
+# Общая сессия процесса: keep-alive соединения переиспользуются между обновлениями
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session(pool_maxsize=16):
+    """Пул HTTP-соединений для API YClients"""
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+class YClientsApiError(Exception):
+    """Ошибка обращения к API YClients
+
+    retryable - имеет ли смысл повтор (сеть, 429 и 5xx - да, прочие 4xx - нет)
+    """
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class YClientsApiClient:
+    """Клиент JSON API онлайн-записи YClients (те же эндпоинты, что у виджета)"""
+
+    def __init__(self, company_id, api_base=DEFAULT_API_BASE, partner_token=None,
+                 timeout=10, session=None, host_guard=None):
+        self.company_id = company_id
+        self.api_base = api_base.rstrip('/')
+        self.timeout = timeout
+        self.session = session or get_http_session()
+        self.host_guard = host_guard or get_host_guard()
+        self.headers = {'Accept': 'application/vnd.yclients.v2+json'}
+        if partner_token:
+            self.headers['Authorization'] = f'Bearer {partner_token}'
+
+    def _get(self, path, params=None):
+        url = f"{self.api_base}{path}"
+        # Вежливость и размыкатель - по хосту API, а не по странице записи парсера
+        host = HostGuard.host_of(url)
+        if not self.host_guard.allow(host):
+            raise YClientsApiError(f"{url}: размыкатель хоста {host} открыт")
+        self.host_guard.acquire(host)
+        try:
+            response = self.session.get(url, params=params, headers=self.headers, timeout=self.timeout)
+            response.raise_for_status()
+            payload = response.json()
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            error = YClientsApiError(f"{url}: {str(e)}", retryable=status == 429 or (status or 0) >= 500)
+            self._record_host_result(host, error)
+            raise error from e
+        except requests.RequestException as e:
+            self.host_guard.record_failure(host, e)
+            raise YClientsApiError(f"{url}: {str(e)}", retryable=True) from e
+        except ValueError as e:
+            self.host_guard.record_success(host)
+            raise YClientsApiError(f"{url}: {str(e)}") from e
+        self.host_guard.record_success(host)
+
+        # Ответы API бывают как «голыми», так и в обертке {"success": ..., "data": ...}
+        if isinstance(payload, dict) and 'data' in payload:
+            if payload.get('success') is False:
+                raise YClientsApiError(f"{url}: {payload.get('meta')}")
+            return payload['data']
+        return payload
+
+    def _record_host_result(self, host, error):
+        """Сбой хоста - только повторяемые ошибки (сеть, 429, 5xx); прочие 4xx - ответ хоста"""
+        if error.retryable:
+            self.host_guard.record_failure(host, error)
+        else:
+            self.host_guard.record_success(host)
+
+    def get_staff(self):
+        """Список ресурсов (кортов) компании"""
+        return [staff for staff in self._get(f"/api/v1/book_staff/{self.company_id}")
+                if staff.get('bookable', True)]
+
+    def get_dates(self, staff_id, date_from, date_to):
+        """Даты с записью для корта за весь диапазон одним запросом"""
+        payload = self._get(
+            f"/api/v1/book_dates/{self.company_id}",
+            params={
+                'staff_id': staff_id,
+                'date_from': date_from.isoformat(),
+                'date_to': date_to.isoformat()
+            }
+        )
+        return payload.get('booking_dates', []) if isinstance(payload, dict) else payload
+
+    def get_times(self, staff_id, date):
+        """Свободные времена корта на дату"""
+        return self._get(f"/api/v1/book_times/{self.company_id}/{staff_id}/{date.isoformat()}")
+
+
+class YClientsApiParser(BaseParser):
+    """Парсер YClients через JSON API; браузер используется только как запасной путь"""
+
+    streams = True
+
+    # Запросы API быстрые: короткие паузы между повторами
+    retry_policy = RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=5)
+
+    def __init__(self, url=None, api_base=None, partner_token=None, days=3, max_workers=8,
+                 browser_concurrency=4):
+        super().__init__()
+        self.url = url or "https://b1044864.yclients.com/company/967881/personal/select-time?o=m-1"
+        self.club_name = "MyProtennis.ru"
+        self.days = days
+        self.max_workers = max_workers
+        self.browser_concurrency = browser_concurrency
+
+        company = re.search(r'/company/(\d+)', self.url)
+        self.client = YClientsApiClient(
+            company_id=company.group(1) if company else None,
+            api_base=api_base or DEFAULT_API_BASE,
+            partner_token=partner_token
+        )
+
+    async def get_courts_data(self):
+        """Получение слотов через API, при ошибке - через Playwright"""
+        data = []
+        async for chunk in self.iter_courts_data():
+            data.extend(chunk)
+        return data
+
+    async def iter_courts_data(self):
+        """Слоты порциями по датам: API отдает дату, как только получены ее времена"""
+        yielded_dates = set()
+        try:
+            staff_list, jobs_by_date = await asyncio.to_thread(self._plan_api_requests)
+            count = 0
+            for date in sorted(jobs_by_date):
+                free_times = await asyncio.to_thread(self._fetch_times, jobs_by_date[date])
+                records = self._build_records(staff_list, free_times)
+                yielded_dates.add(date)
+                count += len(records)
+                yield records
+            self.logger.info(f"✅ Данные YClients получены через API: {count} записей")
+            return
+        except Exception as e:
+            self.logger.warning(f"API YClients недоступно ({str(e)}), переходим на браузер")
+
+        from .yclients_adv_parser import YClientsAdvParser
+        browser_parser = YClientsAdvParser(self.url, concurrency=self.browser_concurrency, days=self.days)
+        browser_parser.harness = self.harness
+        data = await browser_parser.get_courts_data()
+        # Источник считается недоступным, только если не сработал и браузерный путь
+        self.last_error = browser_parser.last_error
+
+        # Даты, уже полученные через API до сбоя, не дублируем
+        by_date = {}
+        for record in data or []:
+            if record.get('date') not in yielded_dates:
+                by_date.setdefault(record.get('date'), []).append(record)
+        for records in by_date.values():
+            yield records
+
+    def _plan_api_requests(self):
+        """Корты и пары (корт, дата) с записью, сгруппированные по дате"""
+        if not self.client.company_id:
+            raise YClientsApiError(f"Не удалось определить company_id из {self.url}")
+
+        today = datetime.now().date()
+        date_to = today + timedelta(days=self.days - 1)
+        staff_list = self.safe_parse(self.client.get_staff)
+        if not staff_list:
+            raise YClientsApiError("API вернуло пустой список кортов")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            booking_dates = executor.map(lambda staff: self.safe_parse(
+                lambda: self.client.get_dates(staff['id'], today, date_to)), staff_list)
+
+            jobs_by_date = {}
+            for staff, raw_dates in zip(staff_list, booking_dates):
+                for raw_date in raw_dates:
+                    date = datetime.strptime(str(raw_date)[:10], '%Y-%m-%d').date()
+                    if today <= date <= date_to:
+                        jobs_by_date.setdefault(date, []).append((staff, date))
+
+        return staff_list, jobs_by_date
+
+    def _fetch_times(self, jobs):
+        """Свободные времена для пар (корт, дата) параллельно по общему пулу соединений"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            times = executor.map(lambda job: self.safe_parse(
+                lambda: self.client.get_times(job[0]['id'], job[1])), jobs)
+            return {
+                (staff['id'], date): set(self.normalize_times([slot['time'] for slot in slots]))
+                for (staff, date), slots in zip(jobs, times)
+            }
+
+    def _build_records(self, staff_list, free_times):
+        """API отдает только свободное время: занятые слоты берем из общей сетки даты"""
+        grid = {}
+        for (staff_id, date), times in free_times.items():
+            grid.setdefault(date, set()).update(times)
+
+        data = []
+        for index, staff in enumerate(staff_list, start=1):
+            number = re.search(r'\d+', staff.get('name', ''))
+            court_number = number.group(0) if number else str(index)
+            for date in sorted(grid):
+                available = free_times.get((staff['id'], date), set())
+                for time_slot in sorted(grid[date]):
+                    data.append(SlotRecord(
+                        self.club_name, court_number, date, time_slot,
+                        'свободен' if time_slot in available else 'занят'
+                    ))
+        return data
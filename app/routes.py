@@ -1,10 +1,14 @@
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, current_app, render_template, jsonify
 from app.services.parser_service import ParserService
-from app.models import TennisCourt
-from app import db
+from app.services.async_runner import run_async
+from app.services.scheduler import get_scheduler
+from app.services.host_guard import get_host_guard
+from app.services.process_executor import worker_host_snapshot
+from app.services.storage import database_size, read_session, upcoming_slots
+from app.services.generations import current_generation
+from app.services.retention import get_retention
 from datetime import datetime, timedelta
 import threading
-import asyncio
 
 main_bp = Blueprint('main', __name__)
 
@@ -12,21 +16,21 @@ main_bp = Blueprint('main', __name__)
 update_status = {
     'is_updating': False,
     'last_update': None,
-    'error': None
+    'error': None,
+    'last_save_stats': None
+}
+
+# Готовый ответ /data: (база, поколение, сегодня) -> тело; опубликованное поколение не меняется
+data_cache = {
+    'entry': None
 }
 
 @main_bp.route('/')
 def index():
-    # Получаем данные для отображения (только актуальные)
-    today = datetime.now().date()
-    courts = TennisCourt.query.filter(
-        TennisCourt.date >= today
-    ).order_by(
-        TennisCourt.date,
-        TennisCourt.time_slot,
-        TennisCourt.club_name,
-        TennisCourt.court_number
-    ).all()
+    # Получаем данные для отображения (только актуальные); чтение идет
+    # через пул читателей и не ждет транзакцию обновления
+    with read_session() as session:
+        courts = upcoming_slots(current_generation(session), session=session).all()
     
     return render_template('index.html', courts=courts, update_status=update_status)
 
@@ -40,14 +44,12 @@ def update_task(app):
         with app.app_context():
             service = ParserService(app)
             
-            # Создаем новый event loop для асинхронного вызова
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            # Запускаем асинхронную задачу
-            saved_count = loop.run_until_complete(service.update_all_data(app))
+            # Запускаем асинхронную задачу в общем event loop процесса,
+            # где между обновлениями живут теплые браузеры
+            saved_count = run_async(service.update_all_data(app))
             
             update_status['last_update'] = datetime.now()
+            update_status['last_save_stats'] = service.last_save_stats
             update_status['is_updating'] = False
             
             return saved_count
@@ -67,9 +69,9 @@ def update_data():
             'message': 'Обновление уже выполняется'
         }), 400
     
-    # Создаем новое приложение для потока
-    from app import create_app
-    app = create_app()
+    # Поток получает текущее приложение: новое create_app() на каждый запрос
+    # создавало бы свои движки и заново запускало миграции, планировщик и очистку
+    app = current_app._get_current_object()
     
     # Запускаем обновление в отдельном потоке с передачей приложения
     thread = threading.Thread(target=update_task, args=(app,))
@@ -88,23 +90,42 @@ def update_status_route():
     status_response = {
         'is_updating': update_status['is_updating'],
         'last_update': update_status['last_update'].isoformat() if update_status['last_update'] else None,
-        'error': update_status['error']
+        'error': update_status['error'],
+        'last_save_stats': update_status['last_save_stats']
     }
     
+    # Опубликованное поколение данных
+    with read_session() as session:
+        status_response['generation'] = current_generation(session)
+        status_response['database'] = database_size(session)
+    
+    # Хранение прошедших слотов; размеры таблиц и индексов с последнего прохода
+    retention = get_retention()
+    if retention is not None:
+        status_response['retention'] = retention.snapshot()
+    
+    # Состояние размыкателей по хостам источников: хосты API учитываются в воркерах,
+    # страницы источников - в этом процессе (его размыкатель решает, запускать ли парсер)
+    status_response['hosts'] = {**worker_host_snapshot(), **get_host_guard().snapshot()}
+    
+    scheduler = get_scheduler()
+    if scheduler is not None:
+        status_response['schedule'] = scheduler.snapshot()
+    
     return jsonify(status_response)
 
 @main_bp.route('/data')
 def get_data():
     """Получение данных для AJAX обновления таблицы"""
     today = datetime.now().date()
-    courts = TennisCourt.query.filter(
-        TennisCourt.date >= today
-    ).order_by(
-        TennisCourt.date,
-        TennisCourt.time_slot,
-        TennisCourt.club_name,
-        TennisCourt.court_number
-    ).all()
+    with read_session() as session:
+        generation = current_generation(session)
+        key = (current_app.config['SQLALCHEMY_DATABASE_URI'], generation, today)
+        entry = data_cache['entry']
+        if entry is not None and entry[0] == key:
+            return current_app.response_class(entry[1], mimetype='application/json')
+        # Только столбцы таблицы: читаются из покрывающего индекса
+        courts = upcoming_slots(generation, today, session=session).all()
     
     # Форматируем данные для JSON
     data = []
@@ -119,4 +140,6 @@ def get_data():
             'status_class': 'success' if court.status == 'свободен' else 'danger'
         })
     
-    return jsonify(data)
\ No newline at end of file
+    response = jsonify(data)
+    data_cache['entry'] = (key, response.get_data())
+    return response
\ No newline at end of file
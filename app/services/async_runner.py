@@ -0,0 +1,57 @@
+import asyncio
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger('AsyncRunner')
+
+# Общий для процесса event loop: в нем живут теплые браузеры и асинхронные парсеры
+_loop = None
+_thread = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    """Получение (и при необходимости запуск) фонового event loop процесса"""
+    global _loop, _thread
+
+    with _lock:
+        if _loop is None or not _thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_loop.run_forever,
+                name='async-runner',
+                daemon=True
+            )
+            _thread.start()
+            atexit.unregister(shutdown)
+            atexit.register(shutdown)
+        return _loop
+
+
+def run_async(coro, timeout=None):
+    """Выполнение корутины в общем event loop из любого потока"""
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    return future.result(timeout)
+
+
+def shutdown(timeout=30):
+    """Корректная остановка: закрываем пулы браузеров и event loop"""
+    global _loop, _thread
+
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop = _thread = None
+
+    if loop is None or not thread.is_alive():
+        return
+
+    from app.services.browser_pool import close_browser_pools
+    try:
+        asyncio.run_coroutine_threadsafe(close_browser_pools(), loop).result(timeout)
+    except Exception as e:
+        logger.error(f"Ошибка при закрытии пулов браузеров: {str(e)}")
+
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout)
+    loop.close()
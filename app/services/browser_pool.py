@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import weakref
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger('BrowserPool')
+
+DEFAULT_LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-setuid-sandbox'
+]
+
+
+class _PooledBrowser:
+    """Браузер пула со счетчиками использования"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.uses = 0
+        self.active = 0
+        self.retiring = False
+
+
+class BrowserPool:
+    """Пул теплых браузеров Playwright
+
+    Держит size запущенных Chromium и выдает изолированные BrowserContext на
+    каждый клуб. Браузер уходит на пересоздание после max_uses выдач или
+    когда его процессы занимают больше max_memory_mb.
+    """
+
+    def __init__(self, size=2, max_uses=50, max_memory_mb=1500, launch_args=None):
+        self.size = size
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.launch_args = launch_args or DEFAULT_LAUNCH_ARGS
+        self._playwright = None
+        self._browsers = []
+        self._lock = asyncio.Lock()
+        self._closed = False
+
+    async def start(self):
+        """Запуск Playwright и прогрев size браузеров"""
+        async with self._lock:
+            await self._ensure_started()
+
+    async def _ensure_started(self):
+        if self._closed:
+            raise RuntimeError("Пул браузеров уже закрыт")
+
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+
+        # Упавшие браузеры выводим из пула
+        for pooled in list(self._browsers):
+            if not pooled.browser.is_connected():
+                pooled.retiring = True
+                if pooled.active == 0:
+                    self._browsers.remove(pooled)
+
+        while len([b for b in self._browsers if not b.retiring]) < self.size:
+            self._browsers.append(await self._launch())
+
+    async def _launch(self):
+        browser = await self._playwright.chromium.launch(headless=True, args=self.launch_args)
+        logger.info(f"Запущен браузер пула (всего: {len(self._browsers) + 1})")
+        return _PooledBrowser(browser)
+
+    @asynccontextmanager
+    async def context(self, **context_options):
+        """Выдача изолированного BrowserContext из наименее загруженного браузера"""
+        async with self._lock:
+            await self._ensure_started()
+            pooled = min(
+                (b for b in self._browsers if not b.retiring),
+                key=lambda b: b.active
+            )
+            pooled.uses += 1
+            pooled.active += 1
+            if pooled.uses >= self.max_uses:
+                pooled.retiring = True
+
+        context = None
+        try:
+            context = await pooled.browser.new_context(**context_options)
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning(f"Ошибка при закрытии контекста: {str(e)}")
+            await self._release(pooled)
+
+    async def _release(self, pooled):
+        """Возврат браузера в пул и пересоздание при необходимости"""
+        if not pooled.retiring and self.max_memory_mb:
+            rss_mb = await self._browser_rss_mb(pooled.browser)
+            if rss_mb is not None and rss_mb > self.max_memory_mb:
+                logger.info(f"Браузер занимает {rss_mb:.0f} МБ, отправляем на пересоздание")
+                pooled.retiring = True
+
+        async with self._lock:
+            pooled.active -= 1
+            if pooled.retiring and pooled.active == 0 and pooled in self._browsers:
+                self._browsers.remove(pooled)
+                logger.info(f"Пересоздание браузера после {pooled.uses} использований")
+                await self._close_browser(pooled)
+                if not self._closed:
+                    await self._ensure_started()
+
+    async def _browser_rss_mb(self, browser):
+        """Суммарный RSS процессов браузера (Linux, через CDP SystemInfo)"""
+        try:
+            session = await browser.new_browser_cdp_session()
+            try:
+                info = await session.send('SystemInfo.getProcessInfo')
+            finally:
+                await session.detach()
+        except Exception as e:
+            logger.debug(f"Не удалось получить список процессов браузера: {str(e)}")
+            return None
+
+        total_kb = 0
+        for process in info.get('processInfo', []):
+            try:
+                with open(f"/proc/{process['id']}/status") as status_file:
+                    for line in status_file:
+                        if line.startswith('VmRSS:'):
+                            total_kb += int(line.split()[1])
+                            break
+            except (OSError, ValueError, KeyError):
+                continue
+        return total_kb / 1024
+
+    async def _close_browser(self, pooled):
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            logger.warning(f"Ошибка при закрытии браузера: {str(e)}")
+
+    async def close(self):
+        """Закрытие всех браузеров и Playwright"""
+        async with self._lock:
+            self._closed = True
+            browsers, self._browsers = self._browsers, []
+            for pooled in browsers:
+                await self._close_browser(pooled)
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+        logger.info("Пул браузеров закрыт")
+
+
+# Один пул на event loop: объекты Playwright нельзя использовать из другого loop
+_pools = weakref.WeakKeyDictionary()
+
+
+def get_browser_pool(config=None):
+    """Пул браузеров текущего event loop (создается при первом обращении)"""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        config = config or {}
+        pool = BrowserPool(
+            size=config.get('BROWSER_POOL_SIZE', 2),
+            max_uses=config.get('BROWSER_MAX_USES', 50),
+            max_memory_mb=config.get('BROWSER_MAX_MEMORY_MB', 1500)
+        )
+        _pools[loop] = pool
+    return pool
+
+
+async def close_browser_pools():
+    """Закрытие пула браузеров текущего event loop"""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
@@ -0,0 +1,188 @@
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger('WebDriverPool')
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+def build_chrome_options():
+    """Опции Chrome для snap-версии Chromium"""
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+
+    # Специальные опции для snap
+    chrome_options.add_argument("--disable-setuid-sandbox")
+    chrome_options.add_argument("--remote-debugging-pipe")
+    chrome_options.add_argument("--disable-software-rasterizer")
+    return chrome_options
+
+
+class WebDriverPool:
+    """Пул переиспользуемых сессий Selenium WebDriver
+
+    Одновременно работает не больше max_sessions сессий. Перед выдачей сессия
+    проверяется health-пробой, после возврата очищается (cookies, storage,
+    лишние вкладки). Сессия пересоздается после max_uses выдач. Повторный
+    возврат уже возвращенной сессии (отмена по дедлайну и finally рабочего
+    потока) игнорируется, поэтому слот освобождается ровно один раз.
+    """
+
+    def __init__(self, max_sessions=2, max_uses=100, acquire_timeout=120):
+        self.max_sessions = max_sessions
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(max_sessions)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._uses = {}
+        # Выданные и еще не возвращенные сессии: id -> сессия
+        self._leased = {}
+        self._closed = False
+
+    def acquire(self, driver_path_provider):
+        """Получение здоровой сессии; driver_path_provider вызывается только для новой сессии"""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"Нет свободной сессии WebDriver за {self.acquire_timeout} с")
+
+        try:
+            while True:
+                with self._lock:
+                    if self._closed:
+                        raise RuntimeError("Пул WebDriver уже закрыт")
+                    driver = self._idle.pop() if self._idle else None
+
+                if driver is None:
+                    driver = self._create(driver_path_provider)
+                    break
+                if self._is_healthy(driver):
+                    break
+                logger.warning("Сессия WebDriver не прошла проверку, пересоздаем")
+                self._quit(driver)
+
+            with self._lock:
+                self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+                self._leased[id(driver)] = driver
+            return driver
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, driver, discard=False):
+        """Возврат сессии в пул (discard=True - закрыть сессию)"""
+        with self._lock:
+            if self._leased.pop(id(driver), None) is not driver:
+                logger.warning("Сессия WebDriver уже возвращена в пул")
+                return
+        try:
+            if not discard and self._uses.get(id(driver), 0) >= self.max_uses:
+                logger.info("Сессия WebDriver исчерпала лимит использований")
+                discard = True
+
+            if not discard and self._reset(driver):
+                with self._lock:
+                    if not self._closed:
+                        self._idle.append(driver)
+                        return
+            self._quit(driver)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def session(self, driver_path_provider):
+        """Контекстный менеджер для временного использования сессии"""
+        driver = self.acquire(driver_path_provider)
+        try:
+            yield driver
+        except Exception:
+            self.release(driver, discard=not self._is_healthy(driver))
+            raise
+        else:
+            self.release(driver)
+
+    def _create(self, driver_path_provider):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        driver_path = driver_path_provider()
+        if not driver_path:
+            raise RuntimeError("ChromeDriver не найден")
+
+        service = Service(executable_path=driver_path)
+        driver = webdriver.Chrome(service=service, options=build_chrome_options())
+        driver.set_page_load_timeout(30)
+        logger.info(f"✅ Создана новая сессия WebDriver: {driver_path}")
+        return driver
+
+    def _is_healthy(self, driver):
+        """Health-проба: сессия отвечает и у нее есть окно"""
+        try:
+            return driver.execute_script('return 1') == 1 and bool(driver.window_handles)
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        """Очистка состояния сессии между заемщиками"""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.delete_all_cookies()
+            try:
+                # Снимаем блокировку запросов, включенную предыдущим заемщиком
+                driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': []})
+            except Exception:
+                pass
+            driver.execute_script('try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}')
+            driver.get('about:blank')
+            return True
+        except Exception as e:
+            logger.warning(f"Не удалось очистить сессию WebDriver: {str(e)}")
+            return False
+
+    def _quit(self, driver):
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.error(f"Ошибка при закрытии WebDriver: {str(e)}")
+
+    def close(self):
+        """Закрытие всех простаивающих сессий"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._quit(driver)
+        if idle:
+            logger.info(f"Пул WebDriver закрыт, завершено сессий: {len(idle)}")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool(config=None):
+    """Общий для процесса пул WebDriver (создается при первом обращении)"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            config = config or {}
+            _pool = WebDriverPool(
+                max_sessions=config.get('WEBDRIVER_POOL_SIZE', 2),
+                max_uses=config.get('WEBDRIVER_MAX_USES', 100)
+            )
+            atexit.register(_pool.close)
+        return _pool
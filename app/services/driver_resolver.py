@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger('ChromeDriverResolver')
+
+ROOT_DIR = Path(__file__).parent.parent.parent
+
+# Пути для snap-версии и стандартные пути
+CANDIDATE_PATHS = [
+    '/snap/bin/chromium.chromedriver',
+    '/snap/chromium/current/usr/lib/chromium-browser/chromedriver',
+    str(ROOT_DIR / 'drivers' / 'chromedriver'),
+    str(ROOT_DIR / 'drivers' / 'chromedriver_linux64'),
+    '/usr/bin/chromedriver',
+    '/usr/local/bin/chromedriver',
+    '/usr/lib/chromium-browser/chromedriver'
+]
+
+DEFAULT_CACHE_PATH = ROOT_DIR / 'instance' / 'chromedriver_cache.json'
+
+# Сколько секунд помнить, что драйвер не найден: после установки он подхватится без перезапуска
+MISSING_TTL = 60
+
+_MISSING = object()
+
+
+class ChromeDriverResolver:
+    """Поиск ChromeDriver один раз на процесс с кэшем на диске
+
+    Найденный драйвер сохраняется в кэш вместе с mtime, размером и версией.
+    Пока файл драйвера не изменился, повторная проверка через subprocess
+    не выполняется ни в этом, ни в следующих процессах. Отсутствие драйвера
+    запоминается только на missing_ttl секунд.
+    """
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, candidates=None, missing_ttl=MISSING_TTL):
+        self.cache_path = Path(cache_path)
+        self.candidates = candidates or CANDIDATE_PATHS
+        self.missing_ttl = missing_ttl
+        self._resolved = _MISSING
+        self._missing_until = 0.0
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        """Путь к рабочему ChromeDriver или None"""
+        with self._lock:
+            if self._resolved is not _MISSING and self._is_current(self._resolved):
+                return self._resolved['path'] if self._resolved else None
+
+            entry = self._load_cache()
+            if entry and self._is_current(entry):
+                logger.info(f"ChromeDriver из кэша: {entry['path']} ({entry['version']})")
+            else:
+                entry = self._probe()
+                if entry:
+                    self._save_cache(entry)
+                else:
+                    self._missing_until = time.monotonic() + self.missing_ttl
+
+            self._resolved = entry
+            return entry['path'] if entry else None
+
+    def invalidate(self):
+        """Сброс кэша (например, после обновления драйвера)"""
+        with self._lock:
+            self._resolved = _MISSING
+            try:
+                self.cache_path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _is_current(self, entry):
+        """Файл из записи кэша существует и не менялся"""
+        if entry is None:
+            # Отсутствие драйвера запоминаем ненадолго и только в пределах процесса
+            return time.monotonic() < self._missing_until
+        try:
+            stat = os.stat(entry['path'])
+        except OSError:
+            return False
+        return stat.st_mtime_ns == entry['mtime_ns'] and stat.st_size == entry['size']
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, encoding='utf-8') as cache_file:
+                entry = json.load(cache_file)
+            return entry if {'path', 'mtime_ns', 'size', 'version'} <= entry.keys() else None
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _save_cache(self, entry):
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+                json.dump(entry, cache_file, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить кэш ChromeDriver: {str(e)}")
+
+    def _probe(self):
+        """Проверка всех кандидатов через запуск `chromedriver --version`"""
+        for path in self.candidates:
+            if not os.path.exists(path):
+                continue
+
+            logger.info(f"Найден файл драйвера: {path}")
+
+            # Проверяем права на выполнение
+            if not os.access(path, os.X_OK):
+                try:
+                    os.chmod(path, 0o755)
+                    logger.info(f"Права на выполнение установлены для: {path}")
+                except Exception as e:
+                    logger.warning(f"Не удалось установить права для {path}: {str(e)}")
+
+            # Проверяем версию
+            try:
+                result = subprocess.run([path, '--version'],
+                                        capture_output=True, text=True, timeout=5)
+                if result.returncode == 0:
+                    version_info = result.stdout.strip()
+                    logger.info(f"✅ ChromeDriver найден: {path}")
+                    logger.info(f"Версия: {version_info}")
+                    stat = os.stat(path)
+                    return {
+                        'path': path,
+                        'mtime_ns': stat.st_mtime_ns,
+                        'size': stat.st_size,
+                        'version': version_info
+                    }
+                logger.warning(f"Файл существует, но не является ChromeDriver: {path}")
+            except Exception as e:
+                logger.warning(f"Ошибка при проверке {path}: {str(e)}")
+
+        logger.error("❌ ChromeDriver не найден ни в одном из путей:")
+        for path in self.candidates:
+            logger.error(f"  - {path}")
+        return None
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_chromedriver_resolver():
+    """Общий для процесса сервис поиска ChromeDriver"""
+    global _resolver
+
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = ChromeDriverResolver()
+        return _resolver
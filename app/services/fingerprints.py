@@ -0,0 +1,103 @@
+import hashlib
+from collections import defaultdict
+
+from sqlalchemy import func
+
+from app import db
+from app.models import ScrapeFingerprint, TennisCourt
+
+
+def group_by_club_date(data, source=''):
+    """Группировка записей источника по (источник, клуб, дата) с сохранением порядка
+
+    Один клуб приходит из нескольких источников (FindSport и сайт клуба),
+    поэтому отпечаток группы хранится отдельно для каждого источника.
+    """
+    groups = defaultdict(list)
+    for record in data:
+        groups[(source, record['club_name'], record['date'])].append(record)
+    return groups
+
+
+def slot_count(records):
+    """Число разных слотов группы: дубликаты (корт, время) upsert схлопывает в одну строку"""
+    return len({(str(r['court_number']), r['time_slot']) for r in records})
+
+
+def fingerprint(records):
+    """Отпечаток содержимого группы, не зависящий от порядка записей"""
+    digest = hashlib.sha256()
+    for court_number, time_slot, status in sorted(
+        (str(r['court_number']), r['time_slot'], r['status']) for r in records
+    ):
+        digest.update(f'{court_number}\x1f{time_slot}\x1f{status}\x1e'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def row_counts_query(clubs, dates):
+    """Число действующих версий слотов по (клуб, дата)"""
+    return db.session.query(
+        TennisCourt.club_name, TennisCourt.date, func.count(TennisCourt.id)
+    ).filter(
+        TennisCourt.club_name.in_(clubs),
+        TennisCourt.date.in_(dates),
+        TennisCourt.valid_to.is_(None)
+    ).group_by(TennisCourt.club_name, TennisCourt.date)
+
+
+def find_changed_groups(groups):
+    """Группы, у которых отпечаток изменился или в БД меньше строк, чем слотов в группе
+
+    Сверка числа строк защищает от устаревших отпечатков, если записи
+    были удалены из tennis_court в обход обновления. Строки считаются по
+    (клуб, дата) без учета источника: у источников одного клуба общие слоты.
+    """
+    if not groups:
+        return {}
+
+    sources = {source for source, _, _ in groups}
+    clubs = {club for _, club, _ in groups}
+    dates = {date for _, _, date in groups}
+
+    stored = {
+        (fp.source, fp.club_name, fp.date): fp
+        for fp in ScrapeFingerprint.query.filter(
+            ScrapeFingerprint.source.in_(sources),
+            ScrapeFingerprint.club_name.in_(clubs),
+            ScrapeFingerprint.date.in_(dates)
+        )
+    }
+    row_counts = dict(
+        ((club, date), count) for club, date, count in row_counts_query(clubs, dates)
+    )
+
+    changed = {}
+    for key, records in groups.items():
+        current = fingerprint(records)
+        previous = stored.get(key)
+        if (previous is None or previous.fingerprint != current
+                or row_counts.get(key[1:], 0) < slot_count(records)):
+            changed[key] = current
+    return changed
+
+
+def store_fingerprints(groups, changed):
+    """Сохранение новых отпечатков изменившихся групп (без commit)"""
+    if not changed:
+        return
+
+    stored = {
+        (fp.source, fp.club_name, fp.date): fp
+        for fp in ScrapeFingerprint.query.filter(
+            ScrapeFingerprint.source.in_({source for source, _, _ in changed}),
+            ScrapeFingerprint.club_name.in_({club for _, club, _ in changed}),
+            ScrapeFingerprint.date.in_({date for _, _, date in changed})
+        )
+    }
+    for key, value in changed.items():
+        entry = stored.get(key)
+        if entry is None:
+            entry = ScrapeFingerprint(source=key[0], club_name=key[1], date=key[2])
+            db.session.add(entry)
+        entry.fingerprint = value
+        entry.record_count = slot_count(groups[key])
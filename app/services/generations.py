@@ -0,0 +1,187 @@
+import logging
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, update
+
+from app import db
+from app.models import DataGeneration, GenerationPointer, ScrapeFingerprint, TennisCourt
+
+logger = logging.getLogger('Generations')
+
+# Опубликованных поколений, которые хранятся для читателей, начавших запрос до переключения
+GENERATIONS_KEEP = 2
+
+POINTER_ID = 1
+
+# Через сколько секунд без записей поколение другого хоста считается брошенным
+GENERATION_STALE_SECONDS = 3600
+
+# Поколение строит только один писатель процесса; освобождается при публикации или отмене
+_writer_lock = threading.Lock()
+
+
+def current_generation(session=None):
+    """Номер опубликованного поколения (0 - данные, записанные до появления поколений)"""
+    value = (session or db.session).query(GenerationPointer.generation_id).filter_by(id=POINTER_ID).scalar()
+    return value or 0
+
+
+def ensure_pointer():
+    if db.session.get(GenerationPointer, POINTER_ID) is None:
+        db.session.add(GenerationPointer(id=POINTER_ID, generation_id=0))
+        db.session.commit()
+
+
+def begin_generation(timeout=-1):
+    """Новое строящееся поколение; ждет, пока предыдущий писатель опубликует или отменит свое"""
+    if not _writer_lock.acquire(timeout=timeout):
+        raise TimeoutError("Поколение данных уже строится другим обновлением")
+    try:
+        generation = DataGeneration(status='building', owner_host=socket.gethostname(),
+                                    owner_pid=os.getpid(), heartbeat_at=datetime.utcnow())
+        db.session.add(generation)
+        db.session.commit()
+        return generation.id
+    except Exception:
+        _writer_lock.release()
+        raise
+
+
+def touch_generation(generation_id):
+    """Отметка живого писателя; фиксируется вместе с транзакцией записи"""
+    db.session.execute(
+        update(DataGeneration).where(DataGeneration.id == generation_id).values(heartbeat_at=datetime.utcnow())
+    )
+
+
+def _publish(generation_id):
+    db.session.execute(
+        update(GenerationPointer).where(GenerationPointer.id == POINTER_ID).values(generation_id=generation_id)
+    )
+    db.session.execute(
+        update(DataGeneration).where(DataGeneration.id == generation_id)
+        .values(status='published', finished_at=datetime.utcnow())
+    )
+    db.session.commit()
+    logger.info(f"Опубликовано поколение данных {generation_id}")
+
+
+def _abort(generation_id):
+    db.session.rollback()
+    # Отмена редка, полный просмотр по valid_from допустим
+    db.session.execute(delete(TennisCourt).where(TennisCourt.valid_from == generation_id))
+    db.session.execute(
+        update(TennisCourt).where(TennisCourt.valid_to == generation_id).values(valid_to=None)
+    )
+    db.session.execute(delete(ScrapeFingerprint))
+    db.session.execute(
+        update(DataGeneration).where(DataGeneration.id == generation_id)
+        .values(status='aborted', finished_at=datetime.utcnow())
+    )
+    db.session.commit()
+    logger.warning(f"Поколение данных {generation_id} отменено")
+
+
+def publish_generation(generation_id):
+    """Атомарная публикация: указатель и статус поколения меняются одной транзакцией"""
+    try:
+        try:
+            _publish(generation_id)
+        except Exception:
+            _abort(generation_id)
+            raise
+    finally:
+        _writer_lock.release()
+
+
+def abort_generation(generation_id):
+    """Отмена поколения: его версии удаляются, закрытые им версии снова действуют
+
+    Отпечатки групп сбрасываются целиком: они могли описывать отмененные
+    данные, а без отпечатков следующее обновление просто сверит статусы.
+    """
+    try:
+        _abort(generation_id)
+    finally:
+        _writer_lock.release()
+
+
+@contextmanager
+def building_generation(timeout=-1):
+    """Поколение, которое публикуется при успешном выходе из блока и отменяется при ошибке"""
+    generation_id = begin_generation(timeout)
+    try:
+        yield generation_id
+    except BaseException:
+        abort_generation(generation_id)
+        raise
+    publish_generation(generation_id)
+
+
+def collect_garbage(keep=GENERATIONS_KEEP):
+    """Удаление версий, которые не видны ни в одном из keep последних опубликованных поколений"""
+    current = current_generation()
+    oldest = db.session.query(DataGeneration.id).filter(
+        DataGeneration.status == 'published', DataGeneration.id <= current
+    ).order_by(DataGeneration.id.desc()).offset(keep - 1).limit(1).scalar()
+    if oldest is None:
+        return 0
+
+    removed = db.session.execute(
+        delete(TennisCourt).where(TennisCourt.valid_to.is_not(None), TennisCourt.valid_to <= oldest)
+    ).rowcount
+    db.session.execute(
+        delete(DataGeneration).where(DataGeneration.id < oldest, DataGeneration.status != 'building')
+    )
+    db.session.commit()
+    if removed:
+        logger.info(f"Удалено устаревших версий слотов: {removed} (старше поколения {oldest})")
+    return removed
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Процесс есть, но принадлежит другому пользователю
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _owner_alive(generation, now, stale_after):
+    """Жив ли процесс, который строит поколение generation"""
+    if generation.owner_pid is None:
+        # Поколение записано до учета владельцев
+        return False
+    if generation.owner_host == socket.gethostname() and os.name == 'posix':
+        if generation.owner_pid == os.getpid():
+            return _writer_lock.locked()
+        return _pid_alive(generation.owner_pid)
+    # Процесс другого хоста не проверить: судим по времени последней записи
+    heartbeat = generation.heartbeat_at or generation.started_at
+    return heartbeat is not None and now - heartbeat < timedelta(seconds=stale_after)
+
+
+def recover_generations(stale_after=GENERATION_STALE_SECONDS):
+    """Отмена поколений, брошенных упавшим процессом (при старте приложения)
+
+    Поколение отменяется, только если его владелец мертв: процесс этого
+    хоста завершился или процесс другого хоста не писал дольше stale_after
+    секунд. Поколения живых процессов (родителя воркера, соседнего
+    веб-воркера) не трогаем.
+    """
+    ensure_pointer()
+    now = datetime.utcnow()
+    stale = [generation.id for generation in DataGeneration.query.filter_by(status='building')
+             if not _owner_alive(generation, now, stale_after)]
+    for generation_id in stale:
+        _abort(generation_id)
+    return stale
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+logger = logging.getLogger('HostGuard')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class TokenBucket:
+    """Ограничение частоты запросов: rate токенов в секунду, запас capacity"""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Резервирование токена; возвращает, сколько секунд подождать"""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class CircuitBreaker:
+    """Размыкатель: после failure_threshold ошибок подряд хост пропускается cooldown секунд
+
+    По истечении cooldown пропускается одна пробная попытка (half-open):
+    успех замыкает цепь, ошибка снова размыкает ее.
+    """
+
+    def __init__(self, failure_threshold=3, cooldown=300, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Можно ли обращаться к хосту сейчас"""
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error) if error else None
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self._probe_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.cooldown - (self.clock() - self.opened_at))
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'retry_in': round(retry_in, 1) if retry_in is not None else None,
+                'last_error': self.last_error
+            }
+
+
+class HostGuard:
+    """Вежливость и устойчивость по хостам: лимит частоты + размыкатель"""
+
+    def __init__(self, rate=2.0, burst=5, failure_threshold=3, cooldown=300):
+        self.rate = rate
+        self.burst = burst
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url):
+        return urlparse(url).hostname or url
+
+    def bucket(self, host):
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def breaker(self, host):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.cooldown)
+            return self._breakers[host]
+
+    def allow(self, host):
+        allowed = self.breaker(host).allow()
+        if not allowed:
+            logger.warning(f"Размыкатель для {host} открыт, источник пропущен")
+        return allowed
+
+    def acquire(self, host):
+        return self.bucket(host).acquire()
+
+    async def acquire_async(self, host):
+        return await self.bucket(host).acquire_async()
+
+    def record_success(self, host):
+        self.breaker(host).record_success()
+
+    def record_failure(self, host, error=None):
+        breaker = self.breaker(host)
+        breaker.record_failure(error)
+        if breaker.state == OPEN:
+            logger.error(f"Размыкатель для {host} открыт на {self.cooldown} с: {error}")
+
+    def snapshot(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.snapshot() for host, breaker in sorted(breakers.items())}
+
+
+_guard = None
+_guard_lock = threading.Lock()
+
+
+def get_host_guard(config=None):
+    """Общий для процесса реестр хостов (создается при первом обращении)"""
+    global _guard
+
+    with _guard_lock:
+        if _guard is None:
+            config = config or {}
+            _guard = HostGuard(
+                rate=config.get('HOST_RATE_LIMIT', 2.0),
+                burst=config.get('HOST_RATE_BURST', 5),
+                failure_threshold=config.get('BREAKER_FAILURE_THRESHOLD', 3),
+                cooldown=config.get('BREAKER_COOLDOWN', 300)
+            )
+        return _guard
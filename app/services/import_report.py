@@ -0,0 +1,67 @@
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+# Модули, которые не должны загружаться веб-воркером, отдающим /data
+HEAVY_MODULES = ('selenium', 'playwright', 'requests', 'dateutil')
+
+DEFAULT_TARGET = 'app.routes'
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(output):
+    """Разбор вывода python -X importtime: [(модуль, собственное мкс, суммарное мкс, глубина)]"""
+    entries = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def measure(target=DEFAULT_TARGET, python=sys.executable):
+    """Импорт target в чистом процессе с -X importtime"""
+    root = Path(__file__).parent.parent.parent
+    result = subprocess.run(
+        [python, '-X', 'importtime', '-c', f'import {target}'],
+        cwd=root, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def summarize(entries, top=15):
+    """Итог замера: общее время, самые тяжелые модули верхнего уровня, тяжелые зависимости"""
+    top_level = [entry for entry in entries if entry[3] == 0]
+    loaded = {module for module, *_ in entries}
+    return {
+        'total_ms': sum(cumulative for _, _, cumulative, _ in top_level) / 1000,
+        'modules': len(entries),
+        'slowest': sorted(entries, key=lambda entry: entry[2], reverse=True)[:top],
+        'heavy_loaded': [name for name in HEAVY_MODULES if name in loaded]
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Отчет о времени импорта (холодный старт воркера)')
+    arg_parser.add_argument('target', nargs='?', default=DEFAULT_TARGET)
+    arg_parser.add_argument('--top', type=int, default=15)
+    args = arg_parser.parse_args(argv)
+
+    summary = summarize(measure(args.target), args.top)
+    print(f"Импорт {args.target}: {summary['total_ms']:.1f} мс, модулей: {summary['modules']}")
+    print(f"{'суммарно, мс':>14}{'свое, мс':>10}  модуль")
+    for module, self_us, cumulative_us, _ in summary['slowest']:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {module}")
+    if summary['heavy_loaded']:
+        print(f"⚠️ Загружены тяжелые зависимости: {', '.join(summary['heavy_loaded'])}")
+    else:
+        print("✅ Тяжелые зависимости парсеров не загружены")
+    return summary
+
+
+if __name__ == '__main__':
+    main()
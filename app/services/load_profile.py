@@ -0,0 +1,158 @@
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+logger = logging.getLogger('LoadProfile')
+
+
+def current_rss_mb():
+    """RSS текущего процесса в МБ (None, если /proc недоступен)"""
+    try:
+        with open('/proc/self/status') as status_file:
+            for line in status_file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def build_app(database, clubs, courts, days, churn, seed):
+    """Приложение, у которого единственный источник - синтетический"""
+    from app import create_app
+
+    return create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}',
+        'SCHEDULER_ENABLED': False,
+        'PARSER_ISOLATION': 'inline',
+        'PARSERS': [{
+            'name': 'synthetic',
+            'path': 'app.parsers.synthetic:SyntheticParser',
+            'options': {'clubs': clubs, 'courts': courts, 'days': days, 'churn': churn, 'seed': seed}
+        }]
+    })
+
+
+def measure_data_endpoint(app):
+    """Время ответа и размер /data"""
+    client = app.test_client()
+    started = time.perf_counter()
+    response = client.get('/data')
+    elapsed = time.perf_counter() - started
+    return {'status': response.status_code, 'time': elapsed, 'rows': len(response.get_json() or []),
+            'bytes': len(response.data)}
+
+
+def run_profile(clubs=300, courts=6, days=14, runs=3, churn=0.05, seed=0, database=None):
+    """Несколько полных обновлений синтетического источника с замером каждой стадии"""
+    from app.services.parser_service import ParserService
+
+    tmp_dir = None
+    if database is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        database = Path(tmp_dir.name) / 'load.db'
+
+    try:
+        app = build_app(database, clubs, courts, days, churn, seed)
+        service = ParserService(app)
+        results = []
+        for run in range(1, runs + 1):
+            started = time.perf_counter()
+            saved = asyncio.run(service.update_all_data(app))
+            elapsed = time.perf_counter() - started
+            stats = service.last_save_stats
+            results.append({
+                'run': run,
+                'records': stats['received'],
+                'saved': saved,
+                'skipped_groups': stats['skipped_groups'],
+                'update_time': elapsed,
+                'write_time': stats['write_time'],
+                'records_per_second': stats['received'] / elapsed if elapsed else 0.0,
+                'rss_mb': current_rss_mb(),
+                'db_mb': os.path.getsize(database) / (1024 * 1024),
+                'data': measure_data_endpoint(app)
+            })
+        return results
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+
+def _synthetic_records(count, churn=0.0, seed=0):
+    """count синтетических записей (6 кортов x 14 дней на клуб)"""
+    from app.parsers.synthetic import SyntheticParser
+
+    per_club = 6 * 14 * 33
+    parser = SyntheticParser(clubs=-(-count // per_club), courts=6, days=14, churn=churn, seed=seed)
+    return parser, asyncio.run(parser.get_courts_data())[:count]
+
+
+def benchmark_writes(sizes=(10_000, 100_000), changed_share=0.05):
+    """Пакетный upsert против поштучной записи: первая загрузка и повтор с изменениями"""
+    from app import db
+    from app.services.storage import save_slots_per_record, upsert_slots
+
+    results = []
+    for size in sizes:
+        parser, records = _synthetic_records(size)
+        parser.churn = changed_share
+        changed = asyncio.run(parser.get_courts_data())[:size]
+        for name, write in (('per_record', save_slots_per_record), ('bulk_upsert', upsert_slots)):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                app = build_app(Path(tmp_dir) / 'writes.db', 1, 1, 1, 0, 0)
+                with app.app_context():
+                    timings = {}
+                    for generation, (phase, data) in enumerate((('initial', records), ('changed', changed)), 1):
+                        started = time.perf_counter()
+                        counts = write(data, generation)
+                        db.session.commit()
+                        timings[phase] = time.perf_counter() - started
+                        timings[f'{phase}_counts'] = counts
+                    db.session.remove()
+                    db.engine.dispose()
+            results.append({'size': size, 'method': name, **timings})
+    return results
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Нагрузочный прогон на синтетических клубах')
+    arg_parser.add_argument('--clubs', type=int, default=300)
+    arg_parser.add_argument('--courts', type=int, default=6)
+    arg_parser.add_argument('--days', type=int, default=14)
+    arg_parser.add_argument('--runs', type=int, default=3)
+    arg_parser.add_argument('--churn', type=float, default=0.05)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--database', help='файл SQLite (по умолчанию временный)')
+    arg_parser.add_argument('--writes', action='store_true',
+                            help='только замер записи в БД: пакетный upsert против поштучной (10k и 100k)')
+    args = arg_parser.parse_args(argv)
+
+    if args.writes:
+        results = benchmark_writes()
+        print(f"{'записей':>9}  {'способ':<13}{'загрузка, с':>13}{'повтор, с':>11}  изменено при повторе")
+        for r in results:
+            counts = r['changed_counts']
+            print(f"{r['size']:>9}  {r['method']:<13}{r['initial']:>13.2f}{r['changed']:>11.2f}  "
+                  f"{counts['updated']} обновлено, {counts['unchanged']} без изменений")
+        return results
+
+    logging.getLogger('ParserService').setLevel(logging.WARNING)
+    results = run_profile(args.clubs, args.courts, args.days, args.runs, args.churn, args.seed, args.database)
+
+    print(f"{'запуск':>6}{'записей':>10}{'записано':>10}{'без изм.':>10}{'всего, с':>10}"
+          f"{'БД, с':>8}{'зап/с':>10}{'RSS, МБ':>9}{'БД, МБ':>8}{'/data, с':>10}{'строк':>9}")
+    for r in results:
+        rss = f"{r['rss_mb']:.0f}" if r['rss_mb'] is not None else '-'
+        print(f"{r['run']:>6}{r['records']:>10}{r['saved']:>10}{r['skipped_groups']:>10}"
+              f"{r['update_time']:>10.2f}{r['write_time']:>8.2f}{r['records_per_second']:>10.0f}"
+              f"{rss:>9}{r['db_mb']:>8.1f}{r['data']['time']:>10.2f}{r['data']['rows']:>9}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
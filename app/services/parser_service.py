@@ -1,10 +1,18 @@
 import asyncio
-from app.parsers.yclients_adv_parser import YClientsAdvParser
-from app.parsers.findsport_parser import FindSportParser
-from app.parsers.tsaritsyno_parser import TsaritsynoParser
-from app.models import TennisCourt
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from app.parsers.registry import ParserRegistry
+from app.services.browser_pool import get_browser_pool
+from app.services.driver_pool import get_driver_pool
+from app.services.host_guard import get_host_guard
+from app.services.process_executor import WorkerParser, get_process_executor
+from app.parsers.retry import RetryBudget
+from app.parsers.records import to_records
+from app.services.fingerprints import group_by_club_date, find_changed_groups, store_fingerprints
+from app.services.generations import building_generation, collect_garbage, touch_generation
+from app.services.storage import upsert_slots
 from app import db
-from datetime import datetime
 import logging
 
 class ParserService:
@@ -13,12 +21,46 @@ class ParserService:
         self.setup_logger()
         self.app = app
         
-        # Список парсеров
-        self.parsers = [
-            YClientsAdvParser(),
-            FindSportParser(),
-            TsaritsynoParser()
-        ]
+        config = app.config if app is not None else {}
+        self.config = config
+        # Дедлайн одного парсера по умолчанию (секунды) и размер пула потоков для Selenium
+        self.parser_timeout = config.get('PARSER_TIMEOUT', 120)
+        self.max_workers = config.get('PARSER_MAX_WORKERS', 4)
+        self.host_guard = get_host_guard(config)
+        # Лимит повторов на весь цикл обновления (общий для всех клубов цикла)
+        self.retry_budget = config.get('RETRY_BUDGET_PER_CYCLE', 20)
+        # Потоковая запись: порций в очереди и записей в одной пачке
+        self.queue_size = config.get('PIPELINE_QUEUE_SIZE', 16)
+        self.batch_size = config.get('PIPELINE_BATCH_SIZE', 500)
+        # Опубликованных поколений данных, которые хранятся для читателей
+        self.generations_keep = config.get('GENERATIONS_KEEP', 2)
+        # Статистика последнего сохранения (записано / пропущено без изменений)
+        self.last_save_stats = None
+        
+        # Парсеры клубов объявлены в PARSERS и импортируются при первом парсинге
+        self.registry = ParserRegistry.from_config(config)
+        # 'process' - каждый парсер в отдельном процессе с лимитами памяти и времени
+        self.process_executor = None
+        self._worker_parsers = None
+        if config.get('PARSER_ISOLATION', 'inline') == 'process':
+            self.process_executor = get_process_executor(config)
+            # Парсеры создаются только в воркерах, здесь - представители объявлений
+            self._worker_parsers = [WorkerParser(spec) for spec in self.registry.specs]
+    
+    @property
+    def parsers(self):
+        """Список парсеров (модули загружаются при первом обращении)
+        
+        В режиме процессов модули парсеров в процессе Flask не импортируются
+        вовсе: возвращаются представители объявлений PARSERS.
+        """
+        if self._worker_parsers is not None and not self.registry.is_overridden:
+            return self._worker_parsers
+        return self.registry.parsers()
+    
+    @parsers.setter
+    def parsers(self, parsers):
+        self.registry.use(parsers)
     
     def setup_logger(self):
         """Настройка логгера"""
@@ -32,30 +74,157 @@ class ParserService:
             self.logger.setLevel(logging.INFO)
     
     async def parse_all_clubs(self):
-        """Асинхронный парсинг данных со всех клубов"""
-        self.logger.info("=== Начало парсинга всех клубов ===")
+        """Асинхронный параллельный парсинг данных со всех клубов
+        
+        Асинхронные парсеры выполняются одновременно в event loop, блокирующие
+        (Selenium) - в ограниченном пуле потоков. У каждого парсера свой дедлайн:
+        зависший клуб отменяется, а данные остальных клубов сохраняются.
+        """
+        self.logger.info("=== Начало параллельного парсинга всех клубов ===")
+        started = time.monotonic()
         all_data = []
         
-        for parser in self.parsers:
-            try:
-                self.logger.info(f"Парсинг клуба: {parser.club_name}")
-                club_data = await parser.get_courts_data()
-                
-                if club_data:
-                    all_data.extend(club_data)
-                    self.logger.info(f"Получено данных от {parser.club_name}: {len(club_data)} записей")
-                else:
-                    self.logger.warning(f"Нет данных от {parser.club_name}")
-            
-            except Exception as e:
-                self.logger.error(f"Ошибка при парсинге {parser.club_name}: {str(e)}")
-                continue
+        # Пулы браузеров и WebDriver создаются с настройками приложения при первом обращении
+        get_browser_pool(self.config)
+        get_driver_pool(self.config)
+        
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='parser')
+        retry_budget = RetryBudget(self.retry_budget)
+        try:
+            results = await asyncio.gather(
+                *(self._run_parser(parser, executor, retry_budget) for parser in self.parsers)
+            )
+        finally:
+            # Не ждем потоки отмененных парсеров - их драйверы уже закрыты
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        self.logger.info(f"=== Парсинг завершен. Всего получено: {len(all_data)} записей ===")
+        for club_data in results:
+            all_data.extend(club_data)
+        
+        elapsed = time.monotonic() - started
+        self.logger.info(f"Использовано повторов за цикл: {retry_budget.spent}")
+        self.logger.info(f"=== Парсинг завершен за {elapsed:.1f} с. Всего получено: {len(all_data)} записей ===")
         return all_data
     
-    def save_to_database(self, data, app=None):
-        """Сохранение данных в базу данных"""
+    async def _run_parser(self, parser, executor, retry_budget=None, sink=None):
+        """Запуск одного парсера с собственным дедлайном
+        
+        Недоступный источник пропускается размыкателем хоста за миллисекунды,
+        вместо того чтобы каждый цикл ждать таймауты загрузки страниц.
+        Если задан sink, порции записей передаются в него по мере готовности,
+        а возвращается пустой список.
+        """
+        timeout = parser.timeout or self.parser_timeout
+        host = parser.host
+        if host and not self.host_guard.allow(host):
+            return []
+        if host:
+            await self.host_guard.acquire_async(host)
+        
+        started = time.monotonic()
+        parser.reset_cancel()
+        parser.last_error = None
+        parser.retry_budget = retry_budget or RetryBudget(self.retry_budget)
+        self.logger.info(f"Парсинг клуба: {parser.club_name} (дедлайн {timeout} с)")
+        
+        try:
+            club_data, count = await asyncio.wait_for(
+                self._collect(parser, executor, sink, timeout), timeout=timeout
+            )
+        
+        except asyncio.TimeoutError:
+            self.logger.error(f"Превышен дедлайн {timeout} с для {parser.club_name}, парсинг отменен")
+            parser.cancel()
+            if isinstance(parser, WorkerParser):
+                self.process_executor.terminate(parser.spec.name)
+            self._record_host_result(host, f"дедлайн {timeout} с")
+            return []
+        
+        except Exception as e:
+            self.logger.error(f"Ошибка при парсинге {parser.club_name}: {str(e)}")
+            self._record_host_result(host, e)
+            return []
+        
+        # Парсеры возвращают запасные данные при ошибке источника, но сообщают о ней
+        self._record_host_result(host, parser.last_error)
+        
+        elapsed = time.monotonic() - started
+        if count:
+            self.logger.info(f"Получено данных от {parser.club_name}: {count} записей за {elapsed:.1f} с")
+            return club_data
+        
+        self.logger.warning(f"Нет данных от {parser.club_name}")
+        return []
+    
+    async def _collect(self, parser, executor, sink=None, timeout=None):
+        """Записи парсера: список целиком или порции в sink; возвращает (записи, количество)"""
+        if isinstance(parser, WorkerParser):
+            return await self._collect_in_process(parser, executor, sink, timeout)
+        
+        if sink is not None and parser.streams:
+            count = 0
+            async for chunk in parser.iter_courts_data():
+                chunk = to_records(chunk)
+                count += len(chunk)
+                await sink(chunk)
+            return [], count
+        
+        if asyncio.iscoroutinefunction(parser.get_courts_data):
+            club_data = await parser.get_courts_data()
+        else:
+            loop = asyncio.get_running_loop()
+            club_data = await loop.run_in_executor(executor, parser.get_courts_data)
+        club_data = to_records(club_data)
+        
+        if sink is None:
+            return club_data, len(club_data)
+        # Непотоковый парсер: отдаем готовый результат порциями по (клуб, дата)
+        for records in group_by_club_date(club_data).values():
+            await sink(records)
+        return [], len(club_data)
+    
+    async def _collect_in_process(self, parser, executor, sink, timeout):
+        """Запуск парсера в процессе-воркере; поток пула ждет воркер и передает порции в sink"""
+        loop = asyncio.get_running_loop()
+        count = 0
+        
+        def on_chunk(chunk):
+            nonlocal count
+            count += len(chunk)
+            if sink is not None:
+                asyncio.run_coroutine_threadsafe(sink(chunk), loop).result()
+        
+        records, parser.last_error = await loop.run_in_executor(
+            executor, self.process_executor.run, parser.spec, on_chunk if sink is not None else None, timeout
+        )
+        return records, count or len(records)
+    
+    def _record_host_result(self, host, error=None):
+        """Учет результата обращения к хосту в размыкателе"""
+        if not host:
+            return
+        if error:
+            self.host_guard.record_failure(host, error)
+        else:
+            self.host_guard.record_success(host)
+    
+    def save_to_database(self, data, app=None, generation=None, source=''):
+        """Сохранение данных источника source в базу данных; возвращает число записанных слотов
+        
+        Без generation запись идет в собственное поколение, которое
+        публикуется сразу после сохранения; затем удаляются версии, не
+        видные ни в одном из generations_keep последних поколений.
+        """
+        stats, _ = self._store(group_by_club_date(data, source), app, generation)
+        return stats['saved']
+    
+    @staticmethod
+    def source_of(parser):
+        """Источник данных парсера: имя из PARSERS (для переданных явно - класс)"""
+        return getattr(parser, 'source', None) or parser.__class__.__name__
+    
+    def _store(self, groups, app=None, generation=None):
+        """Сохранение групп (источник, клуб, дата); возвращает (статистика, изменившиеся группы)"""
         self.logger.info("=== Начало сохранения данных в БД ===")
         
         try:
@@ -65,66 +234,182 @@ class ParserService:
                 app = create_app()
             
             with app.app_context():
-                saved_count = 0
-                for record in data:
-                    try:
-                        # Создаем или обновляем запись
-                        court = TennisCourt(
-                            club_name=record['club_name'],
-                            court_number=record['court_number'],
-                            date=record['date'],
-                            time_slot=record['time_slot'],
-                            status=record['status']
-                        )
-                        
-                        # Проверяем, существует ли уже такая запись
-                        existing = TennisCourt.query.filter_by(
-                            club_name=record['club_name'],
-                            court_number=record['court_number'],
-                            date=record['date'],
-                            time_slot=record['time_slot']
-                        ).first()
-                        
-                        if existing:
-                            # Обновляем существующую запись
-                            existing.status = record['status']
-                            existing.updated_at = datetime.utcnow()
-                            saved_count += 1
-                        else:
-                            # Добавляем новую запись
-                            db.session.add(court)
-                            saved_count += 1
-                    
-                    except Exception as e:
-                        self.logger.error(f"Ошибка при сохранении записи {record}: {str(e)}")
-                        continue
-                
-                db.session.commit()
-                self.logger.info(f"=== Успешно сохранено в БД: {saved_count} записей ===")
-                return saved_count
+                if generation is None:
+                    with building_generation() as own_generation:
+                        result = self._save_batch(groups, own_generation)
+                    collect_garbage(self.generations_keep)
+                    return result
+                return self._save_batch(groups, generation)
             
         except Exception as e:
             db.session.rollback()
             self.logger.error(f"Ошибка при сохранении в БД: {str(e)}")
             raise
     
+    def _save_batch(self, groups, generation):
+        # Пропускаем группы, содержимое которых у источника не изменилось
+        changed = find_changed_groups(groups)
+        skipped_records = sum(len(records) for key, records in groups.items() if key not in changed)
+        
+        # Пакетный upsert: пишутся только новые слоты и слоты с изменившимся статусом
+        counts = upsert_slots([r for key in changed for r in groups[key]], generation)
+        saved_count = counts['inserted'] + counts['updated']
+        
+        store_fingerprints(groups, changed)
+        touch_generation(generation)
+        db.session.commit()
+        
+        stats = {
+            'saved': saved_count,
+            'skipped_groups': len(groups) - len(changed),
+            'skipped_records': skipped_records,
+            'generation': generation,
+            **counts
+        }
+        self.last_save_stats = stats
+        self.logger.info(
+            f"=== Успешно сохранено в БД: {saved_count} записей, "
+            f"без изменений пропущено {len(groups) - len(changed)} (клуб, дата) / {skipped_records} записей ==="
+        )
+        return stats, set(changed)
+    
+    async def refresh_club(self, parser, dates=None, app=None):
+        """Обновление одного источника (для планировщика); возвращает изменившиеся даты"""
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='parser')
+        try:
+            data = await self._run_parser(parser, executor)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        if dates is not None:
+            data = [record for record in data if record['date'] in dates]
+        if not data:
+            return set()
+        
+        # В отдельном потоке: ожидание блокировки писателя не должно останавливать event loop
+        source = self.source_of(parser)
+        _, changed = await asyncio.to_thread(self._store, group_by_club_date(data, source), app or self.app)
+        # Изменения считаются по отпечаткам этого источника (не клуба: у клуба бывает
+        # несколько источников) и только для клуба парсера
+        return {date for group_source, club, date in changed
+                if group_source == source and club == parser.club_name}
+    
+    async def stream_all_clubs(self, app=None):
+        """Параллельный парсинг всех клубов с потоковой записью в БД
+        
+        Парсеры кладут порции записей (полные группы (клуб, дата)) в
+        ограниченную очередь, писатель забирает их пачками и сразу фиксирует.
+        Память ограничена размером очереди. Каждая пачка пишется в свое
+        поколение и публикуется сразу, поэтому данные первого готового клуба
+        видны, пока остальные еще парсятся. Блокировка писателя держится только
+        на время записи пачки. Цена - согласованность на уровне групп (клуб,
+        дата), а не всего цикла: читатель может увидеть один клуб уже
+        обновленным, а другой еще прежним. Ошибка записи отменяет только свою
+        пачку, уже опубликованные остаются.
+        """
+        self.logger.info("=== Начало потокового парсинга всех клубов ===")
+        started = time.monotonic()
+        app = app or self.app
+        if app is None:
+            from app import create_app
+            app = create_app()
+        
+        get_browser_pool(self.config)
+        get_driver_pool(self.config)
+        
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        writer = asyncio.create_task(self._write_batches(queue, app))
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='parser')
+        retry_budget = RetryBudget(self.retry_budget)
+        try:
+            await asyncio.gather(
+                *(self._run_parser(parser, executor, retry_budget, sink=self._source_sink(queue, parser))
+                  for parser in self.parsers)
+            )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            await queue.put(None)
+            stats = await writer
+        
+        self.last_save_stats = stats
+        elapsed = time.monotonic() - started
+        self.logger.info(f"Использовано повторов за цикл: {retry_budget.spent}")
+        self.logger.info(
+            f"=== Потоковое обновление завершено за {elapsed:.1f} с: получено {stats['received']}, "
+            f"сохранено {stats['saved']} записей в {stats['batches']} пачках ==="
+        )
+        return stats['saved']
+    
+    @staticmethod
+    def _in_app(app, func, *args):
+        with app.app_context():
+            return func(*args)
+    
+    def _source_sink(self, queue, parser):
+        """Приемник порций парсера: в очередь писателя вместе с источником"""
+        source = self.source_of(parser)
+        
+        async def sink(chunk):
+            await queue.put((source, chunk))
+        return sink
+    
+    async def _write_batches(self, queue, app):
+        """Писатель: берет из очереди все готовые порции (до batch_size записей) и публикует их
+        
+        Каждая пачка - отдельное поколение (см. _store). При ошибке записи очередь продолжает вычитываться, чтобы парсеры не
+        зависли на полной очереди; ошибка пробрасывается после окончания парсинга.
+        """
+        stats = {'received': 0, 'saved': 0, 'skipped_groups': 0, 'skipped_records': 0, 'batches': 0,
+                 'inserted': 0, 'updated': 0, 'unchanged': 0, 'write_time': 0.0, 'generation': None}
+        error = None
+        finished = False
+        
+        while not finished:
+            groups = defaultdict(list)
+            size = 0
+            item = await queue.get()
+            while item is not None:
+                source, chunk = item
+                for key, records in group_by_club_date(chunk, source).items():
+                    groups[key].extend(records)
+                size += len(chunk)
+                if size >= self.batch_size or queue.empty():
+                    break
+                item = queue.get_nowait()
+            finished = item is None
+            
+            if not groups or error is not None:
+                continue
+            stats['received'] += size
+            write_started = time.monotonic()
+            try:
+                batch_stats, _ = await asyncio.to_thread(self._store, groups, app)
+            except Exception as e:
+                error = e
+                continue
+            stats['write_time'] += time.monotonic() - write_started
+            stats['batches'] += 1
+            stats['generation'] = batch_stats['generation']
+            for key in ('saved', 'skipped_groups', 'skipped_records', 'inserted', 'updated', 'unchanged'):
+                stats[key] += batch_stats[key]
+        
+        if error is not None:
+            raise error
+        return stats
+    
     async def update_all_data(self, app=None):
-        """Полный цикл: парсинг + сохранение"""
+        """Полный цикл: парсинг + сохранение (потоково, по мере готовности клубов)"""
         self.logger.info("=== Запуск полного обновления данных ===")
         
         try:
-            # Получаем данные
-            data = await self.parse_all_clubs()
+            saved_count = await self.stream_all_clubs(app)
             
-            if data:
-                # Сохраняем в БД
-                saved_count = self.save_to_database(data, app)
+            if self.last_save_stats['received']:
                 self.logger.info(f"=== Обновление завершено успешно. Сохранено: {saved_count} записей ===")
-                return saved_count
             else:
                 self.logger.warning("=== Нет данных для сохранения ===")
-                return 0
+            return saved_count
         
         except Exception as e:
             self.logger.error(f"=== Критическая ошибка при обновлении: {str(e)} ===")
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,433 @@
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+from app.parsers.records import SlotRecord, to_records
+
+logger = logging.getLogger('ProcessExecutor')
+
+# Настройки пулов внутри воркера: воркер выполняет один парсер за раз - один браузер
+WORKER_CONFIG = {'BROWSER_POOL_SIZE': 1, 'WEBDRIVER_POOL_SIZE': 1}
+
+# Настройки приложения, которые передаются воркеру (пулы, размыкатели хостов)
+WORKER_CONFIG_KEYS = (
+    'BROWSER_MAX_USES', 'BROWSER_MAX_MEMORY_MB', 'WEBDRIVER_MAX_USES',
+    'HOST_RATE_LIMIT', 'HOST_RATE_BURST', 'BREAKER_FAILURE_THRESHOLD', 'BREAKER_COOLDOWN'
+)
+
+
+class WorkerLimitExceeded(Exception):
+    """Воркер превысил лимит памяти/времени или аварийно завершился"""
+
+
+class WorkerError(Exception):
+    """Парсер в воркере завершился исключением (воркер при этом в пределах лимитов)"""
+
+
+class WorkerParser:
+    """Представитель парсера в родительском процессе
+
+    Описывается только объявлением ParserSpec: модуль парсера импортируется
+    и экземпляр создается лишь внутри воркера. Интерфейс совпадает с тем,
+    что ParserService и планировщик используют у BaseParser.
+    """
+
+    streams = True
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.source = spec.name
+        self.club_name = spec.club_name
+        self.host = spec.host
+        self.timeout = spec.timeout
+        self.last_error = None
+        self.retry_budget = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def class_name(self):
+        return self.spec.class_name
+
+    def cancel(self):
+        self._cancel_event.set()
+        logger.warning(f"Парсинг {self.club_name} отменен")
+
+    @property
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def reset_cancel(self):
+        self._cancel_event.clear()
+
+
+def encode_records(records):
+    """Компактный вид для канала: кортежи SlotRecord.pack"""
+    return [record.pack() for record in to_records(records)]
+
+
+def decode_records(rows):
+    return [SlotRecord.unpack(row) for row in rows]
+
+
+def _worker_main(conn, worker_config):
+    """Точка входа долгоживущего воркера: выполняет задания родителя, пока открыт канал
+
+    Между заданиями живут пул браузеров (в одном event loop), пул WebDriver,
+    кэш пути ChromeDriver, размыкатели хостов и сами экземпляры парсеров.
+    """
+    from app.services.browser_pool import close_browser_pools
+    from app.services.driver_pool import get_driver_pool
+    from app.services.host_guard import get_host_guard
+
+    get_host_guard(worker_config)
+    get_driver_pool(worker_config)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    parsers = {}
+    try:
+        while True:
+            try:
+                command, spec = conn.recv()
+            except EOFError:
+                break
+            if command == 'stop':
+                break
+            try:
+                # Экземпляр парсера переиспользуется, пока объявление не изменилось
+                key = (spec.name, spec.path, repr(sorted(spec.options.items())))
+                parser = parsers.get(key)
+                if parser is None:
+                    parser = parsers[key] = spec.create()
+                parser.reset_cancel()
+                parser.last_error = None
+                if parser.streams or asyncio.iscoroutinefunction(parser.get_courts_data):
+                    loop.run_until_complete(_run_async_parser(parser, conn, worker_config))
+                else:
+                    _send_grouped(conn, parser.get_courts_data())
+            except Exception as e:
+                conn.send(('error', str(e), get_host_guard().snapshot()))
+            else:
+                conn.send(('done', parser.last_error, get_host_guard().snapshot()))
+    finally:
+        get_driver_pool().close()
+        loop.run_until_complete(close_browser_pools())
+        loop.close()
+        conn.close()
+
+
+async def _run_async_parser(parser, conn, worker_config):
+    from app.services.browser_pool import get_browser_pool
+
+    # Пул браузеров event loop воркера создается один раз и остается теплым
+    get_browser_pool(worker_config)
+    if parser.streams:
+        async for chunk in parser.iter_courts_data():
+            conn.send(('chunk', encode_records(chunk)))
+    else:
+        _send_grouped(conn, await parser.get_courts_data())
+
+
+def _send_grouped(conn, records):
+    by_date = {}
+    for record in records or []:
+        by_date.setdefault(record['date'], []).append(record)
+    for chunk in by_date.values():
+        conn.send(('chunk', encode_records(chunk)))
+
+
+def _children_map():
+    """pid -> список дочерних pid по /proc (только Linux)"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat_file:
+                # Имя процесса в скобках может содержать пробелы
+                fields = stat_file.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    return children
+
+
+def process_tree(pid):
+    """pid и все его потомки (браузеры, драйверы)"""
+    if not os.path.isdir('/proc'):
+        return [pid]
+    children = _children_map()
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, ()))
+    return tree
+
+
+def tree_rss_mb(pid):
+    """Суммарный RSS воркера и его потомков в МБ (None, если /proc недоступен)"""
+    return tree_usage(pid)[0]
+
+
+def tree_usage(pid):
+    """(RSS в МБ, процессорное время в секундах) воркера и его потомков
+
+    Время завершившихся потомков входит в cutime/cstime родителя. Без /proc - (None, None).
+    """
+    if not os.path.isdir('/proc'):
+        return None, None
+    ticks = os.sysconf('SC_CLK_TCK')
+    total_kb = 0
+    total_ticks = 0
+    for member in process_tree(pid):
+        try:
+            with open(f'/proc/{member}/stat') as stat_file:
+                fields = stat_file.read().rsplit(')', 1)[1].split()
+            # utime, stime, cutime, cstime
+            total_ticks += sum(int(value) for value in fields[11:15])
+            with open(f'/proc/{member}/status') as status_file:
+                for line in status_file:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024, total_ticks / ticks
+
+
+class _Worker:
+    """Долгоживущий процесс-воркер и канал заданий к нему"""
+
+    def __init__(self, context, worker_config, number):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, worker_config),
+            name=f'scrape-worker-{number}', daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        # Источники, которые уже выполнялись в этом воркере (их парсеры созданы)
+        self.sources = set()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+
+class ProcessScrapeExecutor:
+    """Пул долгоживущих процессов-воркеров для парсеров с лимитами памяти и времени
+
+    Воркер (spawn) выполняет задания по одному и переживает их: теплые
+    браузеры и сессии WebDriver, кэш ChromeDriver, размыкатели хостов и
+    состояние парсеров сохраняются между обновлениями. Задание источника
+    отдается воркеру, который уже выполнял этот источник. Одновременно
+    работает не больше max_workers воркеров. Родитель опрашивает воркер во
+    время задания: при превышении RSS (вместе с браузерами), процессорного
+    времени задания или дедлайна дерево процессов завершается. Воркер
+    пересоздается после max_jobs заданий или если после задания занимает
+    больше recycle_memory_mb.
+    """
+
+    def __init__(self, max_workers=2, memory_limit_mb=2048, cpu_limit=None,
+                 wall_timeout=300, poll_interval=0.25, max_jobs=50, recycle_memory_mb=None,
+                 worker_config=None):
+        self.max_workers = max_workers
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_limit = cpu_limit
+        self.wall_timeout = wall_timeout
+        self.poll_interval = poll_interval
+        self.max_jobs = max_jobs
+        if recycle_memory_mb is None and memory_limit_mb:
+            recycle_memory_mb = memory_limit_mb * 3 // 4
+        self.recycle_memory_mb = recycle_memory_mb
+        self.worker_config = {**(worker_config or {}), **WORKER_CONFIG}
+        self._context = multiprocessing.get_context('spawn')
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._idle = []
+        self._active = {}
+        self._hosts = {}
+        self._started = 0
+        self._lock = threading.Lock()
+
+    def run(self, spec, on_chunk=None, timeout=None):
+        """Запуск парсера spec в воркере; возвращает (записи, ошибка источника)
+
+        Если задан on_chunk, порции передаются в него по мере получения,
+        а список записей остается пустым.
+        """
+        timeout = timeout or self.wall_timeout
+        with self._slots:
+            worker = self._checkout(spec)
+            with self._lock:
+                self._active[spec.name] = worker
+            healthy = False
+            try:
+                worker.conn.send(('run', spec))
+                result = self._collect(spec, worker, on_chunk, time.monotonic() + timeout)
+                healthy = True
+                return result
+            except WorkerError:
+                # Исключение парсера: сам воркер исправен
+                healthy = True
+                raise
+            finally:
+                with self._lock:
+                    self._active.pop(spec.name, None)
+                worker.jobs += 1
+                worker.sources.add(spec.name)
+                self._checkin(worker, healthy)
+
+    def _checkout(self, spec):
+        """Свободный воркер: предпочтительно тот, что уже выполнял источник"""
+        with self._lock:
+            for worker in [w for w in self._idle if not w.process.is_alive()]:
+                self._idle.remove(worker)
+            worker = next((w for w in self._idle if spec.name in w.sources), None)
+            if worker is None and self._idle:
+                worker = self._idle[0]
+            if worker is not None:
+                self._idle.remove(worker)
+                return worker
+            self._started += 1
+            number = self._started
+        logger.info(f"Запуск воркера парсеров #{number}")
+        return _Worker(self._context, self.worker_config, number)
+
+    def _checkin(self, worker, healthy):
+        """Возврат воркера в пул или его пересоздание"""
+        reason = None
+        if not healthy or not worker.process.is_alive():
+            reason = 'сбой'
+        elif self.max_jobs and worker.jobs >= self.max_jobs:
+            reason = f'{worker.jobs} заданий'
+        elif self.recycle_memory_mb:
+            rss, _ = tree_usage(worker.pid)
+            if rss is not None and rss > self.recycle_memory_mb:
+                reason = f'{rss:.0f} МБ > {self.recycle_memory_mb} МБ'
+        if reason is None:
+            with self._lock:
+                self._idle.append(worker)
+            return
+        logger.info(f"Воркер {worker.process.name} пересоздается: {reason}")
+        # Браузеры воркера закрываются в фоне, задание не ждет их завершения
+        threading.Thread(target=self._stop_worker, args=(worker,), daemon=True).start()
+
+    def _stop_worker(self, worker, timeout=10):
+        if worker.process.is_alive():
+            try:
+                worker.conn.send(('stop', None))
+            except OSError:
+                pass
+            worker.process.join(timeout=timeout)
+        if worker.process.is_alive():
+            self._kill(worker.process)
+            worker.process.join(timeout=5)
+        worker.conn.close()
+
+    def _collect(self, spec, worker, on_chunk, deadline):
+        process, receiver = worker.process, worker.conn
+        _, cpu_started = tree_usage(process.pid)
+        records = []
+        while True:
+            if receiver.poll(self.poll_interval):
+                try:
+                    message = receiver.recv()
+                except EOFError:
+                    message = (None, None)
+                kind, payload = message[0], message[1]
+                if kind == 'chunk':
+                    chunk = decode_records(payload)
+                    if on_chunk:
+                        on_chunk(chunk)
+                    else:
+                        records.extend(chunk)
+                    continue
+                if kind in ('done', 'error'):
+                    with self._lock:
+                        self._hosts.update(message[2])
+                if kind == 'done':
+                    return records, payload
+                if kind == 'error':
+                    raise WorkerError(f"Воркер {spec.name}: {payload}")
+                process.join(timeout=1)
+                raise WorkerLimitExceeded(f"Воркер {spec.name} аварийно завершился (код {process.exitcode})")
+
+            if not process.is_alive() and not receiver.poll():
+                raise WorkerLimitExceeded(f"Воркер {spec.name} аварийно завершился (код {process.exitcode})")
+            if time.monotonic() > deadline:
+                self._kill(process)
+                raise WorkerLimitExceeded(f"Воркер {spec.name} превысил дедлайн и был остановлен")
+            rss, cpu = tree_usage(process.pid)
+            if rss is not None and self.memory_limit_mb and rss > self.memory_limit_mb:
+                self._kill(process)
+                raise WorkerLimitExceeded(
+                    f"Воркер {spec.name} превысил лимит памяти: {rss:.0f} МБ > {self.memory_limit_mb} МБ"
+                )
+            if cpu is not None and self.cpu_limit and cpu - cpu_started > self.cpu_limit:
+                self._kill(process)
+                raise WorkerLimitExceeded(
+                    f"Воркер {spec.name} превысил лимит процессорного времени: {cpu - cpu_started:.0f} с"
+                )
+
+    def _kill(self, process):
+        """Завершение воркера вместе с запущенными им браузерами"""
+        for pid in reversed(process_tree(process.pid)):
+            try:
+                os.kill(pid, signal.SIGKILL if hasattr(signal, 'SIGKILL') else signal.SIGTERM)
+            except OSError:
+                continue
+        logger.warning(f"Воркер {process.name} (pid {process.pid}) принудительно завершен")
+
+    def terminate(self, name):
+        """Остановка воркера парсера по имени (при отмене по дедлайну)"""
+        with self._lock:
+            worker = self._active.get(name)
+        if worker is not None and worker.process.is_alive():
+            self._kill(worker.process)
+
+    def host_snapshot(self):
+        """Размыкатели хостов воркеров (по последнему отчету каждого воркера)"""
+        with self._lock:
+            return dict(self._hosts)
+
+    def close(self):
+        """Остановка свободных воркеров (занятые завершатся вместе с процессом)"""
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            self._stop_worker(worker)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_process_executor(config=None):
+    """Общий для процесса пул воркеров (создается при первом обращении)"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            config = config or {}
+            _executor = ProcessScrapeExecutor(
+                max_workers=config.get('WORKER_PROCESSES', 2),
+                memory_limit_mb=config.get('WORKER_MEMORY_LIMIT_MB', 2048),
+                cpu_limit=config.get('WORKER_CPU_LIMIT', 600),
+                wall_timeout=config.get('PARSER_TIMEOUT', 120),
+                max_jobs=config.get('WORKER_MAX_JOBS', 50),
+                recycle_memory_mb=config.get('WORKER_RECYCLE_MEMORY_MB'),
+                worker_config={key: config[key] for key in WORKER_CONFIG_KEYS if key in config}
+            )
+            atexit.register(_executor.close)
+        return _executor
+
+
+def worker_host_snapshot():
+    """Размыкатели хостов из воркеров (пусто, если пул воркеров не создавался)"""
+    return _executor.host_snapshot() if _executor is not None else {}
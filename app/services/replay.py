@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import base64
+import importlib
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+logger = logging.getLogger('ReplayHarness')
+
+DEFAULT_FIXTURES_DIR = Path(__file__).parent.parent.parent / 'fixtures'
+
+# Все каналы, через которые поддерживаемые парсеры общаются с внешним миром:
+# протокол Playwright и HTTP-запросы requests
+IPC_TARGETS = (
+    ('playwright._impl._connection', 'Connection', '_send_message_to_server'),
+    ('requests.sessions', 'Session', 'send'),
+)
+
+
+class Fixture:
+    """Записанный трафик одного парсера (HAR-подобный JSON)"""
+
+    def __init__(self, parser_name, entries=None):
+        self.parser_name = parser_name
+        self.entries = entries or {}
+        self._lock = threading.Lock()
+
+    def add(self, url, status, headers, body, resource_type='other'):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        with self._lock:
+            self.entries[url] = {
+                'url': url,
+                'status': status,
+                'headers': {k: v for k, v in headers.items()
+                            if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')},
+                'resource_type': resource_type,
+                'body': base64.b64encode(body or b'').decode('ascii')
+            }
+
+    def lookup(self, url):
+        """Запись по URL; без точного совпадения - по URL без query"""
+        entry = self.entries.get(url)
+        if entry is None:
+            base = url.split('?', 1)[0]
+            entry = next((e for u, e in self.entries.items() if u.split('?', 1)[0] == base), None)
+        if entry is None:
+            return None
+        return entry['status'], entry['headers'], base64.b64decode(entry['body'])
+
+    @classmethod
+    def path_for(cls, fixtures_dir, parser_name):
+        return Path(fixtures_dir) / f'{parser_name}.json'
+
+    def save(self, fixtures_dir):
+        path = self.path_for(fixtures_dir, self.parser_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as fixture_file:
+            json.dump({'parser': self.parser_name, 'entries': list(self.entries.values())},
+                      fixture_file, ensure_ascii=False, indent=1)
+        logger.info(f"Фикстура сохранена: {path} ({len(self.entries)} записей)")
+        return path
+
+    @classmethod
+    def load(cls, fixtures_dir, parser_name):
+        with open(cls.path_for(fixtures_dir, parser_name), encoding='utf-8') as fixture_file:
+            payload = json.load(fixture_file)
+        return cls(parser_name, {entry['url']: entry for entry in payload['entries']})
+
+
+class ReplayServer:
+    """Локальный сервер, отдающий записанные ответы
+
+    Оригинальный URL https://host/path?q превращается в
+    http://127.0.0.1:port/https/host/path?q.
+    """
+
+    def __init__(self, fixture):
+        self.fixture = fixture
+        self._server = None
+
+    def start(self):
+        fixture = self.fixture
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                scheme, _, rest = self.path.lstrip('/').partition('/')
+                found = fixture.lookup(f'{scheme}://{rest}')
+                if found is None:
+                    self.send_error(404, 'Нет в фикстуре')
+                    return
+                status, headers, body = found
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def url_for(self, url):
+        parts = urlsplit(url)
+        rewritten = f'http://127.0.0.1:{self._server.server_port}/{parts.scheme}/{parts.netloc}{parts.path}'
+        return f'{rewritten}?{parts.query}' if parts.query else rewritten
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class ScrapeHarness:
+    """Подключение записи/воспроизведения к парсеру через BaseParser.harness
+
+    mode='record' - реальный трафик пишется в фикстуру,
+    mode='replay' - парсер работает только с локальными данными.
+
+    Поддерживаются парсеры на Playwright (перехват всех запросов контекста)
+    и на HTTP API (базовый URL клиента ведет на локальный сервер). Selenium-
+    парсеры не поддерживаются: подменить можно только адрес документа, а
+    подресурсы и XHR страницы все равно уходили бы в живую сеть.
+    """
+
+    def __init__(self, mode, fixtures_dir=DEFAULT_FIXTURES_DIR):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Неизвестный режим: {mode}")
+        self.mode = mode
+        self.fixtures_dir = Path(fixtures_dir)
+        self.fixture = None
+        self.server = None
+
+    def prepare(self, parser):
+        """Настройка парсера перед запуском"""
+        name = parser.__class__.__name__
+        if hasattr(parser, 'setup_driver'):
+            raise ValueError(f"{name}: запись и воспроизведение Selenium-парсеров не поддерживаются")
+        if self.mode == 'replay':
+            self.fixture = Fixture.load(self.fixtures_dir, name)
+            self.server = ReplayServer(self.fixture).start()
+            # Playwright перехватывается в attach_context, HTTP API - через базовый URL клиента
+            client = getattr(parser, 'client', None)
+            if client is not None:
+                client.api_base = self.server.url_for(client.api_base)
+        else:
+            self.fixture = Fixture(name)
+            client = getattr(parser, 'client', None)
+            if client is not None:
+                import requests
+                session = requests.Session()
+                session.hooks['response'].append(self._record_http_response)
+                client.session = session
+        parser.harness = self
+        return parser
+
+    def finish(self):
+        """Сохранение фикстуры (record) или остановка сервера (replay)"""
+        if self.mode == 'record' and self.fixture is not None:
+            self.fixture.save(self.fixtures_dir)
+        if self.server:
+            self.server.stop()
+
+    async def attach_context(self, context):
+        """Playwright: запись ответов или их подмена из фикстуры"""
+        if self.mode == 'record':
+            context.on('response', lambda response: asyncio.ensure_future(self._record_response(response)))
+            return
+
+        async def fulfill(route):
+            found = self.fixture.lookup(route.request.url)
+            if found is None:
+                await route.abort()
+                return
+            status, headers, body = found
+            await route.fulfill(status=status, headers=headers, body=body)
+
+        await context.route('**/*', fulfill)
+
+    async def _record_response(self, response):
+        try:
+            body = await response.body()
+        except Exception:
+            return
+        self.fixture.add(response.url, response.status, await response.all_headers(), body,
+                         resource_type=response.request.resource_type)
+
+    def _record_http_response(self, response, *args, **kwargs):
+        self.fixture.add(response.url, response.status_code, dict(response.headers), response.content,
+                         resource_type='xhr')
+
+
+class IpcCounter:
+    """Подсчет обращений к браузеру и сети на время замера"""
+
+    def __init__(self):
+        self.count = 0
+        self._patched = []
+
+    def __enter__(self):
+        for module_name, class_name, method_name in IPC_TARGETS:
+            try:
+                cls = getattr(importlib.import_module(module_name), class_name)
+                original = getattr(cls, method_name)
+            except (ImportError, AttributeError):
+                continue
+            setattr(cls, method_name, self._counting(original))
+            self._patched.append((cls, method_name, original))
+        return self
+
+    def _counting(self, original):
+        counter = self
+
+        def wrapper(*args, **kwargs):
+            counter.count += 1
+            return original(*args, **kwargs)
+        return wrapper
+
+    def __exit__(self, *exc_info):
+        for cls, method_name, original in self._patched:
+            setattr(cls, method_name, original)
+        self._patched = []
+
+
+async def benchmark_parser(parser, mode=None, fixtures_dir=DEFAULT_FIXTURES_DIR):
+    """Замер одного парсера: время, IPC-вызовы, записи в секунду"""
+    harness = ScrapeHarness(mode, fixtures_dir) if mode else None
+    if harness:
+        harness.prepare(parser)
+
+    try:
+        with IpcCounter() as counter:
+            started = time.perf_counter()
+            if asyncio.iscoroutinefunction(parser.get_courts_data):
+                data = await parser.get_courts_data()
+            else:
+                data = await asyncio.to_thread(parser.get_courts_data)
+            elapsed = time.perf_counter() - started
+    finally:
+        if harness:
+            harness.finish()
+
+    return {
+        'parser': parser.__class__.__name__,
+        'records': len(data or []),
+        'wall_time': elapsed,
+        'ipc_calls': counter.count,
+        'records_per_second': len(data or []) / elapsed if elapsed else 0.0,
+        'wait_time': sum(seconds for _, seconds, _ in parser.wait_timings)
+    }
+
+
+def _default_parsers():
+    # Только парсеры, которые воспроизводятся без живой сети (см. ScrapeHarness)
+    from app.parsers.yclients_adv_parser import YClientsAdvParser
+    from app.parsers.yclients_api_parser import YClientsApiParser
+    return [YClientsAdvParser(), YClientsApiParser()]
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Запись/воспроизведение и замер парсеров')
+    arg_parser.add_argument('--mode', choices=('live', 'record', 'replay'), default='replay')
+    arg_parser.add_argument('--fixtures', default=str(DEFAULT_FIXTURES_DIR))
+    arg_parser.add_argument('--parser', action='append', help='имя класса парсера (по умолчанию все)')
+    args = arg_parser.parse_args(argv)
+
+    parsers = [p for p in _default_parsers()
+               if not args.parser or p.__class__.__name__ in args.parser]
+    mode = None if args.mode == 'live' else args.mode
+
+    async def run_all():
+        return [await benchmark_parser(parser, mode, args.fixtures) for parser in parsers]
+
+    results = asyncio.run(run_all())
+    print(f"{'Парсер':<22}{'записей':>9}{'время, с':>10}{'IPC':>8}{'зап/с':>10}{'ожид., с':>10}")
+    for r in results:
+        print(f"{r['parser']:<22}{r['records']:>9}{r['wall_time']:>10.2f}{r['ipc_calls']:>8}"
+              f"{r['records_per_second']:>10.1f}{r['wait_time']:>10.2f}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
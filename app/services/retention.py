@@ -0,0 +1,200 @@
+import csv
+import gzip
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import delete
+
+from app import db
+from app.models import ScrapeFingerprint, TennisCourt
+
+logger = logging.getLogger('Retention')
+
+ARCHIVE_COLUMNS = ('club_name', 'court_number', 'date', 'time_slot', 'status', 'valid_from', 'valid_to',
+                   'created_at', 'updated_at')
+
+
+class RetentionWorker:
+    """Фоновое обслуживание базы: удаление прошедших слотов и сжатие файла
+
+    Слоты с датой старше retention_days дней удаляются пачками по
+    batch_size строк, каждая пачка - своя короткая транзакция, поэтому
+    обновление данных и веб-запросы ждут не дольше одной пачки. При
+    заданном archive_dir удаляемые строки дописываются в CSV (gzip) по
+    месяцам. После удаления свободные страницы возвращаются
+    incremental_vacuum, статистика планировщика обновляется ANALYZE.
+    """
+
+    def __init__(self, app, retention_days=7, batch_size=2000, batch_pause=0.05, interval=3600,
+                 vacuum_pages=2000, analysis_limit=1000, archive_dir=None):
+        self.app = app
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.interval = interval
+        self.vacuum_pages = vacuum_pages
+        self.analysis_limit = analysis_limit
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = None
+        self.last_stats = None
+        self.sizes = None
+
+    def cutoff(self, today=None):
+        return (today or datetime.now().date()) - timedelta(days=self.retention_days)
+
+    def purge(self, today=None):
+        """Удаление слотов и отпечатков с датой раньше cutoff пачками"""
+        cutoff = self.cutoff(today)
+        stats = {'cutoff': cutoff.isoformat(), 'deleted': 0, 'archived': 0, 'batches': 0, 'fingerprints': 0}
+
+        while not self._stop.is_set():
+            # Отбор по date идет по индексу листинга
+            rows = TennisCourt.query.filter(TennisCourt.date < cutoff).limit(self.batch_size).all()
+            if not rows:
+                break
+            if self.archive_dir is not None:
+                stats['archived'] += self._archive(rows)
+            db.session.execute(delete(TennisCourt).where(TennisCourt.id.in_([row.id for row in rows])))
+            db.session.commit()
+            stats['deleted'] += len(rows)
+            stats['batches'] += 1
+            if len(rows) < self.batch_size:
+                break
+            # Пауза между пачками пропускает писателя обновления
+            time.sleep(self.batch_pause)
+
+        stats['fingerprints'] = db.session.execute(
+            delete(ScrapeFingerprint).where(ScrapeFingerprint.date < cutoff)
+        ).rowcount
+        db.session.commit()
+        if stats['deleted']:
+            logger.info(f"Удалено прошедших слотов: {stats['deleted']} (до {cutoff}), пачек: {stats['batches']}")
+        return stats
+
+    def _archive(self, rows):
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(row.date.strftime('%Y-%m'), []).append(row)
+        for month, month_rows in by_month.items():
+            path = self.archive_dir / f"tennis_court-{month}.csv.gz"
+            is_new = not path.exists()
+            # Каждая дозапись - отдельный член gzip, файл читается целиком
+            with gzip.open(path, 'at', encoding='utf-8', newline='') as archive_file:
+                writer = csv.writer(archive_file)
+                if is_new:
+                    writer.writerow(ARCHIVE_COLUMNS)
+                writer.writerows([getattr(row, column) for column in ARCHIVE_COLUMNS] for row in month_rows)
+        return len(rows)
+
+    def compact(self):
+        """incremental_vacuum и ANALYZE с ограничением на число просматриваемых строк (SQLite)"""
+        engine = db.engine
+        if engine.dialect.name != 'sqlite':
+            return {}
+        stats = {}
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            if connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+                # База создана до auto_vacuum=INCREMENTAL: режим применяется только полным VACUUM, один раз
+                connection.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+                connection.exec_driver_sql("VACUUM")
+                stats['vacuum'] = 'full'
+                logger.info("База переведена в режим auto_vacuum=INCREMENTAL")
+            free_before = connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+            # sqlite3.execute делает один шаг оператора, а incremental_vacuum освобождает
+            # по странице на шаг; executescript выполняет его до конца
+            connection.connection.driver_connection.executescript(
+                f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})"
+            )
+            stats['freed_pages'] = free_before - connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+            connection.exec_driver_sql(f"PRAGMA analysis_limit={int(self.analysis_limit)}")
+            connection.exec_driver_sql("ANALYZE")
+        return stats
+
+    def run_once(self, today=None):
+        """Один проход обслуживания (в контексте приложения)"""
+        from app.services.storage import storage_sizes
+
+        started = time.monotonic()
+        stats = self.purge(today)
+        stats.update(self.compact())
+        sizes = storage_sizes()
+        stats['duration'] = round(time.monotonic() - started, 3)
+        with self._lock:
+            self.last_run = datetime.now()
+            self.last_stats = stats
+            self.sizes = sizes
+        return stats
+
+    def start(self, tick=None):
+        """Запуск фонового потока: первый проход сразу, затем раз в interval секунд"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    with self.app.app_context():
+                        self.run_once()
+                except Exception as e:
+                    logger.error(f"Ошибка обслуживания базы: {str(e)}")
+                if self._stop.wait(tick or self.interval):
+                    break
+
+        self._thread = threading.Thread(target=loop, name='retention', daemon=True)
+        self._thread.start()
+        logger.info(f"Обслуживание базы запущено (хранение {self.retention_days} дн., раз в {self.interval} с)")
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        """Последний проход и размеры таблиц и индексов для /status"""
+        with self._lock:
+            return {
+                'last_run': self.last_run.isoformat() if self.last_run else None,
+                'retention_days': self.retention_days,
+                'last_stats': self.last_stats,
+                'sizes': self.sizes
+            }
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_retention(app):
+    """Запуск общего для процесса обслуживания базы, если оно включено в конфигурации"""
+    global _worker
+
+    if not app.config.get('RETENTION_ENABLED', False):
+        return None
+    # С отладочным перезагрузчиком Flask запускаем только в рабочем процессе
+    if app.config.get('DEBUG') and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return None
+
+    with _worker_lock:
+        if _worker is None:
+            _worker = RetentionWorker(
+                app,
+                retention_days=app.config.get('RETENTION_DAYS', 7),
+                batch_size=app.config.get('RETENTION_BATCH_SIZE', 2000),
+                interval=app.config.get('MAINTENANCE_INTERVAL', 3600),
+                vacuum_pages=app.config.get('VACUUM_PAGES', 2000),
+                archive_dir=app.config.get('RETENTION_ARCHIVE_DIR')
+            )
+            _worker.start()
+        return _worker
+
+
+def get_retention():
+    return _worker
@@ -0,0 +1,216 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger('RefreshScheduler')
+
+DEFAULT_STATE_PATH = Path(__file__).parent.parent.parent / 'instance' / 'schedule.json'
+
+# Вес интервала по удаленности даты: сегодня обновляем чаще, чем через два дня
+PROXIMITY_WEIGHTS = (1.0, 2.0, 3.0)
+
+# Сглаживание частоты изменений (EWMA)
+CHANGE_RATE_ALPHA = 0.3
+
+
+class RefreshScheduler:
+    """Планировщик обновления клубов с адаптивными интервалами
+
+    Для каждой пары (парсер, смещение даты) хранится свой интервал. Он
+    сокращается, если данные этой даты часто меняются, и растет для
+    стабильных и далеких дат. Одновременно обновляется не больше
+    max_concurrent клубов, расписание сохраняется в state_path.
+    """
+
+    def __init__(self, app, service=None, base_interval=900, min_interval=120,
+                 max_interval=3600, jitter=0.1, max_concurrent=2, days=3,
+                 state_path=DEFAULT_STATE_PATH):
+        from app.services.parser_service import ParserService
+
+        self.app = app
+        self.service = service or ParserService(app)
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.max_concurrent = max_concurrent
+        self.days = days
+        self.state_path = Path(state_path)
+
+        self._lock = threading.Lock()
+        self._running = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+        self.state = self._load_state()
+
+    @staticmethod
+    def parser_key(parser):
+        # Имя клуба не уникально (FindSport и сайт клуба - один клуб), поэтому ключ - источник
+        # из PARSERS (у парсеров, переданных явно, - класс)
+        return getattr(parser, 'source', None) or parser.__class__.__name__
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding='utf-8') as state_file:
+                return json.load(state_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_suffix('.tmp')
+            with self._lock:
+                payload = json.dumps(self.state, ensure_ascii=False, indent=2)
+            tmp_path.write_text(payload, encoding='utf-8')
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить расписание: {str(e)}")
+
+    def _entry(self, key, day_offset):
+        """Запись расписания (создается с немедленным запуском)"""
+        entries = self.state.setdefault(key, {})
+        return entries.setdefault(str(day_offset), {
+            'next_run': 0,
+            'interval': self.base_interval,
+            'change_rate': 0.5,
+            'last_run': None
+        })
+
+    def compute_interval(self, day_offset, change_rate):
+        """Интервал с учетом удаленности даты и частоты изменений, со случайным разбросом"""
+        weight = PROXIMITY_WEIGHTS[min(day_offset, len(PROXIMITY_WEIGHTS) - 1)]
+        interval = self.base_interval * weight / (0.25 + change_rate)
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def due_offsets(self, parser, now=None):
+        """Смещения дат парсера, которые пора обновить"""
+        now = now or time.time()
+        key = self.parser_key(parser)
+        with self._lock:
+            return [offset for offset in range(self.days)
+                    if self._entry(key, offset)['next_run'] <= now]
+
+    def run_pending(self, now=None):
+        """Запуск всех наступивших обновлений; возвращает список запущенных ключей"""
+        started = []
+        for parser in self.service.parsers:
+            key = self.parser_key(parser)
+            offsets = self.due_offsets(parser, now)
+            with self._lock:
+                if not offsets or key in self._running:
+                    continue
+                self._running.add(key)
+            self._executor.submit(self._refresh, parser, offsets)
+            started.append(key)
+        return started
+
+    def _refresh(self, parser, offsets):
+        """Обновление одного клуба по наступившим датам"""
+        from app.services.async_runner import run_async
+
+        key = self.parser_key(parser)
+        today = datetime.now().date()
+        dates = {today + timedelta(days=offset): offset for offset in offsets}
+        try:
+            changed_dates = run_async(self.service.refresh_club(parser, set(dates), self.app))
+            self.record_result(key, offsets, {dates[d] for d in changed_dates if d in dates})
+        except Exception as e:
+            logger.error(f"Ошибка планового обновления {key}: {str(e)}")
+            self.record_result(key, offsets, set())
+        finally:
+            with self._lock:
+                self._running.discard(key)
+            self._save_state()
+
+    def record_result(self, key, offsets, changed_offsets, now=None):
+        """Обновление частоты изменений и следующего запуска"""
+        now = now or time.time()
+        with self._lock:
+            for offset in offsets:
+                entry = self._entry(key, offset)
+                observed = 1.0 if offset in changed_offsets else 0.0
+                entry['change_rate'] = (1 - CHANGE_RATE_ALPHA) * entry['change_rate'] + CHANGE_RATE_ALPHA * observed
+                entry['interval'] = self.compute_interval(offset, entry['change_rate'])
+                entry['next_run'] = now + entry['interval']
+                entry['last_run'] = now
+        logger.info(f"Плановое обновление {key}: даты {offsets}, изменились {sorted(changed_offsets)}")
+
+    def start(self, tick=5):
+        """Запуск фонового потока планировщика"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix='refresh')
+
+        def loop():
+            while not self._stop.wait(tick):
+                try:
+                    self.run_pending()
+                except Exception as e:
+                    logger.error(f"Ошибка планировщика: {str(e)}")
+
+        self._thread = threading.Thread(target=loop, name='refresh-scheduler', daemon=True)
+        self._thread.start()
+        logger.info(f"Планировщик запущен (клубов: {len(self.service.registry.names)}, параллельно: {self.max_concurrent})")
+
+    def stop(self):
+        self._stop.set()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._save_state()
+
+    def snapshot(self):
+        """Состояние расписания для /status"""
+        with self._lock:
+            return {
+                key: {
+                    offset: {
+                        'next_run': datetime.fromtimestamp(entry['next_run']).isoformat() if entry['next_run'] else None,
+                        'interval': round(entry['interval']),
+                        'change_rate': round(entry['change_rate'], 3)
+                    }
+                    for offset, entry in entries.items()
+                }
+                for key, entries in self.state.items()
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_scheduler(app):
+    """Запуск общего для процесса планировщика, если он включен в конфигурации"""
+    global _scheduler
+
+    if not app.config.get('SCHEDULER_ENABLED', False):
+        return None
+    # С отладочным перезагрузчиком Flask запускаем только в рабочем процессе
+    if app.config.get('DEBUG') and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return None
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RefreshScheduler(
+                app,
+                base_interval=app.config.get('SCHEDULER_BASE_INTERVAL', 900),
+                min_interval=app.config.get('SCHEDULER_MIN_INTERVAL', 120),
+                max_interval=app.config.get('SCHEDULER_MAX_INTERVAL', 3600),
+                jitter=app.config.get('SCHEDULER_JITTER', 0.1),
+                max_concurrent=app.config.get('SCHEDULER_MAX_CONCURRENT', 2)
+            )
+            _scheduler.start()
+        return _scheduler
+
+
+def get_scheduler():
+    return _scheduler
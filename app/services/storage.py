@@ -0,0 +1,457 @@
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, create_engine, event, inspect, or_, text, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import DataGeneration, ScrapeFingerprint, TennisCourt
+
+logger = logging.getLogger('Storage')
+
+# Идентичность слота; уникален вместе с поколением версии (valid_from)
+SLOT_KEY = ('club_name', 'court_number', 'date', 'time_slot')
+VERSION_KEY = SLOT_KEY + ('valid_from',)
+SLOT_KEY_INDEX = 'uq_tennis_court_slot'
+
+# Настройки соединений SQLite по умолчанию (переопределяются SQLITE_PRAGMAS в конфиге)
+DEFAULT_PRAGMAS = {
+    # До journal_mode: переход в WAL записывает заголовок файла, после чего
+    # auto_vacuum новой базы меняется только полным VACUUM
+    'auto_vacuum': 'incremental',  # свободные страницы возвращаются по incremental_vacuum
+    'journal_mode': 'wal',  # читатели не ждут писателя, писатель - читателей
+    'synchronous': 'normal',  # в режиме WAL fsync только при checkpoint
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -32 * 1024,  # в КиБ (отрицательное значение)
+    'busy_timeout': 10000,  # мс ожидания блокировки вместо немедленной ошибки
+    'temp_store': 'memory'
+}
+
+# Хранятся в файле базы и выставляются только писателем
+WRITER_PRAGMAS = ('journal_mode', 'auto_vacuum')
+
+# Таблицы, индексы которых приводятся к объявленным в моделях
+MANAGED_TABLES = (TennisCourt.__table__,)
+
+# Таблицы, в которые новые столбцы (допускающие NULL) добавляются при старте
+EXTENDED_TABLES = (DataGeneration.__table__,)
+
+# Столбцы листинга: порядок совпадает с индексом ix_tennis_court_listing
+LISTING_COLUMNS = (TennisCourt.date, TennisCourt.time_slot, TennisCourt.club_name,
+                   TennisCourt.court_number, TennisCourt.status)
+
+# Записей в одном INSERT ... ON CONFLICT (8 параметров на запись, лимит SQLite - 32766)
+UPSERT_CHUNK_SIZE = 500
+
+
+def is_sqlite_file(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def writer_engine_options(config):
+    """Параметры движка Flask-SQLAlchemy - единственного писателя (обновление данных)
+
+    Писатель в SQLite все равно один, поэтому пул маленький: лишние
+    соединения ждут в пуле, а не на блокировке базы.
+    """
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if is_sqlite_file(config['SQLALCHEMY_DATABASE_URI']):
+        options.setdefault('pool_size', config.get('DB_WRITER_POOL_SIZE', 1))
+        options.setdefault('max_overflow', config.get('DB_WRITER_MAX_OVERFLOW', 2))
+        options.setdefault('pool_timeout', config.get('DB_WRITER_POOL_TIMEOUT', 60))
+    return options
+
+
+def install_pragmas(engine, pragmas, read_only=False):
+    """PRAGMA на каждом новом соединении SQLite
+
+    Режим журнала и auto_vacuum хранятся в самом файле базы и выставляются
+    писателем; соединения читателей дополнительно запрещают запись (query_only).
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                if read_only and name in WRITER_PRAGMAS:
+                    continue
+                cursor.execute(f"PRAGMA {name}={value}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+    event.listen(engine, 'connect', on_connect)
+
+
+def init_storage(app):
+    """Настройка соединений писателя и пула читателей для веб-запросов (в контексте приложения)"""
+    pragmas = {**DEFAULT_PRAGMAS, **app.config.get('SQLITE_PRAGMAS', {})}
+    install_pragmas(db.engine, pragmas)
+
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if is_sqlite_file(uri) or not uri.startswith('sqlite'):
+        reader = create_engine(
+            uri,
+            pool_size=app.config.get('DB_READER_POOL_SIZE', 4),
+            max_overflow=app.config.get('DB_READER_MAX_OVERFLOW', 4),
+            **({'connect_args': {'check_same_thread': False}} if uri.startswith('sqlite') else {})
+        )
+        install_pragmas(reader, pragmas, read_only=True)
+    else:
+        # База в памяти существует только внутри соединения писателя
+        reader = db.engine
+    app.extensions['storage_reader'] = reader
+    return reader
+
+
+def reader_engine(app=None):
+    app = app or current_app
+    return app.extensions.get('storage_reader') or db.engine
+
+
+@contextmanager
+def read_session(app=None):
+    """Сессия только для чтения на пуле читателей: не ждет транзакцию обновления"""
+    session = Session(reader_engine(app))
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _slot_table_is_current(engine):
+    inspector = inspect(engine)
+    columns = {column['name'] for column in inspector.get_columns('tennis_court')}
+    keys = [tuple(c['column_names']) for c in inspector.get_unique_constraints('tennis_court')]
+    keys += [tuple(i['column_names']) for i in inspector.get_indexes('tennis_court') if i.get('unique')]
+    return 'valid_to' in columns and VERSION_KEY in keys
+
+
+def ensure_slot_table():
+    """Пересборка tennis_court для баз, созданных до ключа слота и версий строк
+
+    Ограничения существующей таблицы SQLite не меняет, поэтому таблица
+    переименовывается и создается заново по модели. Переносится самая
+    свежая строка каждого слота, она становится версией поколения 0.
+    """
+    engine = db.engine
+    if _slot_table_is_current(engine):
+        return False
+
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE tennis_court RENAME TO tennis_court_legacy"))
+        # Имена индексов общие для базы: старые индексы мешают создать новые
+        legacy = inspect(connection)
+        for index in legacy.get_indexes('tennis_court_legacy'):
+            connection.execute(text(f"DROP INDEX IF EXISTS {index['name']}"))
+        if engine.dialect.name != 'sqlite':
+            for constraint in legacy.get_unique_constraints('tennis_court_legacy'):
+                connection.execute(text(f"ALTER TABLE tennis_court_legacy DROP CONSTRAINT {constraint['name']}"))
+
+        TennisCourt.__table__.create(connection)
+        total = connection.execute(text("SELECT COUNT(*) FROM tennis_court_legacy")).scalar()
+        copied = connection.execute(text(
+            "INSERT INTO tennis_court"
+            " (club_name, court_number, date, time_slot, status, created_at, updated_at, valid_from)"
+            " SELECT club_name, court_number, date, time_slot, status, created_at, updated_at, 0"
+            " FROM tennis_court_legacy WHERE id IN ("
+            "  SELECT MAX(id) FROM tennis_court_legacy"
+            "  GROUP BY club_name, court_number, date, time_slot)"
+        )).rowcount
+        connection.execute(text("DROP TABLE tennis_court_legacy"))
+    logger.info(f"Таблица слотов пересобрана: перенесено {copied}, удалено дубликатов: {total - copied}")
+    return True
+
+
+def ensure_indexes():
+    """Индексы существующих таблиц по объявлению в моделях
+
+    create_all создает индексы только вместе с новой таблицей. Недостающие
+    индексы создаются, индексы с тем же именем, но другими столбцами,
+    пересоздаются, а ix_-индексы, которых больше нет в модели, удаляются.
+    Возвращает имена измененных индексов.
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    changed = []
+    for table in MANAGED_TABLES:
+        existing = {
+            index['name']: (tuple(index['column_names']), bool(index.get('unique')))
+            for index in inspector.get_indexes(table.name)
+        }
+        declared = {index.name for index in table.indexes}
+
+        for name in sorted(set(existing) - declared):
+            if name.startswith('ix_'):
+                with engine.begin() as connection:
+                    connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+                changed.append(name)
+
+        for index in sorted(table.indexes, key=lambda item: item.name):
+            wanted = (tuple(column.name for column in index.columns), bool(index.unique))
+            current = existing.get(index.name)
+            if current == wanted:
+                continue
+            if current is not None:
+                index.drop(engine)
+            index.create(engine)
+            changed.append(index.name)
+
+    if changed:
+        logger.info(f"Индексы приведены к модели: {', '.join(changed)}")
+    return changed
+
+
+def ensure_fingerprint_table():
+    """Таблица отпечатков с источником в ключе
+
+    Отпечатки - только кэш для пропуска неизменившихся групп: таблица без
+    столбца source пересоздается пустой, следующее обновление сверит статусы.
+    """
+    engine = db.engine
+    table = ScrapeFingerprint.__table__
+    columns = {column['name'] for column in inspect(engine).get_columns(table.name)}
+    if 'source' in columns:
+        return False
+    table.drop(engine)
+    table.create(engine)
+    logger.info("Таблица отпечатков пересоздана с ключом (источник, клуб, дата)")
+    return True
+
+
+def ensure_columns():
+    """Недостающие столбцы таблиц EXTENDED_TABLES (ALTER TABLE ADD COLUMN)
+
+    create_all не меняет существующие таблицы. Добавляются только столбцы,
+    допускающие NULL: старые строки получают NULL. Возвращает имена столбцов.
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    added = []
+    for table in EXTENDED_TABLES:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as connection:
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            added.append(f'{table.name}.{column.name}')
+
+    if added:
+        logger.info(f"Добавлены столбцы: {', '.join(added)}")
+    return added
+
+
+def migrate_schema():
+    """Доводка схемы существующей базы при старте приложения"""
+    ensure_slot_table()
+    ensure_fingerprint_table()
+    ensure_columns()
+    ensure_indexes()
+
+
+def visible_in(generation):
+    """Условие: версия строки действует в поколении generation"""
+    return and_(
+        TennisCourt.valid_from <= generation,
+        or_(TennisCourt.valid_to.is_(None), TennisCourt.valid_to > generation)
+    )
+
+
+def upcoming_slots(generation, today=None, session=None):
+    """Актуальные слоты поколения generation: только нужные столбцы, в порядке индекса листинга"""
+    today = today or datetime.now().date()
+    return (session or db.session).query(*LISTING_COLUMNS).filter(
+        TennisCourt.date >= today,
+        visible_in(generation)
+    ).order_by(*LISTING_COLUMNS[:4])
+
+
+def database_size(session=None):
+    """Размер файла SQLite и свободное место в нем (байты) - дешево, по PRAGMA"""
+    session = session or db.session
+    if session.get_bind().dialect.name != 'sqlite':
+        return None
+    pragma = lambda name: session.execute(text(f"PRAGMA {name}")).scalar()
+    page_size = pragma('page_size')
+    return {'bytes': pragma('page_count') * page_size, 'free_bytes': pragma('freelist_count') * page_size}
+
+
+def storage_sizes():
+    """Размеры файла, таблиц и индексов в байтах
+
+    Таблицы и индексы считаются по виртуальной таблице dbstat, это полный
+    проход по файлу: вызывается из фонового обслуживания, а не из запросов.
+    """
+    sizes = database_size()
+    if sizes is None:
+        return None
+    try:
+        rows = db.session.execute(text(
+            "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY SUM(pgsize) DESC"
+        ))
+        sizes['objects'] = {name: size for name, size in rows}
+    except OperationalError:
+        # SQLite собран без SQLITE_ENABLE_DBSTAT_VTAB
+        db.session.rollback()
+    return sizes
+
+
+def query_plan(query):
+    """Строки EXPLAIN QUERY PLAN (SQLite) для запроса ORM"""
+    statement = getattr(query, 'statement', query)
+    sql = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    return [row[-1] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def _insert_for_dialect(name):
+    if name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
+
+
+def statuses_query(clubs, dates):
+    """Действующие версии слотов клубов clubs за даты dates: ключ, статус, поколение, id
+
+    Отбор по club IN / date IN идет по индексу (club_name, date); сравнение
+    кортежей (клуб, корт, дата, время) IN (VALUES ...) SQLite выполняет
+    полным просмотром таблицы.
+    """
+    return db.session.query(
+        TennisCourt.club_name, TennisCourt.court_number, TennisCourt.date, TennisCourt.time_slot,
+        TennisCourt.status, TennisCourt.valid_from, TennisCourt.id
+    ).filter(
+        TennisCourt.club_name.in_(clubs),
+        TennisCourt.date.in_(dates),
+        TennisCourt.valid_to.is_(None)
+    )
+
+
+def _existing_versions(records):
+    """Действующие версии строк с ключами из records одним запросом: ключ -> (статус, поколение, id)
+
+    Порция записей - это одна-две группы (клуб, дата), поэтому лишних строк
+    запрос почти не читает.
+    """
+    keys = {(r['club_name'], r['court_number'], r['date'], r['time_slot']) for r in records}
+    rows = statuses_query({key[0] for key in keys}, {key[2] for key in keys})
+    return {
+        (club, court, date, time_slot): (status, valid_from, row_id)
+        for club, court, date, time_slot, status, valid_from, row_id in rows
+        if (club, court, date, time_slot) in keys
+    }
+
+
+def upsert_slots(records, generation, chunk_size=UPSERT_CHUNK_SIZE):
+    """Пакетная запись слотов в строящееся поколение generation (без commit)
+
+    Новый слот - новая версия с valid_from = generation. У изменившегося
+    слота действующая версия закрывается (valid_to = generation) и
+    добавляется новая; если версия уже этого поколения, она обновляется
+    через ON CONFLICT. Строки с неизменившимся статусом не пишутся.
+    Возвращает счетчики {'inserted', 'updated', 'unchanged'}.
+    """
+    insert = _insert_for_dialect(db.engine.dialect.name)
+    if insert is None:
+        return save_slots_per_record(records, generation)
+
+    # Последняя запись ключа побеждает, как при поштучном сохранении
+    latest = {}
+    for record in records:
+        latest[(record['club_name'], record['court_number'], record['date'], record['time_slot'])] = record
+    records = list(latest.values())
+
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    table = TennisCourt.__table__
+    now = datetime.utcnow()
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        existing = _existing_versions(chunk)
+
+        rows = []
+        closed = []
+        for record in chunk:
+            key = (record['club_name'], record['court_number'], record['date'], record['time_slot'])
+            previous = existing.get(key)
+            if previous is None:
+                counts['inserted'] += 1
+            elif previous[0] != record['status']:
+                counts['updated'] += 1
+                if previous[1] != generation:
+                    closed.append(previous[2])
+            else:
+                counts['unchanged'] += 1
+                continue
+            rows.append({
+                'club_name': record['club_name'],
+                'court_number': record['court_number'],
+                'date': record['date'],
+                'time_slot': record['time_slot'],
+                'status': record['status'],
+                'created_at': now,
+                'updated_at': now,
+                'valid_from': generation
+            })
+        if not rows:
+            continue
+
+        if closed:
+            db.session.execute(update(table).where(table.c.id.in_(closed)).values(valid_to=generation))
+        statement = insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(VERSION_KEY),
+            set_={'status': statement.excluded.status, 'updated_at': statement.excluded.updated_at},
+            where=table.c.status != statement.excluded.status
+        )
+        db.session.execute(statement)
+    return counts
+
+
+def save_slots_per_record(records, generation):
+    """Поштучная запись через ORM (для СУБД без ON CONFLICT и для сравнения в замерах)"""
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    for record in records:
+        existing = TennisCourt.query.filter_by(
+            club_name=record['club_name'],
+            court_number=record['court_number'],
+            date=record['date'],
+            time_slot=record['time_slot'],
+            valid_to=None
+        ).first()
+
+        if existing is not None and existing.status == record['status']:
+            counts['unchanged'] += 1
+            continue
+        if existing is not None and existing.valid_from == generation:
+            existing.status = record['status']
+            existing.updated_at = datetime.utcnow()
+            counts['updated'] += 1
+            continue
+
+        if existing is None:
+            counts['inserted'] += 1
+        else:
+            existing.valid_to = generation
+            counts['updated'] += 1
+        db.session.add(TennisCourt(
+            club_name=record['club_name'],
+            court_number=record['court_number'],
+            date=record['date'],
+            time_slot=record['time_slot'],
+            status=record['status'],
+            valid_from=generation
+        ))
+    return counts
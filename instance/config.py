@@ -8,3 +8,101 @@ DEBUG = True
 basedir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
 SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(basedir, "instance", "app.db")}'
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Соединения SQLite: WAL, synchronous=NORMAL, mmap и кэш страниц (см. storage.DEFAULT_PRAGMAS)
+SQLITE_PRAGMAS = {
+    'auto_vacuum': 'incremental',  # для существующей базы применяется первым обслуживанием (VACUUM)
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -32 * 1024,  # КиБ
+    'busy_timeout': 10000  # мс
+}
+DB_WRITER_POOL_SIZE = 1  # обновление данных - единственный писатель
+DB_READER_POOL_SIZE = 4  # соединения для чтения из веб-запросов
+
+# Параллельный парсинг клубов
+PARSER_TIMEOUT = 120  # дедлайн одного парсера, секунды
+PARSER_MAX_WORKERS = 4  # потоки для блокирующих Selenium-парсеров
+
+# Пул теплых браузеров Playwright
+BROWSER_POOL_SIZE = 2  # количество запущенных браузеров
+BROWSER_MAX_USES = 50  # пересоздание браузера после N выданных контекстов
+BROWSER_MAX_MEMORY_MB = 1500  # пересоздание браузера при превышении RSS
+
+# Пул сессий Selenium WebDriver
+WEBDRIVER_POOL_SIZE = 2  # максимум одновременно работающих сессий Chrome
+WEBDRIVER_MAX_USES = 100  # пересоздание сессии после N выдач
+
+# JSON API YClients (браузер используется только как запасной путь)
+YCLIENTS_API_BASE = os.environ.get('YCLIENTS_API_BASE', 'https://api.yclients.com')
+YCLIENTS_PARTNER_TOKEN = os.environ.get('YCLIENTS_PARTNER_TOKEN')
+YCLIENTS_BROWSER_CONCURRENCY = 4  # вкладок (корт, дата) одновременно в браузерном режиме
+
+# Потоковая запись результатов парсинга в БД
+PIPELINE_QUEUE_SIZE = 16  # порций (клуб, дата) в очереди; при заполнении парсеры ждут писателя
+PIPELINE_BATCH_SIZE = 500  # записей в одной транзакции
+GENERATIONS_KEEP = 2  # опубликованных поколений данных хранится для читателей, остальные версии удаляются
+GENERATION_STALE_SECONDS = 3600  # строящееся поколение другого хоста без записей дольше - брошено
+
+# Изоляция парсеров: 'process' - каждый парсер в отдельном процессе, 'inline' - в процессе Flask
+PARSER_ISOLATION = 'process'
+WORKER_PROCESSES = 2  # долгоживущих воркеров (пулы браузеров и размыкатели живут в них между обновлениями)
+WORKER_MEMORY_LIMIT_MB = 2048  # RSS воркера вместе с браузерами, при превышении - остановка задания
+WORKER_RECYCLE_MEMORY_MB = 1536  # RSS после задания, при превышении воркер пересоздается
+WORKER_CPU_LIMIT = 600  # секунд процессорного времени на одно задание
+WORKER_MAX_JOBS = 50  # пересоздание воркера после N заданий
+
+# Парсеры клубов: модуль импортируется только при запуске парсинга
+# (club_name и host нужны для журнала и размыкателя, пока парсер работает в воркере)
+PARSERS = [
+    {
+        'name': 'yclients_api',
+        'path': 'app.parsers.yclients_api_parser:YClientsApiParser',
+        'club_name': 'MyProtennis.ru',
+        'host': 'b1044864.yclients.com',
+        'options': {
+            'api_base': YCLIENTS_API_BASE,
+            'partner_token': YCLIENTS_PARTNER_TOKEN,
+            'browser_concurrency': YCLIENTS_BROWSER_CONCURRENCY
+        }
+    },
+    {'name': 'findsport', 'path': 'app.parsers.findsport_parser:FindSportParser',
+     'club_name': 'Tsaritsyno Tennis Club', 'host': 'findsport.ru'},
+    {'name': 'tsaritsyno', 'path': 'app.parsers.tsaritsyno_parser:TsaritsynoParser',
+     'club_name': 'Tsaritsyno Tennis Club', 'host': 'tsaritsyno.tennis-wegym.ru'},
+]
+
+# Синтетические клубы для нагрузки (например, SYNTHETIC_CLUBS=300 - 300 клубов на 14 дней)
+SYNTHETIC_CLUBS = int(os.environ.get('SYNTHETIC_CLUBS', '0'))
+if SYNTHETIC_CLUBS:
+    PARSERS.append({
+        'name': 'synthetic',
+        'path': 'app.parsers.synthetic:SyntheticParser',
+        'options': {'clubs': SYNTHETIC_CLUBS, 'courts': 6, 'days': 14, 'churn': 0.05}
+    })
+
+# Плановое обновление клубов с адаптивными интервалами (в дополнение к ручному /update)
+SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', '1') == '1'
+SCHEDULER_BASE_INTERVAL = 900  # базовый интервал для сегодняшних слотов, секунды
+SCHEDULER_MIN_INTERVAL = 120
+SCHEDULER_MAX_INTERVAL = 3600
+SCHEDULER_JITTER = 0.1  # случайный разброс интервала, доля
+SCHEDULER_MAX_CONCURRENT = 2  # клубов, обновляемых одновременно
+
+# Вежливость и устойчивость по хостам источников
+HOST_RATE_LIMIT = 2.0  # запросов в секунду на хост
+HOST_RATE_BURST = 5  # допустимый всплеск запросов
+BREAKER_FAILURE_THRESHOLD = 3  # ошибок подряд до размыкания
+BREAKER_COOLDOWN = 300  # секунд пропуска хоста после размыкания
+
+# Повторы при сбоях источников (экспоненциальная пауза с разбросом)
+RETRY_BUDGET_PER_CYCLE = 20  # повторов на весь цикл обновления
+
+# Хранение прошедших слотов и фоновое обслуживание базы
+RETENTION_ENABLED = os.environ.get('RETENTION_ENABLED', '1') == '1'
+RETENTION_DAYS = 7  # прошедших дней хранится, более старые слоты удаляются
+RETENTION_BATCH_SIZE = 2000  # строк в одной транзакции удаления
+RETENTION_ARCHIVE_DIR = os.environ.get('RETENTION_ARCHIVE_DIR')  # CSV (gzip) удаляемых строк; не задан - без архива
+MAINTENANCE_INTERVAL = 3600  # секунд между проходами (удаление, incremental_vacuum, ANALYZE)
+VACUUM_PAGES = 2000  # страниц, возвращаемых за проход
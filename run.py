@@ -1,9 +1,12 @@
 from app import create_app
 import os
 
-app = create_app()
+# WSGI-точка входа (flask --app run, gunicorn run:app). Воркеры парсеров (spawn)
+# импортируют этот модуль как __mp_main__ и не должны повторять старт приложения
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
     # Получаем порт из переменной окружения или используем 5000 по умолчанию
     port = int(os.environ.get('PORT', 5000))
-    app.run(debug=True, host='0.0.0.0', port=port)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=port)
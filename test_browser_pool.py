@@ -0,0 +1,183 @@
+import os
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+import playwright.async_api
+
+from app.services.browser_pool import BrowserPool, close_browser_pools, get_browser_pool
+
+
+class FakeContext:
+    def __init__(self, browser, options):
+        self.browser = browser
+        self.options = options
+        self.cookies = []
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeCdpSession:
+    def __init__(self, pids):
+        self.pids = pids
+
+    async def send(self, method):
+        assert method == 'SystemInfo.getProcessInfo'
+        return {'processInfo': [{'id': pid} for pid in self.pids]}
+
+    async def detach(self):
+        pass
+
+
+class FakeBrowser:
+    """Минимальная замена браузера Playwright"""
+
+    def __init__(self, number, pids):
+        self.number = number
+        self.pids = pids
+        self.contexts = []
+        self.closed = False
+
+    def is_connected(self):
+        return not self.closed
+
+    async def new_context(self, **options):
+        context = FakeContext(self, options)
+        self.contexts.append(context)
+        return context
+
+    async def new_browser_cdp_session(self):
+        return FakeCdpSession(self.pids)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeChromium:
+    def __init__(self, pids):
+        self.pids = pids
+        self.launched = []
+
+    async def launch(self, headless, args):
+        browser = FakeBrowser(len(self.launched) + 1, self.pids)
+        self.launched.append(browser)
+        return browser
+
+
+class FakePlaywright:
+    def __init__(self, pids=()):
+        self.chromium = FakeChromium(list(pids))
+        self.stopped = False
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def fake_playwright(monkeypatch):
+    """Подмена async_playwright: пул запускает фейковые браузеры"""
+    fakes = []
+
+    def launcher(pids=()):
+        fake = FakePlaywright(pids)
+        fakes.append(fake)
+        monkeypatch.setattr(playwright.async_api, 'async_playwright', lambda: fake)
+        return fake
+
+    launcher()
+    return launcher
+
+
+async def use(pool, times):
+    for _ in range(times):
+        async with pool.context():
+            pass
+
+
+def test_browser_is_recycled_after_max_uses(fake_playwright):
+    fake = fake_playwright()
+
+    async def scenario():
+        pool = BrowserPool(size=1, max_uses=3, max_memory_mb=0)
+        await use(pool, 7)
+        await pool.close()
+
+    asyncio.run(scenario())
+    first, second, third = fake.chromium.launched
+    assert [len(b.contexts) for b in (first, second, third)] == [3, 3, 1]
+    assert first.closed and second.closed and third.closed
+    assert fake.stopped
+
+
+@pytest.mark.skipif(not Path('/proc').is_dir(), reason='RSS читается из /proc')
+def test_browser_is_recycled_over_memory_limit(fake_playwright):
+    # Процессы "браузера" - текущий процесс, его RSS заведомо больше 1 МБ
+    fake = fake_playwright(pids=[os.getpid()])
+
+    async def scenario():
+        pool = BrowserPool(size=1, max_uses=100, max_memory_mb=1)
+        await use(pool, 2)
+        assert len(pool._browsers) == 1
+        await pool.close()
+
+    asyncio.run(scenario())
+    first, second, third = fake.chromium.launched
+    assert first.closed and len(first.contexts) == 1
+    assert second.closed and len(second.contexts) == 1
+
+
+def test_each_club_gets_isolated_context(fake_playwright):
+    fake = fake_playwright()
+
+    async def club(pool, name, contexts):
+        async with pool.context(locale='ru-RU') as context:
+            context.cookies.append(name)
+            contexts[name] = context
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        pool = BrowserPool(size=2, max_uses=100, max_memory_mb=0)
+        contexts = {}
+        await asyncio.gather(*(club(pool, name, contexts) for name in ('A', 'B', 'C', 'D')))
+        await pool.close()
+        return contexts
+
+    contexts = asyncio.run(scenario())
+    # Свой контекст на клуб: cookies не смешиваются, после работы контекст закрыт
+    assert len({id(context) for context in contexts.values()}) == 4
+    assert all(context.cookies == [name] for name, context in contexts.items())
+    assert all(context.closed and context.options == {'locale': 'ru-RU'} for context in contexts.values())
+    # Одновременные клубы распределены по наименее загруженным браузерам
+    assert [len(b.contexts) for b in fake.chromium.launched] == [2, 2]
+
+
+def test_close_browser_pools_closes_pool_of_current_loop(fake_playwright):
+    fake = fake_playwright()
+
+    async def scenario():
+        pool = get_browser_pool({'BROWSER_POOL_SIZE': 2})
+        assert get_browser_pool() is pool
+        await pool.start()
+        await close_browser_pools()
+
+        with pytest.raises(RuntimeError):
+            await use(pool, 1)
+        # Следующее обращение создает новый пул
+        assert get_browser_pool() is not pool
+        await close_browser_pools()
+
+    asyncio.run(scenario())
+    assert len(fake.chromium.launched) == 2
+    assert all(browser.closed for browser in fake.chromium.launched)
+    assert fake.stopped
@@ -0,0 +1,132 @@
+import sys
+import threading
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.services.driver_pool import WebDriverPool
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current = handle
+
+
+class FakeDriver:
+    """Минимальная замена WebDriver для проверки логики пула"""
+
+    def __init__(self):
+        self.window_handles = ['main']
+        self.cookies = {'session': '1'}
+        self.current = 'main'
+        self.healthy = True
+        self.quit_called = False
+        self.switch_to = FakeSwitchTo(self)
+
+    def execute_script(self, script):
+        if not self.healthy:
+            raise RuntimeError("session deleted")
+        return 1
+
+    def close(self):
+        self.window_handles.remove(self.current)
+
+    def delete_all_cookies(self):
+        self.cookies.clear()
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+def make_pool(**kwargs):
+    pool = WebDriverPool(**kwargs)
+    created = []
+
+    def create(driver_path_provider):
+        driver = FakeDriver()
+        created.append(driver)
+        return driver
+
+    pool._create = create
+    return pool, created
+
+
+def test_session_is_reused_and_reset():
+    pool, created = make_pool(max_sessions=1)
+
+    driver = pool.acquire(lambda: '/fake/chromedriver')
+    driver.window_handles.append('popup')
+    pool.release(driver)
+
+    assert pool.acquire(lambda: '/fake/chromedriver') is driver
+    assert len(created) == 1
+    assert driver.window_handles == ['main']
+    assert driver.cookies == {}
+
+
+def test_unhealthy_session_is_replaced():
+    pool, created = make_pool(max_sessions=1)
+
+    driver = pool.acquire(lambda: '/fake/chromedriver')
+    pool.release(driver)
+    driver.healthy = False
+
+    replacement = pool.acquire(lambda: '/fake/chromedriver')
+    assert replacement is not driver
+    assert driver.quit_called
+    assert len(created) == 2
+
+
+def test_concurrent_sessions_are_capped():
+    pool, created = make_pool(max_sessions=1, acquire_timeout=0.1)
+
+    pool.acquire(lambda: '/fake/chromedriver')
+    errors = []
+
+    def borrow():
+        try:
+            pool.acquire(lambda: '/fake/chromedriver')
+        except TimeoutError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=borrow)
+    thread.start()
+    thread.join()
+
+    assert len(errors) == 1
+    assert len(created) == 1
+
+
+def test_double_release_frees_slot_once():
+    pool, created = make_pool(max_sessions=2, acquire_timeout=0.1)
+
+    first = pool.acquire(lambda: '/fake/chromedriver')
+    pool.acquire(lambda: '/fake/chromedriver')
+    # Отмена по дедлайну и finally рабочего потока возвращают одну и ту же сессию
+    pool.release(first, discard=True)
+    pool.release(first, discard=True)
+
+    pool.acquire(lambda: '/fake/chromedriver')
+    try:
+        pool.acquire(lambda: '/fake/chromedriver')
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("Пул выдал больше max_sessions сессий")
+    assert len(created) == 3
+
+
+if __name__ == "__main__":
+    test_session_is_reused_and_reset()
+    test_unhealthy_session_is_replaced()
+    test_concurrent_sessions_are_capped()
+    test_double_release_frees_slot_once()
+    print("✅ Тесты пула WebDriver пройдены")
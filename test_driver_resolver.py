@@ -0,0 +1,86 @@
+import sys
+import os
+import subprocess
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.services import driver_resolver
+from app.services.driver_resolver import ChromeDriverResolver
+
+
+def make_fake_driver(tmp_path):
+    path = tmp_path / 'chromedriver'
+    path.write_text('#!/bin/sh\necho "ChromeDriver 120.0.0"\n')
+    path.chmod(0o755)
+    return str(path)
+
+
+def count_probes(monkeypatch):
+    calls = []
+    real_run = subprocess.run
+
+    def counting_run(*args, **kwargs):
+        calls.append(args[0])
+        return real_run(*args, **kwargs)
+
+    monkeypatch.setattr(driver_resolver.subprocess, 'run', counting_run)
+    return calls
+
+
+def test_resolves_once_and_persists_cache(tmp_path, monkeypatch):
+    driver_path = make_fake_driver(tmp_path)
+    cache_path = tmp_path / 'cache.json'
+    calls = count_probes(monkeypatch)
+
+    resolver = ChromeDriverResolver(cache_path=cache_path, candidates=[driver_path])
+    assert resolver.resolve() == driver_path
+    assert resolver.resolve() == driver_path
+    assert len(calls) == 1
+
+    # Новый процесс берет драйвер из кэша на диске без запуска subprocess
+    fresh = ChromeDriverResolver(cache_path=cache_path, candidates=[driver_path])
+    assert fresh.resolve() == driver_path
+    assert len(calls) == 1
+
+
+def test_changed_binary_is_rechecked(tmp_path, monkeypatch):
+    driver_path = make_fake_driver(tmp_path)
+    cache_path = tmp_path / 'cache.json'
+    calls = count_probes(monkeypatch)
+
+    resolver = ChromeDriverResolver(cache_path=cache_path, candidates=[driver_path])
+    resolver.resolve()
+
+    with open(driver_path, 'a') as driver_file:
+        driver_file.write('# updated\n')
+    os.utime(driver_path, ns=(0, 10**9))
+
+    assert resolver.resolve() == driver_path
+    assert len(calls) == 2
+
+
+def test_missing_driver_returns_none(tmp_path):
+    resolver = ChromeDriverResolver(
+        cache_path=tmp_path / 'cache.json',
+        candidates=[str(tmp_path / 'absent')]
+    )
+    assert resolver.resolve() is None
+    assert not (tmp_path / 'cache.json').exists()
+
+
+def test_missing_driver_is_rechecked_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(driver_resolver.time, 'monotonic', lambda: now[0])
+    driver_path = str(tmp_path / 'chromedriver')
+    resolver = ChromeDriverResolver(cache_path=tmp_path / 'cache.json', candidates=[driver_path], missing_ttl=60)
+    assert resolver.resolve() is None
+
+    # Драйвер установлен: пока не истек срок, отсутствие берется из памяти
+    assert make_fake_driver(tmp_path) == driver_path
+    now[0] += 30
+    assert resolver.resolve() is None
+    now[0] += 31
+    assert resolver.resolve() == driver_path
@@ -0,0 +1,65 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.parsers.extraction import ExtractionError, SlotExtractor
+from app.parsers.yclients_adv_parser import SLOT_EXTRACTOR, YClientsAdvParser
+
+
+class FakeDriver:
+    def __init__(self, payload):
+        self.payload = payload
+        self.scripts = []
+
+    def execute_script(self, script, *args):
+        self.scripts.append(script)
+        return self.payload
+
+
+def test_payload_is_validated_and_normalized():
+    parser = YClientsAdvParser()
+    payload = [
+        {'court': '2', 'date': '2026-10-18', 'time': '9.30 - 10:30', 'status': 'free'},
+        {'court': '2', 'date': '2026-10-18', 'time': '10:30', 'status': 'busy'},
+        {'court': '2', 'time': '11:00', 'status': 'unknown'},
+        {'status': 'free'},
+        'garbage'
+    ]
+
+    records = SLOT_EXTRACTOR.normalize(payload, parser)
+
+    assert records == [
+        {'club_name': 'MyProtennis.ru', 'court_number': '2', 'date': date(2026, 10, 18),
+         'time_slot': '09:30', 'status': 'свободен'},
+        {'club_name': 'MyProtennis.ru', 'court_number': '2', 'date': date(2026, 10, 18),
+         'time_slot': '10:30', 'status': 'занят'}
+    ]
+
+
+def test_selenium_extraction_is_one_call():
+    extractor = SlotExtractor('(context) => []')
+    driver = FakeDriver([{'time': '12:00', 'status': 'free'}])
+
+    payload = extractor.extract_sync(driver, {'court': '1'})
+
+    assert len(driver.scripts) == 1
+    assert payload == [{'time': '12:00', 'status': 'free'}]
+
+
+def test_invalid_payload_is_rejected():
+    try:
+        SLOT_EXTRACTOR.normalize({'slots': []}, YClientsAdvParser())
+    except ExtractionError:
+        return
+    raise AssertionError("Ожидалась ExtractionError")
+
+
+if __name__ == "__main__":
+    test_payload_is_validated_and_normalized()
+    test_selenium_extraction_is_one_call()
+    test_invalid_payload_is_rejected()
+    print("✅ Тесты извлечения слотов пройдены")
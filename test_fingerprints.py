@@ -0,0 +1,104 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app import create_app, db
+from app.models import ScrapeFingerprint, TennisCourt
+from app.services.parser_service import ParserService
+
+
+def make_data(status_10=('свободен', 'свободен')):
+    data = []
+    for club in ('Club A', 'Club B'):
+        for day in (date(2030, 1, 1), date(2030, 1, 2)):
+            for time_slot, status in zip(('10:00', '11:00'), status_10):
+                data.append({
+                    'club_name': club,
+                    'court_number': '1',
+                    'date': day,
+                    'time_slot': time_slot,
+                    'status': status
+                })
+    return data
+
+
+def test_unchanged_club_dates_are_skipped(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"})
+    service = ParserService(app)
+
+    assert service.save_to_database(make_data(), app) == 8
+    assert service.last_save_stats['skipped_groups'] == 0
+
+    # Повторное обновление без изменений ничего не пишет
+    assert service.save_to_database(make_data(), app) == 0
+    assert service.last_save_stats == {'saved': 0, 'skipped_groups': 4, 'skipped_records': 8, 'generation': 2,
+                                       'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    # Изменился один слот - проверяется только его (клуб, дата), пишется только сам слот
+    data = make_data()
+    data[1]['status'] = 'занят'
+    assert service.save_to_database(data, app) == 1
+    assert service.last_save_stats['skipped_groups'] == 3
+    assert (service.last_save_stats['updated'], service.last_save_stats['unchanged']) == (1, 1)
+
+    with app.app_context():
+        changed = TennisCourt.query.filter_by(club_name='Club A', date=date(2030, 1, 1), time_slot='11:00',
+                                              valid_to=None).one()
+        assert changed.status == 'занят'
+
+
+def test_deleted_rows_invalidate_fingerprint(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"})
+    service = ParserService(app)
+    service.save_to_database(make_data(), app)
+
+    with app.app_context():
+        TennisCourt.query.filter_by(club_name='Club B').delete()
+        db.session.commit()
+
+    assert service.save_to_database(make_data(), app) == 4
+
+
+def make_source_data(courts, day=date(2030, 1, 1)):
+    return [{
+        'club_name': 'Shared Club',
+        'court_number': str(court),
+        'date': day,
+        'time_slot': time_slot,
+        'status': 'свободен' if court % 2 else 'занят'
+    } for court in range(1, courts + 1) for time_slot in ('10:00', '11:00')]
+
+
+def test_sources_sharing_club_keep_own_fingerprints(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}", 'SCHEDULER_ENABLED': False})
+    service = ParserService(app)
+    # Агрегатор и сайт клуба описывают один клуб разным числом кортов
+    aggregator = make_source_data(3)
+    club_site = make_source_data(2)
+
+    service.save_to_database(aggregator, app, source='findsport')
+    service.save_to_database(club_site, app, source='tsaritsyno')
+
+    for _ in range(2):
+        assert service.save_to_database(aggregator, app, source='findsport') == 0
+        assert service.last_save_stats['skipped_groups'] == 1
+        assert service.save_to_database(club_site, app, source='tsaritsyno') == 0
+        assert service.last_save_stats['skipped_groups'] == 1
+
+    with app.app_context():
+        assert ScrapeFingerprint.query.count() == 2
+
+
+def test_duplicate_slots_do_not_defeat_skipping(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}", 'SCHEDULER_ENABLED': False})
+    service = ParserService(app)
+    # Источник отдает слот дважды, в БД он одна строка
+    data = make_source_data(2) + make_source_data(1)
+
+    service.save_to_database(data, app, source='site')
+    assert service.save_to_database(data, app, source='site') == 0
+    assert service.last_save_stats['skipped_groups'] == 1
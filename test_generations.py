@@ -0,0 +1,229 @@
+import sys
+import asyncio
+import socket
+import subprocess
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app import create_app, db
+from app.models import DataGeneration, TennisCourt
+from app.parsers.base_parser import BaseParser
+from app.parsers.records import SlotRecord
+from app.services import generations
+from app.services.generations import (begin_generation, building_generation, collect_garbage,
+                                      current_generation, publish_generation, recover_generations)
+from app.services.parser_service import ParserService
+from app.services.storage import upcoming_slots, upsert_slots
+
+DAY = date(2100, 1, 1)
+
+
+def make_app(tmp_path):
+    return create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}", 'SCHEDULER_ENABLED': False})
+
+
+def statuses(generation):
+    return [row.status for row in upcoming_slots(generation, DAY)]
+
+
+def write(status, clubs=('A', 'B')):
+    with building_generation() as generation:
+        upsert_slots([SlotRecord(club, '1', DAY, '10:00', status) for club in clubs], generation)
+        db.session.commit()
+    return generation
+
+
+def test_generation_is_visible_only_after_publish(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        first = write('свободен')
+        assert current_generation() == first
+
+        second = begin_generation()
+        upsert_slots([SlotRecord('A', '1', DAY, '10:00', 'занят')], second)
+        db.session.commit()
+        # Половина обновления записана, но читатели видят прежнее поколение целиком
+        assert statuses(current_generation()) == ['свободен', 'свободен']
+        upsert_slots([SlotRecord('B', '1', DAY, '10:00', 'занят')], second)
+        db.session.commit()
+        publish_generation(second)
+
+        assert current_generation() == second
+        assert statuses(second) == ['занят', 'занят']
+        assert statuses(first) == ['свободен', 'свободен']
+
+
+def test_failed_generation_is_rolled_back(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        first = write('свободен')
+
+        with pytest.raises(RuntimeError):
+            with building_generation() as generation:
+                upsert_slots([SlotRecord('A', '1', DAY, '10:00', 'занят'),
+                              SlotRecord('C', '1', DAY, '10:00', 'занят')], generation)
+                db.session.commit()
+                raise RuntimeError('источник упал')
+
+        assert current_generation() == first
+        assert db.session.get(DataGeneration, generation).status == 'aborted'
+        assert TennisCourt.query.filter_by(valid_from=generation).count() == 0
+        assert TennisCourt.query.filter(TennisCourt.valid_to.is_not(None)).count() == 0
+        # Блокировка писателя освобождена
+        assert write('занят') > generation
+
+
+def test_stale_generation_is_recovered_and_garbage_collected(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        generations = [write(status) for status in ('свободен', 'занят', 'свободен')]
+        # Видны два последних поколения: версии первого удаляются
+        assert collect_garbage(keep=2) == 2
+        assert statuses(generations[1]) == ['занят', 'занят']
+        assert TennisCourt.query.count() == 4
+
+        # Поколение, брошенное упавшим процессом
+        stale = DataGeneration(status='building')
+        db.session.add(stale)
+        db.session.add(TennisCourt(club_name='A', court_number='2', date=DAY, time_slot='10:00',
+                                   status='занят', valid_from=generations[-1] + 1))
+        db.session.commit()
+        stale_id = stale.id
+        assert recover_generations() == [stale_id]
+        assert TennisCourt.query.filter_by(court_number='2').count() == 0
+
+
+RECOVER_IN_CHILD = """
+import sys
+sys.path.insert(0, {root!r})
+from app import create_app
+from app.models import DataGeneration
+app = create_app({{'SQLALCHEMY_DATABASE_URI': {database!r}, 'SCHEDULER_ENABLED': False, 'RETENTION_ENABLED': False}})
+with app.app_context():
+    print(DataGeneration.query.filter_by(status='building').count())
+"""
+
+
+def test_generation_of_live_process_survives_recovery(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        generation = begin_generation()
+        upsert_slots([SlotRecord('A', '1', DAY, '10:00', 'свободен')], generation)
+        db.session.commit()
+
+        # Другой процесс (воркер, второй веб-воркер) стартует приложение на той же базе
+        script = RECOVER_IN_CHILD.format(root=str(root_dir), database=app.config['SQLALCHEMY_DATABASE_URI'])
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=120)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == '1'
+        assert recover_generations() == []
+
+        publish_generation(generation)
+        assert statuses(current_generation()) == ['свободен']
+
+
+def test_generations_of_dead_owners_are_recovered(tmp_path):
+    app = make_app(tmp_path)
+    finished = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                              capture_output=True, text=True, check=True)
+    dead_pid = int(finished.stdout)
+    now = datetime.utcnow()
+    with app.app_context():
+        owners = {
+            'dead': DataGeneration(status='building', owner_host=socket.gethostname(), owner_pid=dead_pid),
+            'remote-stale': DataGeneration(status='building', owner_host='other-host', owner_pid=1,
+                                           heartbeat_at=now - timedelta(hours=2)),
+            'remote-live': DataGeneration(status='building', owner_host='other-host', owner_pid=1,
+                                          heartbeat_at=now),
+        }
+        db.session.add_all(owners.values())
+        db.session.commit()
+
+        recovered = recover_generations(stale_after=3600)
+        assert sorted(recovered) == sorted([owners['dead'].id, owners['remote-stale'].id])
+        assert db.session.get(DataGeneration, owners['remote-live'].id).status == 'building'
+
+
+def test_refresh_path_keeps_version_history_bounded(tmp_path):
+    app = make_app(tmp_path)
+    service = ParserService(app)
+    record = {'club_name': 'A', 'court_number': '1', 'date': DAY, 'time_slot': '10:00'}
+    # Плановое обновление одного клуба: каждое сохранение - свое поколение
+    for status in ('свободен', 'занят') * 3:
+        service.save_to_database([{**record, 'status': status}], app)
+
+    with app.app_context():
+        assert statuses(current_generation()) == ['занят']
+        assert TennisCourt.query.count() == service.generations_keep
+        assert DataGeneration.query.count() == service.generations_keep
+
+
+class BatchParser(BaseParser):
+    streams = True
+
+    def __init__(self, status):
+        super().__init__()
+        self.club_name = 'Stream'
+        self.status = status
+
+    async def get_courts_data(self):
+        return [record async for chunk in self.iter_courts_data() for record in chunk]
+
+    async def iter_courts_data(self):
+        for court in range(1, 4):
+            yield [SlotRecord(self.club_name, str(court), DAY, '10:00', self.status)]
+            await asyncio.sleep(0.01)
+
+
+def test_stream_publishes_each_batch_and_aborts_failed_one(tmp_path):
+    app = make_app(tmp_path)
+    app.config.update({'PIPELINE_QUEUE_SIZE': 1, 'PIPELINE_BATCH_SIZE': 1, 'PARSER_ISOLATION': 'inline'})
+    service = ParserService(app)
+    service.parsers = [BatchParser('свободен')]
+    asyncio.run(service.update_all_data(app))
+    published = service.last_save_stats['generation']
+    assert service.last_save_stats['batches'] == 3
+
+    # Вторая пачка нового обновления падает: первая уже опубликована,
+    # вторая отменена, блокировка писателя освобождена
+    service.parsers = [BatchParser('занят')]
+    original = service._save_batch
+    calls = []
+
+    def failing_save(groups, generation):
+        calls.append(generation)
+        if len(calls) == 2:
+            raise RuntimeError('диск заполнен')
+        return original(groups, generation)
+
+    service._save_batch = failing_save
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.update_all_data(app))
+
+    assert not generations._writer_lock.locked()
+    with app.app_context():
+        assert current_generation() == calls[0] > published
+        assert statuses(calls[0]) == ['занят', 'свободен', 'свободен']
+        assert TennisCourt.query.filter_by(valid_from=calls[1]).count() == 0
+        assert db.session.get(DataGeneration, calls[1]).status == 'aborted'
+
+
+def test_data_response_is_cached_per_generation(tmp_path):
+    app = make_app(tmp_path)
+    client = app.test_client()
+    with app.app_context():
+        write('свободен')
+        first = client.get('/data')
+        # Прямая правка без нового поколения не видна: ответ поколения закэширован
+        TennisCourt.query.update({'status': 'занят'})
+        db.session.commit()
+        assert client.get('/data').data == first.data
+
+        write('свободен', clubs=('C',))
+        assert [row['club'] for row in client.get('/data').get_json()] == ['A', 'B', 'C']
@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.services.host_guard import CircuitBreaker, HostGuard, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_probes_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60, clock=clock)
+
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure('timeout')
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    # После cooldown пропускается ровно одна пробная попытка
+    clock.now = 61
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    assert not breaker.allow()
+
+    breaker.record_failure('timeout')
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    clock.now = 200
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_token_bucket_spaces_requests_after_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=2, clock=clock)
+
+    assert bucket._reserve() == 0.0
+    assert bucket._reserve() == 0.0
+    assert bucket._reserve() == 0.5
+
+    clock.now = 5
+    assert bucket._reserve() == 0.0
+
+
+def test_guard_tracks_hosts_separately():
+    guard = HostGuard(failure_threshold=1, cooldown=300)
+    bad = HostGuard.host_of('https://www.findsport.ru/playground/2030')
+    good = HostGuard.host_of('https://n1165596.yclients.com/company/1149677')
+
+    guard.record_failure(bad, 'timeout')
+
+    assert not guard.allow(bad)
+    assert guard.allow(good)
+    snapshot = guard.snapshot()
+    assert snapshot[bad]['state'] == 'open'
+    assert snapshot[bad]['last_error'] == 'timeout'
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.parsers.interception import InterceptionStats, default_profile
+
+
+def test_default_profile_keeps_only_needed_requests():
+    profile = default_profile(('yclients.com',))
+
+    assert profile.is_allowed('document', 'https://b1044864.yclients.com/company/967881')
+    assert profile.is_allowed('xhr', 'https://api.yclients.com/api/v1/book_times/1')
+    assert profile.is_allowed('script', 'https://cdn.yclients.com/app.js')
+
+    assert not profile.is_allowed('script', 'https://www.googletagmanager.com/gtm.js')
+    assert not profile.is_allowed('xhr', 'https://mc.yandex.ru/watch/1')
+    assert not profile.is_allowed('image', 'https://b1044864.yclients.com/logo.png')
+    assert not profile.is_allowed('font', 'https://fonts.gstatic.com/roboto.woff2')
+    assert not profile.is_allowed('stylesheet', 'https://cdn.yclients.com/app.css')
+
+
+def test_stats_report_saved_requests_and_bytes():
+    stats = InterceptionStats(size_estimates={'image': 1000, 'other': 10})
+    stats.record('document', True)
+    stats.record('image', False)
+    stats.record('image', False)
+    stats.record('ping', False)
+
+    assert stats.as_dict() == {
+        'requests_allowed': 1,
+        'requests_saved': 3,
+        'bytes_saved': 2010,
+        'blocked_by_type': {'image': 2, 'ping': 1}
+    }
+
+
+if __name__ == "__main__":
+    test_default_profile_keeps_only_needed_requests()
+    test_stats_report_saved_requests_and_bytes()
+    print("✅ Тесты перехвата запросов пройдены")
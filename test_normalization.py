@@ -0,0 +1,57 @@
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.parsers import normalization
+from app.parsers.normalization import normalize_date, normalize_dates, normalize_time, normalize_times
+
+
+def test_time_formats():
+    cases = {
+        '10:00': '10:00',
+        ' 9.30 ': '09:30',
+        '21': '21:00',
+        '18:00 - 19:30': '18:00',
+        'Утро': '09:00',
+        '7:5': '07:00',
+        '25:15': '01:15',
+        'с 10:00': '10:00',
+    }
+    for raw, expected in cases.items():
+        assert normalize_time(raw) == expected, raw
+
+
+def test_dates_relative_to_base_date():
+    base = datetime(2030, 1, 1, 15, 30)  # вторник
+
+    assert normalize_date('Сегодня', base) == date(2030, 1, 1)
+    assert normalize_date('завтра', base) == date(2030, 1, 2)
+    assert normalize_date('пт', base) == date(2030, 1, 4)
+    assert normalize_date('вт', base) == date(2030, 1, 8)
+    assert normalize_date('15.01.2030', base) == date(2030, 1, 15)
+    assert normalize_date('мусор', base) == date(2030, 1, 1)
+    # Кэш учитывает базовую дату
+    assert normalize_date('завтра', datetime(2030, 2, 1)) == date(2030, 2, 2)
+
+
+def test_batch_matches_single_and_uses_cache():
+    normalization.clear_caches()
+    values = ['10:00', '9.30', '10:00', 'вечер'] * 1000
+
+    assert normalize_times(values) == [normalize_time(value) for value in values]
+    assert normalization.normalize_time.cache_info().currsize == 3
+
+    base = datetime(2030, 1, 1)
+    dates = ['сегодня', 'пт', 'сегодня']
+    assert normalize_dates(dates, base) == [date(2030, 1, 1), date(2030, 1, 4), date(2030, 1, 1)]
+
+
+def test_benchmark_reports_throughput():
+    results = normalization.benchmark(count=2000)
+    assert set(results) == {'time_uncached', 'time_cached', 'time_batch',
+                            'date_uncached', 'date_cached', 'date_batch'}
+    assert all(rate > 0 for rate in results.values())
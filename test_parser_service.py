@@ -0,0 +1,183 @@
+import sys
+import time
+import asyncio
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app import create_app
+from app.models import TennisCourt
+from app.parsers.base_parser import BaseParser
+from app.services.parser_service import ParserService
+from app.services.generations import current_generation
+from app.services.storage import upcoming_slots
+
+
+def make_record(club_name):
+    return {
+        'club_name': club_name,
+        'court_number': '1',
+        'date': datetime.now().date(),
+        'time_slot': '10:00',
+        'status': 'свободен'
+    }
+
+
+class SlowAsyncParser(BaseParser):
+    def __init__(self, club_name, delay):
+        super().__init__()
+        self.club_name = club_name
+        self.delay = delay
+
+    async def get_courts_data(self):
+        await asyncio.sleep(self.delay)
+        return [make_record(self.club_name)]
+
+
+class BlockingParser(BaseParser):
+    def __init__(self, club_name, delay):
+        super().__init__()
+        self.club_name = club_name
+        self.delay = delay
+
+    def get_courts_data(self):
+        # Имитация блокирующего Selenium: прерывается только отменой
+        deadline = time.monotonic() + self.delay
+        while time.monotonic() < deadline:
+            if self.is_cancelled:
+                raise RuntimeError("cancelled")
+            time.sleep(0.01)
+        return [make_record(self.club_name)]
+
+
+def test_parsers_run_concurrently():
+    service = ParserService()
+    service.parsers = [
+        SlowAsyncParser('Async A', 0.3),
+        SlowAsyncParser('Async B', 0.3),
+        BlockingParser('Sync A', 0.3),
+        BlockingParser('Sync B', 0.3),
+    ]
+
+    started = time.monotonic()
+    data = asyncio.run(service.parse_all_clubs())
+    elapsed = time.monotonic() - started
+
+    assert len(data) == 4
+    # Время обновления определяется самым медленным клубом, а не суммой
+    assert elapsed < 1.0
+
+
+def test_hanging_parser_is_cancelled_and_partial_results_kept():
+    service = ParserService()
+    hanging = BlockingParser('Hanging', 30)
+    hanging.timeout = 0.2
+    service.parsers = [SlowAsyncParser('Fast', 0.05), hanging]
+
+    data = asyncio.run(service.parse_all_clubs())
+
+    assert [record['club_name'] for record in data] == ['Fast']
+    assert hanging.is_cancelled
+
+
+class StreamingParser(BaseParser):
+    streams = True
+
+    def __init__(self, club_name, days):
+        super().__init__()
+        self.club_name = club_name
+        self.days = days
+
+    async def get_courts_data(self):
+        return [record async for chunk in self.iter_courts_data() for record in chunk]
+
+    async def iter_courts_data(self):
+        for offset in range(self.days):
+            record = make_record(self.club_name)
+            record['date'] = datetime(2030, 1, 1 + offset).date()
+            yield [record]
+
+
+class WatchingParser(SlowAsyncParser):
+    """Медленный клуб, который проверяет, что данные быстрого уже в БД"""
+
+    def __init__(self, app, delay):
+        super().__init__('Slow', delay)
+        self.app = app
+        self.rows_seen = None
+        self.generation_seen = None
+        self.visible_seen = None
+
+    async def get_courts_data(self):
+        await asyncio.sleep(self.delay)
+        with self.app.app_context():
+            self.rows_seen = TennisCourt.query.filter_by(club_name='Stream').count()
+            self.generation_seen = current_generation()
+            self.visible_seen = upcoming_slots(self.generation_seen, date(2030, 1, 1)).filter(
+                TennisCourt.club_name == 'Stream').count()
+        return [make_record(self.club_name)]
+
+
+def test_records_are_streamed_to_database_in_batches(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'PIPELINE_QUEUE_SIZE': 2,
+        'PIPELINE_BATCH_SIZE': 2
+    })
+    service = ParserService(app)
+    slow = WatchingParser(app, 0.3)
+    service.parsers = [StreamingParser('Stream', 5), slow]
+
+    saved = asyncio.run(service.update_all_data(app))
+
+    assert saved == 6
+    assert service.last_save_stats['received'] == 6
+    assert service.last_save_stats['batches'] >= 3
+    # Данные быстрого клуба опубликованы и видны до окончания медленного
+    assert slow.rows_seen == 5
+    assert slow.generation_seen > 0
+    assert slow.visible_seen == 5
+    with app.app_context():
+        assert current_generation() == service.last_save_stats['generation']
+
+
+class MixedSourceParser(SlowAsyncParser):
+    """Источник отдает и чужой клуб (как агрегатор) - на другую дату"""
+
+    async def get_courts_data(self):
+        foreign = make_record('Foreign')
+        foreign['date'] += timedelta(days=1)
+        return [make_record(self.club_name), foreign]
+
+
+def test_refresh_club_reports_only_own_changed_dates(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}", 'SCHEDULER_ENABLED': False})
+    service = ParserService(app)
+    today = datetime.now().date()
+    parser = MixedSourceParser('Club', 0)
+
+    assert asyncio.run(service.refresh_club(parser, app=app)) == {today}
+    # Сохранение другого клуба между обновлениями не влияет на результат
+    service.save_to_database([make_record('Other')], app)
+    assert asyncio.run(service.refresh_club(parser, app=app)) == set()
+
+
+def test_default_stream_groups_full_result_by_club_and_date():
+    async def collect(parser):
+        return [chunk async for chunk in parser.iter_courts_data()]
+
+    # Блокирующий парсер читается в потоке, асинхронный - в event loop
+    blocking = BlockingParser('Sync', 0)
+    assert asyncio.run(collect(blocking)) == [[make_record('Sync')]]
+
+    chunks = asyncio.run(collect(MixedSourceParser('Club', 0)))
+    assert [(chunk[0]['club_name'], len(chunk)) for chunk in chunks] == [('Club', 1), ('Foreign', 1)]
+
+
+if __name__ == "__main__":
+    test_parsers_run_concurrently()
+    test_hanging_parser_is_cancelled_and_partial_results_kept()
+    print("✅ Тесты ParserService пройдены")
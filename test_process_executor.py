@@ -0,0 +1,284 @@
+import os
+import subprocess
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.parsers.base_parser import BaseParser
+from app.parsers.registry import ParserSpec
+from app.services.process_executor import (
+    ProcessScrapeExecutor, WorkerError, WorkerLimitExceeded, WorkerParser, decode_records, encode_records
+)
+
+
+def make_records(days):
+    return [{
+        'club_name': 'Worker Club',
+        'court_number': '1',
+        'date': date(2030, 1, day),
+        'time_slot': '10:00',
+        'status': 'свободен'
+    } for day in range(1, days + 1)]
+
+
+class EchoParser(BaseParser):
+    def __init__(self, days=2):
+        super().__init__()
+        self.club_name = 'Worker Club'
+        self.days = days
+
+    def get_courts_data(self):
+        self.report_failure('источник частично недоступен')
+        return make_records(self.days)
+
+
+class HangingParser(EchoParser):
+    def get_courts_data(self):
+        time.sleep(60)
+
+
+class GreedyParser(EchoParser):
+    def get_courts_data(self):
+        ballast = bytearray(300 * 1024 * 1024)
+        time.sleep(30)
+        return ballast
+
+
+class FailingParser(EchoParser):
+    def get_courts_data(self):
+        raise RuntimeError('разметка изменилась')
+
+
+class CountingParser(EchoParser):
+    """Запоминает число запусков: состояние парсера живет в воркере между заданиями"""
+
+    def __init__(self, days=1):
+        super().__init__(days)
+        self.runs = 0
+
+    def get_courts_data(self):
+        self.runs += 1
+        records = make_records(1)
+        records[0]['court_number'] = f'{os.getpid()}:{self.runs}'
+        return records
+
+
+class BusyParser(EchoParser):
+    def get_courts_data(self):
+        while True:
+            pass
+
+
+class GuardedParser(EchoParser):
+    """Учитывает сбой хоста API в размыкателе воркера"""
+
+    def get_courts_data(self):
+        from app.services.host_guard import get_host_guard
+        get_host_guard().record_failure('api.worker.test', 'HTTP 503')
+        return make_records(1)
+
+
+class MainProbeParser(EchoParser):
+    """Сообщает, выполнила ли точка входа (__mp_main__) запуск приложения в воркере"""
+
+    def get_courts_data(self):
+        main = sys.modules.get('__mp_main__')
+        records = make_records(1)
+        records[0]['club_name'] = 'app-created' if hasattr(main, 'app') else 'clean'
+        return records
+
+
+def spec(class_name, **options):
+    return ParserSpec(class_name, f'test_process_executor:{class_name}', options)
+
+
+def test_records_survive_compact_encoding():
+    records = make_records(3)
+    assert decode_records(encode_records(records)) == records
+
+
+def test_parser_runs_in_worker_process():
+    executor = ProcessScrapeExecutor(max_workers=1)
+    chunks = []
+
+    records, error = executor.run(spec('EchoParser', days=3))
+    assert records == make_records(3)
+    assert error == 'источник частично недоступен'
+
+    records, _ = executor.run(spec('EchoParser', days=2), on_chunk=chunks.append)
+    assert records == []
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+
+
+def test_worker_over_wall_time_is_killed():
+    executor = ProcessScrapeExecutor(max_workers=1)
+
+    started = time.monotonic()
+    with pytest.raises(WorkerLimitExceeded):
+        executor.run(spec('HangingParser'), timeout=3)
+    assert time.monotonic() - started < 10
+
+
+@pytest.mark.skipif(not Path('/proc').is_dir(), reason='RSS читается из /proc')
+def test_worker_over_memory_limit_is_killed():
+    executor = ProcessScrapeExecutor(max_workers=1, memory_limit_mb=200)
+
+    with pytest.raises(WorkerLimitExceeded, match='памяти'):
+        executor.run(spec('GreedyParser'), timeout=20)
+
+
+def test_parser_exception_is_not_reported_as_limit():
+    executor = ProcessScrapeExecutor(max_workers=1)
+
+    with pytest.raises(WorkerError, match='разметка изменилась') as error:
+        executor.run(spec('FailingParser'), timeout=20)
+    assert not isinstance(error.value, WorkerLimitExceeded)
+    # Ошибка парсера не роняет воркер: он остается в пуле
+    assert len(executor._idle) == 1 and executor._idle[0].process.is_alive()
+    executor.close()
+
+
+def run_counting(executor, **options):
+    records, _ = executor.run(spec('CountingParser', **options), timeout=30)
+    pid, runs = records[0]['court_number'].split(':')
+    return int(pid), int(runs)
+
+
+def test_worker_keeps_parser_state_between_runs():
+    executor = ProcessScrapeExecutor(max_workers=1)
+
+    first_pid, first_runs = run_counting(executor)
+    second_pid, second_runs = run_counting(executor)
+    assert second_pid == first_pid
+    assert (first_runs, second_runs) == (1, 2)
+
+    # Дедлайн останавливает воркер, следующее задание получает новый
+    with pytest.raises(WorkerLimitExceeded):
+        executor.run(spec('HangingParser'), timeout=2)
+    pid, runs = run_counting(executor)
+    assert pid != first_pid and runs == 1
+    executor.close()
+
+
+def test_worker_is_recycled_after_max_jobs():
+    executor = ProcessScrapeExecutor(max_workers=1, max_jobs=1)
+
+    first_pid, _ = run_counting(executor)
+    second_pid, runs = run_counting(executor)
+    assert second_pid != first_pid and runs == 1
+    executor.close()
+
+
+@pytest.mark.skipif(not Path('/proc').is_dir(), reason='процессорное время читается из /proc')
+def test_worker_over_cpu_limit_is_killed():
+    executor = ProcessScrapeExecutor(max_workers=1, cpu_limit=1)
+
+    with pytest.raises(WorkerLimitExceeded, match='процессорного'):
+        executor.run(spec('BusyParser'), timeout=30)
+
+
+def test_host_breakers_of_worker_reach_parent():
+    executor = ProcessScrapeExecutor(max_workers=1)
+
+    for failures in (1, 2):
+        executor.run(spec('GuardedParser'), timeout=30)
+        # Размыкатель живет в воркере между заданиями и виден родителю
+        assert executor.host_snapshot()['api.worker.test']['failures'] == failures
+    executor.close()
+
+
+def test_process_mode_does_not_create_parsers_in_parent(tmp_path):
+    import asyncio
+    from app import create_app
+    from app.services.parser_service import ParserService
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'SCHEDULER_ENABLED': False,
+        'RETENTION_ENABLED': False,
+        'PARSER_ISOLATION': 'process',
+        'PARSERS': [{'name': 'echo', 'path': 'test_process_executor:EchoParser',
+                     'options': {'days': 2}, 'club_name': 'Worker Club', 'host': 'worker.test'}]
+    })
+    service = ParserService(app)
+
+    parsers = service.parsers
+    assert [type(p) for p in parsers] == [WorkerParser]
+    assert (parsers[0].club_name, parsers[0].host) == ('Worker Club', 'worker.test')
+
+    assert asyncio.run(service.stream_all_clubs(app)) == 2
+    assert not service.registry.is_loaded
+    assert parsers[0].last_error == 'источник частично недоступен'
+
+
+SCRIPT_MAIN = """
+import runpy
+import sys
+
+sys.path.insert(0, {root!r})
+
+import flask
+import app as app_package
+from app.parsers.registry import ParserSpec
+from app.services.process_executor import ProcessScrapeExecutor
+
+real_create_app = app_package.create_app
+app_package.create_app = lambda: real_create_app({{
+    'SQLALCHEMY_DATABASE_URI': {database!r}, 'SCHEDULER_ENABLED': False, 'RETENTION_ENABLED': False
+}})
+
+
+def run_worker(self, *args, **kwargs):
+    spec = ParserSpec('probe', 'test_process_executor:MainProbeParser')
+    records, _ = ProcessScrapeExecutor(max_workers=1, wall_timeout=60).run(spec)
+    print(records[0]['club_name'])
+
+
+flask.Flask.run = run_worker
+# run.py выполняется как __main__, воркер (spawn) импортирует его как __mp_main__
+runpy.run_path({run_py!r}, run_name='__main__')
+"""
+
+
+def test_worker_does_not_start_app_from_script_main(tmp_path):
+    script = tmp_path / 'main.py'
+    script.write_text(SCRIPT_MAIN.format(
+        root=str(root_dir), database=f"sqlite:///{tmp_path / 'test.db'}", run_py=str(root_dir / 'run.py')
+    ))
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=120,
+                            env={**os.environ, 'WERKZEUG_RUN_MAIN': 'true'})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == 'clean'
+
+
+SCRIPT_WSGI = """
+import sys
+
+sys.path.insert(0, {root!r})
+
+import app as app_package
+
+real_create_app = app_package.create_app
+app_package.create_app = lambda: real_create_app({{
+    'SQLALCHEMY_DATABASE_URI': {database!r}, 'SCHEDULER_ENABLED': False, 'RETENTION_ENABLED': False
+}})
+
+# Так модуль импортируют flask --app run и gunicorn run:app
+import run
+print(type(run.app).__name__)
+"""
+
+
+def test_run_module_exposes_wsgi_app(tmp_path):
+    script = tmp_path / 'wsgi.py'
+    script.write_text(SCRIPT_WSGI.format(root=str(root_dir), database=f"sqlite:///{tmp_path / 'test.db'}"))
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == 'Flask'
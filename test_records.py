@@ -0,0 +1,58 @@
+import sys
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.parsers.records import STATUS_BUSY, SlotRecord, to_records
+
+
+def make_slot(factory, court, day, hour, minute):
+    status = 'свободен' if (court + hour) % 2 else 'занят'
+    return factory('Tsaritsyno Tennis Club', str(court), date(2030, 1, day), f"{hour:02d}:{minute:02d}", status)
+
+
+def as_dict(club_name, court_number, slot_date, time_slot, status):
+    return {'club_name': club_name, 'court_number': court_number, 'date': slot_date,
+            'time_slot': time_slot, 'status': status}
+
+
+def test_record_reads_like_dict():
+    record = SlotRecord('Club', 2, date(2030, 1, 1), '21:30', 'занят')
+
+    assert record.minutes == 21 * 60 + 30
+    assert record.status_code == STATUS_BUSY
+    assert record['time_slot'] == '21:30'
+    assert record['court_number'] == '2'
+    assert record == as_dict('Club', '2', date(2030, 1, 1), '21:30', 'занят')
+    assert SlotRecord.unpack(record.pack()) == record
+    assert to_records([record.as_dict()]) == [record]
+
+
+def test_duplicates_collapse_by_hash():
+    records = [make_slot(SlotRecord, 1, 1, 10, 0), make_slot(SlotRecord, 1, 1, 10, 0),
+               make_slot(SlotRecord, 2, 1, 10, 0)]
+    assert len(set(records)) == 2
+
+
+def test_unusual_time_is_kept_verbatim():
+    record = SlotRecord('Club', '1', date(2030, 1, 1), '1000', 'свободен')
+    assert record.minutes is None
+    assert record.time_slot == '1000'
+
+
+def measure(factory):
+    tracemalloc.start()
+    slots = [make_slot(factory, court, day, hour, minute)
+             for day in (1, 2, 3) for court in range(1, 11)
+             for hour in range(7, 24) for minute in (0, 30)]
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return used / len(slots)
+
+
+def test_compact_records_use_several_times_less_memory():
+    assert measure(as_dict) > 3 * measure(SlotRecord)
@@ -0,0 +1,60 @@
+import subprocess
+import sys
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.parsers.registry import ParserRegistry, ParserSpec
+from app.services.import_report import HEAVY_MODULES, parse_importtime, summarize
+
+
+def test_parsers_are_imported_on_first_use():
+    registry = ParserRegistry.from_config({'PARSERS': [
+        {'name': 'api', 'path': 'app.parsers.yclients_api_parser:YClientsApiParser',
+         'options': {'days': 2, 'partner_token': None}},
+        {'name': 'off', 'path': 'app.parsers.findsport_parser:FindSportParser', 'enabled': False},
+    ]})
+
+    assert registry.names == ['api']
+    assert not registry.is_loaded
+
+    parsers = registry.parsers()
+    assert [p.__class__.__name__ for p in parsers] == ['YClientsApiParser']
+    assert parsers[0].days == 2
+    assert registry.parsers() is parsers
+
+
+def test_spec_requires_module_and_class():
+    try:
+        ParserSpec('bad', 'app.parsers.findsport_parser')
+    except ValueError:
+        return
+    raise AssertionError('ожидалась ошибка пути парсера')
+
+
+def test_web_worker_does_not_load_parser_dependencies():
+    code = (
+        'import sys, app.routes, app.services.parser_service; '
+        f'print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=root_dir,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
+
+
+def test_importtime_summary():
+    output = (
+        'import time: self [us] | cumulative | imported package\n'
+        'import time:       100 |        100 |   json.decoder\n'
+        'import time:       200 |        300 | json\n'
+        'import time:      5000 |       5000 | requests\n'
+    )
+    entries = parse_importtime(output)
+    assert entries[0] == ('json.decoder', 100, 100, 1)
+
+    summary = summarize(entries, top=1)
+    assert summary['total_ms'] == 5.3
+    assert summary['slowest'][0][0] == 'requests'
+    assert summary['heavy_loaded'] == ['requests']
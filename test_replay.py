@@ -0,0 +1,40 @@
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.parsers.findsport_parser import FindSportParser
+from app.parsers.yclients_api_parser import YClientsApiParser
+from app.services.replay import ScrapeHarness, benchmark_parser
+from test_yclients_api import start_server
+
+
+def test_recorded_traffic_is_replayed_offline(tmp_path):
+    server = start_server()
+    try:
+        live_parser = YClientsApiParser(api_base=f'http://127.0.0.1:{server.server_port}')
+        recorded = asyncio.run(benchmark_parser(live_parser, 'record', tmp_path))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert (tmp_path / 'YClientsApiParser.json').exists()
+
+    # Исходный сервер остановлен: данные отдаются только из фикстуры
+    replay_parser = YClientsApiParser(api_base=f'http://127.0.0.1:{server.server_port}')
+    replayed = asyncio.run(benchmark_parser(replay_parser, 'replay', tmp_path))
+
+    assert replayed['records'] == recorded['records'] == 8
+    assert replayed['ipc_calls'] == recorded['ipc_calls'] > 0
+    assert replayed['records_per_second'] > 0
+
+
+def test_selenium_parsers_are_not_replayed(tmp_path):
+    # У Selenium подменяется только адрес документа: подресурсы шли бы в живую сеть
+    with pytest.raises(ValueError):
+        ScrapeHarness('replay', tmp_path).prepare(FindSportParser())
@@ -0,0 +1,118 @@
+import sys
+import csv
+import gzip
+import sqlite3
+from datetime import date, timedelta
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app import create_app, db
+from app.models import ScrapeFingerprint, TennisCourt
+from app.parsers.records import SlotRecord
+from app.services import retention
+from app.services.fingerprints import row_counts_query
+from app.services.retention import RetentionWorker
+from app.services.storage import query_plan, statuses_query, upcoming_slots, upsert_slots
+
+TODAY = date(2030, 6, 15)
+
+
+def make_app(tmp_path):
+    return create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}", 'SCHEDULER_ENABLED': False})
+
+
+def fill(days_back, courts=10):
+    records = [
+        SlotRecord('Club', str(court), TODAY - timedelta(days=offset), minutes, 'свободен')
+        for offset in range(days_back, -2, -1)
+        for court in range(1, courts + 1)
+        for minutes in range(7 * 60, 23 * 60, 30)
+    ]
+    upsert_slots(records, 0)
+    db.session.add(ScrapeFingerprint(club_name='Club', date=TODAY - timedelta(days=days_back),
+                                     fingerprint='x', record_count=1))
+    db.session.commit()
+    return len(records)
+
+
+def test_past_slots_are_purged_in_batches_and_archived(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        total = fill(days_back=30)
+        worker = RetentionWorker(app, retention_days=7, batch_size=500, batch_pause=0,
+                                 archive_dir=tmp_path / 'archive')
+        stats = worker.purge(TODAY)
+
+        per_day = 10 * 32
+        assert stats['deleted'] == 23 * per_day
+        assert stats['batches'] == -(-stats['deleted'] // 500)
+        assert stats['fingerprints'] == 1
+        assert TennisCourt.query.count() == total - stats['deleted']
+        assert TennisCourt.query.filter(TennisCourt.date < TODAY - timedelta(days=7)).count() == 0
+
+        archived = []
+        for path in sorted((tmp_path / 'archive').glob('*.csv.gz')):
+            with gzip.open(path, 'rt', encoding='utf-8') as archive_file:
+                archived += list(csv.DictReader(archive_file))
+        assert len(archived) == stats['deleted'] == stats['archived']
+        assert archived[0]['club_name'] == 'Club'
+
+        # Повторный проход ничего не удаляет
+        assert worker.purge(TODAY)['deleted'] == 0
+
+
+def test_compaction_frees_pages_and_keeps_plans(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        fill(days_back=60)
+        worker = RetentionWorker(app, retention_days=0, batch_pause=0, vacuum_pages=100000)
+        stats = worker.run_once(TODAY)
+
+        assert 'vacuum' not in stats  # новая база сразу создана с auto_vacuum=INCREMENTAL
+        assert stats['freed_pages'] > 0
+        db.session.commit()
+        assert db.session.execute(db.text("PRAGMA freelist_count")).scalar() == 0
+        sizes = worker.snapshot()['sizes']
+        assert {'tennis_court', 'ix_tennis_court_listing'} <= set(sizes['objects'])
+
+        # Со статистикой ANALYZE горячие запросы по-прежнему идут по индексам
+        plans = [
+            query_plan(upcoming_slots(0, TODAY)),
+            query_plan(statuses_query({'Club'}, {TODAY})),
+            query_plan(row_counts_query({'Club'}, {TODAY})),
+        ]
+        for plan in plans:
+            assert not any(step.startswith('SCAN tennis_court') for step in plan), plan
+            assert not any('TEMP B-TREE' in step for step in plan), plan
+
+
+def test_legacy_database_switches_to_incremental_vacuum(tmp_path):
+    path = tmp_path / 'test.db'
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE placeholder (id INTEGER)")
+    connection.commit()
+    connection.close()
+
+    app = make_app(tmp_path)
+    with app.app_context():
+        assert db.session.execute(db.text("PRAGMA auto_vacuum")).scalar() == 0
+        assert RetentionWorker(app).compact()['vacuum'] == 'full'
+        db.session.commit()
+        assert db.session.execute(db.text("PRAGMA auto_vacuum")).scalar() == 2
+        assert 'vacuum' not in RetentionWorker(app).compact()
+
+
+def test_status_reports_database_and_retention(tmp_path, monkeypatch):
+    app = make_app(tmp_path)
+    with app.app_context():
+        worker = RetentionWorker(app, batch_pause=0)
+        worker.run_once(TODAY)
+    monkeypatch.setattr(retention, '_worker', worker)
+
+    status = app.test_client().get('/status').get_json()
+    assert status['database']['bytes'] > 0
+    assert status['retention']['last_stats']['cutoff'] == (TODAY - timedelta(days=7)).isoformat()
+    assert status['retention']['sizes']['objects']['tennis_court'] > 0
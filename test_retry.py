@@ -0,0 +1,102 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.parsers.retry import RetryBudget, RetryPolicy
+
+
+class Flaky:
+    def __init__(self, failures, error=ConnectionError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error('сбой')
+        return 'ok'
+
+
+def test_sync_retry_succeeds_after_transient_errors():
+    func = Flaky(2)
+    assert RetryPolicy(max_attempts=3, base_delay=0).call(func) == 'ok'
+    assert func.calls == 3
+
+
+def test_fatal_and_marked_errors_are_not_retried():
+    policy = RetryPolicy(max_attempts=5, base_delay=0)
+
+    func = Flaky(1, error=TypeError)
+    with pytest.raises(TypeError):
+        policy.call(func)
+    assert func.calls == 1
+
+    class MarkedError(Exception):
+        retryable = False
+
+    func = Flaky(1, error=MarkedError)
+    with pytest.raises(MarkedError):
+        policy.call(func)
+    assert func.calls == 1
+
+
+def test_budget_is_shared_across_calls():
+    policy = RetryPolicy(max_attempts=5, base_delay=0)
+    budget = RetryBudget(limit=2)
+
+    first, second = Flaky(10), Flaky(10)
+    with pytest.raises(ConnectionError):
+        policy.call(first, budget=budget)
+    with pytest.raises(ConnectionError):
+        policy.call(second, budget=budget)
+
+    assert first.calls == 3
+    assert second.calls == 1
+    assert budget.remaining == 0
+
+
+def test_backoff_grows_and_is_capped():
+    policy = RetryPolicy(base_delay=1, max_delay=5, jitter=0)
+    assert [policy.delay_for(n) for n in range(4)] == [1, 2, 4, 5]
+
+
+def test_cancel_interrupts_sync_backoff():
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+
+    started = time.monotonic()
+    with pytest.raises(ConnectionError):
+        RetryPolicy(max_attempts=3, base_delay=10, jitter=0).call(Flaky(10), cancel_event=cancel)
+    assert time.monotonic() - started < 2
+
+
+def test_async_retry_does_not_block_event_loop():
+    async def scenario():
+        func = Flaky(1)
+        ticks = []
+
+        async def attempt():
+            return func()
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        policy = RetryPolicy(max_attempts=2, base_delay=0.1, jitter=0)
+        result, _ = await asyncio.gather(policy.call_async(attempt), ticker())
+        return result, ticks
+
+    result, ticks = asyncio.run(scenario())
+    assert result == 'ok'
+    # Другие корутины продолжали работать во время паузы перед повтором
+    assert len(ticks) == 5 and ticks[-1] - ticks[0] < 0.1
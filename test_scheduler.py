@@ -0,0 +1,99 @@
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.services.scheduler import RefreshScheduler
+
+
+class FakeParser:
+    club_name = 'Club'
+
+
+class FakeService:
+    def __init__(self):
+        self.parsers = [FakeParser()]
+
+
+def make_scheduler(tmp_path, **kwargs):
+    return RefreshScheduler(app=None, service=FakeService(), jitter=0,
+                            state_path=tmp_path / 'schedule.json', **kwargs)
+
+
+def test_near_and_volatile_dates_are_refreshed_more_often(tmp_path):
+    scheduler = make_scheduler(tmp_path, base_interval=600, min_interval=60, max_interval=100000)
+
+    assert scheduler.compute_interval(0, 0.5) < scheduler.compute_interval(2, 0.5)
+    assert scheduler.compute_interval(0, 1.0) < scheduler.compute_interval(0, 0.0)
+
+
+def test_change_rate_adapts_and_schedule_is_persisted(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    parser = FakeParser()
+    now = time.time()
+
+    # Новые клубы обновляются сразу по всем датам
+    assert scheduler.due_offsets(parser, now) == [0, 1, 2]
+
+    for _ in range(5):
+        scheduler.record_result('FakeParser', [0, 1, 2], {0}, now=now)
+    scheduler._save_state()
+
+    entries = scheduler.state['FakeParser']
+    assert entries['0']['change_rate'] > 0.9
+    assert entries['2']['change_rate'] < 0.1
+    assert entries['0']['interval'] < entries['2']['interval']
+    assert scheduler.due_offsets(parser, now) == []
+
+    restored = make_scheduler(tmp_path)
+    assert restored.state == scheduler.state
+    assert restored.due_offsets(parser, now + entries['0']['interval'] + 1) == [0]
+
+
+class SharedClubParser:
+    """Источник клуба, который описывает и другой источник; данные не меняются"""
+
+    club_name = 'Shared Club'
+    host = None
+    timeout = None
+    streams = False
+
+    def __init__(self, source, courts):
+        self.source = source
+        self.courts = courts
+        self.last_error = None
+        self.retry_budget = None
+
+    def reset_cancel(self):
+        pass
+
+    async def get_courts_data(self):
+        today = datetime.now().date()
+        return [{'club_name': self.club_name, 'court_number': str(court), 'date': today,
+                 'time_slot': '10:00', 'status': 'свободен' if court % 2 else 'занят'}
+                for court in range(1, self.courts + 1)]
+
+
+def test_sources_sharing_club_settle_without_changes(tmp_path):
+    from app import create_app
+    from app.services.parser_service import ParserService
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+                      'SCHEDULER_ENABLED': False, 'PARSER_ISOLATION': 'inline'})
+    service = ParserService(app)
+    service.parsers = [SharedClubParser('findsport', 3), SharedClubParser('tsaritsyno', 2)]
+    scheduler = RefreshScheduler(app, service=service, jitter=0, days=1, state_path=tmp_path / 'schedule.json')
+
+    for _ in range(4):
+        for parser in service.parsers:
+            scheduler._refresh(parser, [0])
+
+    # После первого обновления данные не менялись: частота изменений падает у обоих источников
+    for source in ('findsport', 'tsaritsyno'):
+        entry = scheduler.state[source]['0']
+        assert entry['change_rate'] < 0.5
+        assert entry['interval'] > scheduler.base_interval
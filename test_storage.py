@@ -0,0 +1,196 @@
+import sys
+import sqlite3
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app import create_app, db, routes
+from app.models import DataGeneration, TennisCourt
+from app.parsers.records import SlotRecord
+from app.services.fingerprints import row_counts_query
+from app.services.storage import (VERSION_KEY, ensure_indexes, query_plan, read_session, reader_engine,
+                                  save_slots_per_record, statuses_query, upcoming_slots, upsert_slots)
+
+
+def make_records(count, status='свободен'):
+    return [SlotRecord('Club', str(index % 4 + 1), date(2030, 1, 1), index // 4 * 30 % 1440, status)
+            for index in range(count)]
+
+
+def test_upsert_counts_and_writes_only_changes(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"})
+    with app.app_context():
+        records = make_records(10)
+        assert upsert_slots(records, 1, chunk_size=3) == {'inserted': 10, 'updated': 0, 'unchanged': 0}
+        db.session.commit()
+
+        records[0] = SlotRecord('Club', '1', date(2030, 1, 1), '00:00', 'занят')
+        # Повтор ключа: побеждает последняя запись
+        records.append(SlotRecord('Club', '2', date(2030, 1, 1), '00:00', 'занят'))
+        assert upsert_slots(records, 2, chunk_size=3) == {'inserted': 0, 'updated': 2, 'unchanged': 8}
+        db.session.commit()
+
+        # Изменившиеся слоты получили новые версии, прежние закрыты поколением 2
+        assert TennisCourt.query.count() == 12
+        assert TennisCourt.query.filter_by(valid_to=2).count() == 2
+        busy = TennisCourt.query.filter_by(status='занят').order_by(TennisCourt.court_number).all()
+        assert [(row.court_number, row.time_slot, row.valid_from) for row in busy] == [('1', '00:00', 2),
+                                                                                       ('2', '00:00', 2)]
+
+        # Повторная запись в то же поколение меняет его версию на месте
+        assert upsert_slots([SlotRecord('Club', '1', date(2030, 1, 1), '00:00', 'свободен')], 2) == {
+            'inserted': 0, 'updated': 1, 'unchanged': 0}
+        db.session.commit()
+        assert TennisCourt.query.count() == 12
+        assert [r.status for r in upcoming_slots(1, date(2030, 1, 1)).limit(2)] == ['свободен', 'свободен']
+        assert [r.status for r in upcoming_slots(2, date(2030, 1, 1)).limit(2)] == ['свободен', 'занят']
+
+
+def test_upsert_matches_per_record_save(tmp_path):
+    results = []
+    for name, write in (('bulk', upsert_slots), ('loop', save_slots_per_record)):
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / f'{name}.db'}"})
+        with app.app_context():
+            counts = [write(make_records(40), 1), write(make_records(60, 'занят'), 2)]
+            db.session.commit()
+            rows = sorted((r.court_number, r.time_slot, r.status, r.valid_from, r.valid_to) for r in TennisCourt.query)
+        results.append((counts, rows))
+    assert results[0] == results[1]
+
+
+def test_slot_key_added_to_legacy_database(tmp_path):
+    path = tmp_path / 'legacy.db'
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        "CREATE TABLE tennis_court (id INTEGER PRIMARY KEY, club_name VARCHAR(100) NOT NULL,"
+        " court_number VARCHAR(50) NOT NULL, date DATE NOT NULL, time_slot VARCHAR(10) NOT NULL,"
+        " status VARCHAR(20) NOT NULL, created_at DATETIME, updated_at DATETIME);"
+        "INSERT INTO tennis_court (club_name, court_number, date, time_slot, status) VALUES"
+        " ('Club', '1', '2030-01-01', '10:00', 'свободен'),"
+        " ('Club', '1', '2030-01-01', '10:00', 'занят'),"
+        " ('Club', '2', '2030-01-01', '10:00', 'свободен');"
+        "CREATE TABLE data_generation (id INTEGER PRIMARY KEY, status VARCHAR(20) NOT NULL,"
+        " started_at DATETIME, finished_at DATETIME);"
+        "INSERT INTO data_generation (status) VALUES ('building');"
+        "CREATE TABLE scrape_fingerprint (id INTEGER PRIMARY KEY, club_name VARCHAR(100) NOT NULL,"
+        " date DATE NOT NULL, fingerprint VARCHAR(64) NOT NULL, record_count INTEGER NOT NULL,"
+        " updated_at DATETIME, CONSTRAINT uq_scrape_fingerprint UNIQUE (club_name, date));"
+        "INSERT INTO scrape_fingerprint (club_name, date, fingerprint, record_count)"
+        " VALUES ('Club', '2030-01-01', 'x', 2);"
+    )
+    connection.commit()
+    connection.close()
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{path}"})
+    with app.app_context():
+        # Дубликат удален, осталась самая свежая строка - версия поколения 0
+        rows = sorted((r.court_number, r.status, r.valid_from, r.valid_to) for r in TennisCourt.query)
+        assert rows == [('1', 'занят', 0, None), ('2', 'свободен', 0, None)]
+        inspector = db.inspect(db.engine)
+        assert VERSION_KEY in [tuple(c['column_names']) for c in inspector.get_unique_constraints('tennis_court')]
+        indexes = {index['name'] for index in inspector.get_indexes('tennis_court')}
+        assert {'ix_tennis_court_listing', 'ix_tennis_court_club_date', 'ix_tennis_court_closed'} <= indexes
+        assert 'tennis_court_legacy' not in inspector.get_table_names()
+        # Столбцы владельца поколения добавлены; поколение без владельца считается брошенным
+        columns = {column['name'] for column in inspector.get_columns('data_generation')}
+        assert {'owner_host', 'owner_pid', 'heartbeat_at'} <= columns
+        assert db.session.get(DataGeneration, 1).status == 'aborted'
+        # Отпечатки без источника - устаревший кэш: таблица пересоздана пустой
+        assert 'source' in {column['name'] for column in inspector.get_columns('scrape_fingerprint')}
+        assert db.session.execute(db.text("SELECT COUNT(*) FROM scrape_fingerprint")).scalar() == 0
+
+
+def test_outdated_indexes_are_migrated(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"})
+    with app.app_context():
+        assert ensure_indexes() == []
+        with db.engine.begin() as connection:
+            connection.execute(db.text("DROP INDEX ix_tennis_court_listing"))
+            connection.execute(db.text("CREATE INDEX ix_tennis_court_listing ON tennis_court (date)"))
+            connection.execute(db.text("CREATE INDEX ix_tennis_court_old ON tennis_court (status)"))
+
+        assert ensure_indexes() == ['ix_tennis_court_old', 'ix_tennis_court_listing']
+        columns = [row[2] for row in db.session.execute(db.text("PRAGMA index_info('ix_tennis_court_listing')"))]
+        assert columns == ['date', 'time_slot', 'club_name', 'court_number', 'status', 'valid_from', 'valid_to']
+        assert ensure_indexes() == []
+
+
+def test_hot_queries_use_indexes(tmp_path):
+    """Горячие запросы не должны возвращаться к полному просмотру таблицы и сортировке"""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"})
+    with app.app_context():
+        upsert_slots(make_records(200), 1)
+        db.session.commit()
+
+        plans = {
+            'listing': query_plan(upcoming_slots(1, date(2030, 1, 1))),
+            'row_counts': query_plan(row_counts_query({'Club', 'Other'}, {date(2030, 1, 1), date(2030, 1, 2)})),
+            'upsert_lookup': query_plan(statuses_query({'Club'}, {date(2030, 1, 1)})),
+        }
+        for name, plan in plans.items():
+            assert not any(step.startswith('SCAN tennis_court') for step in plan), (name, plan)
+            assert not any('TEMP B-TREE' in step for step in plan), (name, plan)
+
+        assert any('COVERING INDEX ix_tennis_court_listing' in step for step in plans['listing'])
+        assert any('ix_tennis_court_club_date' in step for step in plans['row_counts'])
+        assert any('COVERING INDEX ix_tennis_court_club_date' in step for step in plans['upsert_lookup'])
+
+
+
+def test_sqlite_pragmas_and_read_only_readers(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}", 'SCHEDULER_ENABLED': False})
+    with app.app_context():
+        pragma = lambda connection, name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+        with db.engine.connect() as connection:
+            assert pragma(connection, 'journal_mode') == 'wal'
+            assert pragma(connection, 'synchronous') == 1  # NORMAL
+            assert pragma(connection, 'cache_size') == -32 * 1024
+            assert pragma(connection, 'query_only') == 0
+
+        assert reader_engine() is not db.engine
+        with reader_engine().connect() as connection:
+            assert pragma(connection, 'query_only') == 1
+            assert pragma(connection, 'mmap_size') == 256 * 1024 * 1024
+
+
+def test_readers_are_not_blocked_by_write_transaction(tmp_path):
+    """Пока обновление держит транзакцию записи, /data отвечает сразу и видит прежние данные"""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}", 'SCHEDULER_ENABLED': False})
+    with app.app_context():
+        upsert_slots([SlotRecord('Club', '1', date(2100, 1, 1), '10:00', 'свободен')], 0)
+        db.session.commit()
+
+        writer = sqlite3.connect(tmp_path / 'test.db', isolation_level=None)
+        writer.execute("BEGIN EXCLUSIVE")
+        writer.execute("UPDATE tennis_court SET status = 'занят'")
+        try:
+            started = time.perf_counter()
+            response = app.test_client().get('/data')
+            assert time.perf_counter() - started < 2
+            assert response.status_code == 200
+            assert [row['status'] for row in response.get_json()] == ['свободен']
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+
+        with read_session() as session:
+            assert len(upcoming_slots(0, date(2100, 1, 1), session=session).all()) == 1
+
+
+def test_update_route_reuses_application(tmp_path, monkeypatch):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}", 'SCHEDULER_ENABLED': False})
+    started = []
+    done = threading.Event()
+    monkeypatch.setattr(routes, 'update_task', lambda task_app: (started.append(task_app), done.set()))
+
+    response = app.test_client().post('/update')
+
+    assert response.status_code == 200
+    assert done.wait(5)
+    # Фоновое обновление пишет через движки этого же приложения, новое не создается
+    assert started == [app]
@@ -0,0 +1,55 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.parsers.synthetic import SyntheticParser
+from app.services.load_profile import run_profile
+
+
+def collect(parser):
+    return asyncio.run(parser.get_courts_data())
+
+
+def test_grid_size_and_determinism():
+    first = collect(SyntheticParser(clubs=3, courts=2, days=4, seed=7))
+    again = collect(SyntheticParser(clubs=3, courts=2, days=4, seed=7))
+
+    assert len(first) == 3 * 2 * 4 * 33
+    assert first == again
+    assert {record.club_name for record in first} == {'Synthetic Club 0001', 'Synthetic Club 0002',
+                                                      'Synthetic Club 0003'}
+
+
+def test_availability_churns_between_runs():
+    parser = SyntheticParser(clubs=2, courts=4, days=2, churn=0.1)
+    first = collect(parser)
+    second = collect(parser)
+
+    changed = sum(a.status != b.status for a, b in zip(first, second))
+    assert 0 < changed < len(first) / 2
+
+    stable = SyntheticParser(clubs=2, courts=4, days=2, churn=0)
+    assert collect(stable) == collect(stable)
+
+
+def test_fallback_data_is_shared_by_parsers():
+    from app.parsers.tsaritsyno_parser import TsaritsynoParser
+    from app.parsers.yclients_adv_parser import YClientsAdvParser
+
+    assert len(TsaritsynoParser()._get_test_data()) == 3 * 2 * 33
+    assert len(YClientsAdvParser()._get_test_data()) == 3 * 3 * 33
+
+
+def test_load_profile_runs_whole_pipeline(tmp_path):
+    results = run_profile(clubs=2, courts=2, days=2, runs=2, churn=0, database=tmp_path / 'load.db')
+
+    assert [r['records'] for r in results] == [264, 264]
+    assert results[0]['saved'] == 264
+    # Без изменений второй запуск ничего не пишет
+    assert results[1]['saved'] == 0
+    assert results[1]['skipped_groups'] == 4
+    assert results[1]['data']['status'] == 200
@@ -0,0 +1,120 @@
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from app.parsers.base_parser import BaseParser
+from app.parsers.findsport_parser import FindSportParser
+from app.parsers.tsaritsyno_parser import TsaritsynoParser
+from app.parsers.waits import (NETWORK_QUIET_JS, XHR_FINISHED_JS, ElementPresent, NetworkQuiet,
+                               WaitCondition, XhrFinished)
+from app.parsers.yclients_parser import YClientsParser
+
+
+class ProbeParser(BaseParser):
+    wait_timeout = 1
+
+    def get_courts_data(self):
+        return []
+
+
+class FakeDriver:
+    """Selenium-драйвер: элементы появляются и скрипты выполняются с ready_after-й проверки"""
+
+    def __init__(self, ready_after=1):
+        self.ready_after = ready_after
+        self.calls = []
+
+    def _ready(self):
+        return len(self.calls) >= self.ready_after
+
+    def find_elements(self, by, selector):
+        self.calls.append(('find', by, selector))
+        return ['element'] if self._ready() else []
+
+    def execute_script(self, script, *args):
+        self.calls.append(('script', script, args))
+        return self._ready()
+
+
+class FakePage:
+    """Playwright-страница: запоминает ожидания, при ready=False - таймаут"""
+
+    def __init__(self, ready=True):
+        self.ready = ready
+        self.calls = []
+
+    async def wait_for_selector(self, selector, **options):
+        self.calls.append(('selector', selector, options))
+        if not self.ready:
+            raise PlaywrightTimeoutError('нет элемента')
+
+    async def wait_for_function(self, script, **options):
+        self.calls.append(('function', script, options))
+        if not self.ready:
+            raise PlaywrightTimeoutError('условие не выполнено')
+
+
+def test_condition_requires_both_checks():
+    class SeleniumOnly(WaitCondition):
+        def check(self, driver):
+            return True
+
+    with pytest.raises(TypeError):
+        SeleniumOnly()
+
+
+def test_element_present_in_selenium_and_playwright():
+    parser = ProbeParser()
+    driver = FakeDriver(ready_after=3)
+    assert parser.wait_for(ElementPresent('div.time-slot'), driver=driver)
+    assert driver.calls[-1] == ('find', 'css selector', 'div.time-slot')
+
+    page = FakePage()
+    assert asyncio.run(parser.wait_for_async(page, ElementPresent('text=Аренда корта'), timeout=2))
+    assert page.calls == [('selector', 'text=Аренда корта', {'state': 'attached', 'timeout': 2000})]
+    assert [success for _, _, success in parser.wait_timings] == [True, True]
+
+
+def test_network_quiet_is_polled_until_timeout():
+    parser = ProbeParser()
+    driver = FakeDriver(ready_after=10 ** 6)
+    assert not parser.wait_for(NetworkQuiet(300), timeout=0.3, driver=driver)
+    # Опрос каждые 100 мс, в скрипт передается порог тишины
+    assert 2 <= len(driver.calls) <= 6
+    assert driver.calls[0] == ('script', f"return ({NETWORK_QUIET_JS})(arguments[0]);", (300,))
+    assert parser.wait_timings[-1][0] == 'тишина в сети 300 мс'
+    assert parser.wait_timings[-1][2] is False
+
+    page = FakePage(ready=False)
+    assert not asyncio.run(parser.wait_for_async(page, NetworkQuiet(300), timeout=1))
+    assert page.calls == [('function', NETWORK_QUIET_JS, {'arg': 300, 'timeout': 1000, 'polling': 100})]
+
+
+def test_xhr_finished_matches_request_url():
+    parser = ProbeParser()
+    driver = FakeDriver(ready_after=2)
+    assert parser.wait_for(XhrFinished('/api/v1/book_'), driver=driver)
+    assert driver.calls[-1][2] == ('/api/v1/book_',)
+
+    page = FakePage()
+    assert asyncio.run(parser.wait_until_ready_async(page, (XhrFinished('/book_times/'), ElementPresent('body'))))
+    assert page.calls[0] == ('function', XHR_FINISHED_JS, {'arg': '/book_times/', 'timeout': 1000, 'polling': 100})
+    assert page.calls[1][0] == 'selector'
+
+
+@pytest.mark.parametrize('parser_class', [FindSportParser, TsaritsynoParser, YClientsParser])
+def test_selenium_parsers_declare_own_ready_conditions(parser_class):
+    conditions = parser_class.ready_conditions
+    assert conditions is not BaseParser.ready_conditions
+    # Selenium проверяет элементы только CSS-селекторами
+    assert any(isinstance(condition, ElementPresent) for condition in conditions)
+    assert all(not condition.selector.startswith('text=')
+               for condition in conditions if isinstance(condition, ElementPresent))
@@ -0,0 +1,99 @@
+import sys
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+from app.parsers import yclients_adv_parser
+from app.parsers.yclients_adv_parser import YClientsAdvParser
+
+# Календари кортов различаются: у первого корта одна дата, у второго - три
+COURT_DATES = [1, 3]
+
+
+class FakeElement:
+    def __init__(self, on_click):
+        self.on_click = on_click
+
+    async def click(self):
+        self.on_click()
+
+
+class FakePage:
+    """Вкладка виджета YClients: услуга -> корт -> дата -> слоты"""
+
+    def __init__(self, context):
+        self.context = context
+        self.court = None
+        self.date = None
+
+    async def goto(self, url, **options):
+        await asyncio.sleep(0.01)
+
+    async def wait_for_selector(self, selector, **options):
+        return FakeElement(lambda: None)
+
+    async def wait_for_function(self, script, **options):
+        await asyncio.sleep(0.01)
+
+    async def query_selector_all(self, selector):
+        if selector == 'div.court-item':
+            return [FakeElement(lambda court=court: setattr(self, 'court', court))
+                    for court in range(len(COURT_DATES))]
+        if selector == 'div.date-item':
+            return [FakeElement(lambda date=date: setattr(self, 'date', date))
+                    for date in range(COURT_DATES[self.court])]
+        return []
+
+    async def evaluate(self, script, context):
+        self.context.visited.append((self.court, self.date))
+        await asyncio.sleep(0.02)
+        return [{'court': context['court'], 'date': context['date'], 'time': '10:00', 'status': 'free'}]
+
+    async def close(self):
+        self.context.open_pages -= 1
+
+
+class FakeContext:
+    def __init__(self):
+        self.open_pages = 0
+        self.max_open_pages = 0
+        self.visited = []
+
+    async def new_page(self):
+        self.open_pages += 1
+        self.max_open_pages = max(self.max_open_pages, self.open_pages)
+        return FakePage(self)
+
+
+class FakePool:
+    def __init__(self):
+        self.browser_context = FakeContext()
+
+    @asynccontextmanager
+    async def context(self, **options):
+        yield self.browser_context
+
+
+def test_each_court_is_traversed_by_its_own_calendar(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(yclients_adv_parser, 'get_browser_pool', lambda: pool)
+    parser = YClientsAdvParser(concurrency=2, days=3)
+    parser.interception_profile = None
+
+    data = asyncio.run(parser.get_courts_data())
+
+    today = datetime.now().date()
+    assert parser.last_error is None
+    assert [(r['court_number'], r['date']) for r in data] == [
+        ('1', today),
+        ('2', today), ('2', today + timedelta(days=1)), ('2', today + timedelta(days=2)),
+    ]
+    assert sorted(pool.browser_context.visited) == [(0, 0), (1, 0), (1, 1), (1, 2)]
+    # Вкладок разведки и обхода одновременно не больше concurrency, все закрыты
+    assert pool.browser_context.max_open_pages == 2
+    assert pool.browser_context.open_pages == 0
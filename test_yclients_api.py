@@ -0,0 +1,137 @@
+import sys
+import json
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+# Добавляем корневую папку в PYTHONPATH
+root_dir = Path(__file__).parent
+sys.path.insert(0, str(root_dir))
+
+import requests
+
+from app.parsers.yclients_api_parser import YClientsApiParser
+from app.services.host_guard import HostGuard
+
+COMPANY_ID = '967881'
+
+
+class FakeYClientsHandler(BaseHTTPRequestHandler):
+    """Локальная замена API онлайн-записи YClients"""
+
+    requests_seen = []
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        self.requests_seen.append(path)
+        today = datetime.now().date()
+
+        if path == f'/api/v1/book_staff/{COMPANY_ID}':
+            body = {'success': True, 'data': [
+                {'id': 11, 'name': 'Корт №1', 'bookable': True},
+                {'id': 12, 'name': 'Корт №2', 'bookable': True}
+            ]}
+        elif path == f'/api/v1/book_dates/{COMPANY_ID}':
+            body = {'success': True, 'data': {
+                'booking_dates': [today.isoformat(), (today + timedelta(days=1)).isoformat()]
+            }}
+        elif path.startswith(f'/api/v1/book_times/{COMPANY_ID}/'):
+            staff_id = path.rsplit('/', 2)[1]
+            times = ['10:00', '11:00'] if staff_id == '11' else ['10:00']
+            body = {'success': True, 'data': [{'time': t, 'seance_length': 3600} for t in times]}
+        else:
+            self.send_error(404)
+            return
+
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeYClientsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_slots_are_read_from_api():
+    server = start_server()
+    FakeYClientsHandler.requests_seen = []
+    try:
+        parser = YClientsApiParser(api_base=f'http://127.0.0.1:{server.server_port}')
+        data = asyncio.run(parser.get_courts_data())
+    finally:
+        server.shutdown()
+
+    today = datetime.now().date()
+    assert len(data) == 2 * 2 * 2  # 2 корта x 2 даты x 2 времени в сетке
+    statuses = {(r['court_number'], r['date'], r['time_slot']): r['status'] for r in data}
+    assert statuses[('1', today, '11:00')] == 'свободен'
+    assert statuses[('2', today, '11:00')] == 'занят'
+    assert statuses[('2', today, '10:00')] == 'свободен'
+
+    # Один запрос корта на весь диапазон дат
+    assert FakeYClientsHandler.requests_seen.count(f'/api/v1/book_dates/{COMPANY_ID}') == 2
+
+
+def test_browser_fallback_when_api_fails(monkeypatch):
+    from app.parsers import yclients_adv_parser
+
+    async def fake_browser_data(self):
+        return [{'club_name': self.club_name, 'source': 'browser'}]
+
+    monkeypatch.setattr(yclients_adv_parser.YClientsAdvParser, 'get_courts_data', fake_browser_data)
+
+    # Порт 9 (discard) закрыт - API недоступно
+    parser = YClientsApiParser(api_base='http://127.0.0.1:9')
+    parser.client.host_guard = HostGuard()
+    data = asyncio.run(parser.get_courts_data())
+
+    assert data == [{'club_name': 'MyProtennis.ru', 'source': 'browser'}]
+
+
+class RefusingSession:
+    """HTTP-сессия, у которой каждый запрос падает на соединении"""
+
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        raise requests.ConnectionError('connection refused')
+
+
+def test_api_failures_open_breaker_of_api_host(monkeypatch):
+    from app.parsers import yclients_adv_parser
+
+    async def fake_browser_data(self):
+        return []
+
+    monkeypatch.setattr(yclients_adv_parser.YClientsAdvParser, 'get_courts_data', fake_browser_data)
+
+    guard = HostGuard(failure_threshold=2)
+    session = RefusingSession()
+    parser = YClientsApiParser()
+    parser.client.host_guard = guard
+    parser.client.session = session
+    parser.retry_policy = parser.retry_policy.with_options(base_delay=0)
+
+    asyncio.run(parser.get_courts_data())
+    # Сбои учтены на хосте API, а не на странице записи парсера
+    hosts = guard.snapshot()
+    assert hosts['api.yclients.com']['state'] == 'open'
+    assert parser.host not in hosts
+    assert len(session.urls) == 2
+
+    # Открытый размыкатель: API не запрашивается, сразу браузерный путь
+    asyncio.run(parser.get_courts_data())
+    assert len(session.urls) == 2